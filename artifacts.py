@@ -0,0 +1,276 @@
+"""Loading and exporting the model artifacts.
+
+The default artifacts in models/ are the joblib pickles written by the
+training notebook. `python artifacts.py export` rewrites them into a shared
+format where every large structure is a plain NumPy array stored uncompressed,
+so `load_artifacts(..., mmap=True)` memory-maps them read-only and all
+uvicorn workers on a host share one physical copy through the page cache.
+
+`python artifacts.py compile` writes a single consolidated bundle instead:
+the linear scorer, featurizer state, labels and metadata in one file with a
+SHA-256 checksum. load_bundle() reads it in one go (or memory-maps it) and
+rebuilds the lean serving objects with NumPy alone, without importing joblib
+or scikit-learn.
+
+Compiling can also shrink the model:
+
+    python artifacts.py compile --prune 0.01 --quantize int8
+
+--prune drops vocabulary terms whose weights barely differ across intents
+(below that fraction of the most important term's), --quantize stores the
+weights as float16, or as int8 with a per-intent scale factor. The served
+bundle keeps the compact weights; benchmarks/bench_compact_bundle.py reports
+what each setting costs in accuracy and saves in size and latency.
+"""
+import argparse
+import hashlib
+import io
+import json
+import mmap as mmap_module
+import os
+import zipfile
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+import numpy as np
+
+from featurizer import FastTfidfFeaturizer, feature_digest, vectorizer_settings
+from scoring import QUANTIZE, LinearScorer, quantize_weights, term_importance
+
+MODEL_FILE = "intent_model.pkl"
+VECTORIZER_FILE = "tfidf_vectorizer.pkl"
+LABEL_ENCODER_FILE = "label_encoder.pkl"
+BUNDLE_FILE = "model.bundle"
+# The number is the format version: bumped whenever the payload layout changes
+BUNDLE_MAGIC = b"INTENT-BUNDLE/2\n"
+
+
+class MappedVocabulary(Mapping):
+    """Read-only term -> column mapping backed by two NumPy arrays.
+
+    A drop-in replacement for the vectorizer's vocabulary_ dict: terms are
+    kept sorted in a fixed-width string array and looked up by binary search,
+    so the whole vocabulary can be memory-mapped instead of living in a
+    per-process dict.
+    """
+
+    def __init__(self, vocabulary):
+        terms = sorted(vocabulary)
+        self.terms = np.array(terms, dtype=str)
+        self.indices = np.array([vocabulary[term] for term in terms], dtype=np.int64)
+
+    def __getitem__(self, term):
+        pos = int(np.searchsorted(self.terms, term))
+        if pos < len(self.terms) and self.terms[pos] == term:
+            return int(self.indices[pos])
+        raise KeyError(term)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return (str(term) for term in self.terms)
+
+
+def load_artifacts(directory="models", mmap=False):
+    """Load (model, vectorizer, label_encoder) from a directory.
+
+    With mmap=True the NumPy arrays inside the files are memory-mapped
+    read-only instead of copied onto the heap.
+    """
+    import joblib
+
+    mmap_mode = "r" if mmap else None
+    model = joblib.load(os.path.join(directory, MODEL_FILE), mmap_mode=mmap_mode)
+    vectorizer = joblib.load(os.path.join(directory, VECTORIZER_FILE), mmap_mode=mmap_mode)
+    le = joblib.load(os.path.join(directory, LABEL_ENCODER_FILE), mmap_mode=mmap_mode)
+    return model, vectorizer, le
+
+
+def export_shared(model, vectorizer, le, out_dir):
+    """Write artifacts whose arrays can be memory-mapped by load_artifacts(mmap=True)"""
+    import joblib
+
+    os.makedirs(out_dir, exist_ok=True)
+    if not isinstance(vectorizer.vocabulary_, MappedVocabulary):
+        vectorizer.vocabulary_ = MappedVocabulary(vectorizer.vocabulary_)
+    # Memory-mapping needs uncompressed, contiguous arrays
+    for estimator in (model, vectorizer, getattr(vectorizer, "_tfidf", None)):
+        if estimator is None:
+            continue
+        for name, value in vars(estimator).items():
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                setattr(estimator, name, np.ascontiguousarray(value))
+    # Class-by-feature weights in Fortran order, so LinearScorer's (features, classes) view of them is C-contiguous
+    for name in ("coef_", "feature_log_prob_"):
+        if isinstance(getattr(model, name, None), np.ndarray):
+            setattr(model, name, np.asfortranarray(getattr(model, name)))
+    joblib.dump(model, os.path.join(out_dir, MODEL_FILE), compress=0)
+    joblib.dump(vectorizer, os.path.join(out_dir, VECTORIZER_FILE), compress=0)
+    joblib.dump(le, os.path.join(out_dir, LABEL_ENCODER_FILE), compress=0)
+
+
+class CompiledArtifacts:
+    """Serving state read from a compiled bundle"""
+
+    def __init__(self, scorer, featurizer, labels, classes, metadata, checksum, feature_digest=None):
+        self.scorer = scorer
+        self.featurizer = featurizer
+        # featurizer.feature_digest() of the vocabulary, idf and analyzer settings
+        self.feature_digest = feature_digest
+        # Column index of the scorer output -> intent label
+        self.labels = labels
+        # Label encoder classes, in encoder order
+        self.classes = classes
+        self.metadata = metadata
+        self.checksum = checksum
+
+
+def compile_bundle(model, vectorizer, le, path, prune=0.0, quantize=None):
+    """Write the lean serving state of a trained artifact set as one checksummed file.
+
+    Layout: the magic line, a JSON header line ({"sha256": ..., "metadata": ...})
+    and an uncompressed .npz payload with every array. Terms are stored as one
+    newline-separated UTF-8 blob in column order.
+
+    prune > 0 drops the terms whose importance is below prune * the largest
+    term importance (see scoring.term_importance); quantize is None, "float16"
+    or "int8".
+    """
+    if quantize not in (None, *QUANTIZE):
+        raise ValueError(f"Unknown quantization {quantize!r} (expected one of {QUANTIZE})")
+    scorer = LinearScorer.from_estimator(model)
+    settings = vectorizer_settings(vectorizer)
+    vocabulary = vectorizer.vocabulary_
+    terms = [None] * len(vocabulary)
+    for term, column in vocabulary.items():
+        terms[column] = term
+    weights = scorer.weights
+    idf = vectorizer.idf_ if vectorizer.use_idf else None
+
+    keep = np.ones(len(terms), dtype=bool)
+    if prune > 0:
+        importance = term_importance(weights, scorer.link)
+        keep = importance >= prune * importance.max()
+        terms = [term for term, kept in zip(terms, keep) if kept]
+        weights = weights[keep]
+        idf = idf[keep] if idf is not None else None
+    if any("\n" in term for term in terms):
+        raise ValueError("Terms containing newlines cannot be compiled")
+
+    scale = None
+    if quantize is not None:
+        weights, scale = quantize_weights(weights, quantize)
+        # Single precision is plenty for idf once the weights are approximate
+        idf = idf.astype(np.float32) if idf is not None else None
+    arrays = {
+        "weights": weights,
+        "bias": scorer.bias,
+        "scorer_classes": scorer.classes_,
+        "labels": np.asarray(le.classes_[model.classes_], dtype=str),
+        "classes": np.asarray(le.classes_, dtype=str),
+        "terms_utf8": np.frombuffer("\n".join(terms).encode(), dtype=np.uint8),
+    }
+    if scale is not None:
+        arrays["scale"] = scale
+    if idf is not None:
+        arrays["idf"] = idf
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    payload = buffer.getvalue()
+
+    metadata = {
+        "model_type": type(model).__name__,
+        "link": scorer.link,
+        "featurizer": {**settings, "dtype": np.dtype(settings["dtype"]).name},
+        "quantize": quantize,
+        "prune": prune,
+        "pruned_terms": int((~keep).sum()),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    header = json.dumps({"sha256": hashlib.sha256(payload).hexdigest(), "metadata": metadata}).encode()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_MAGIC + header + b"\n" + payload)
+    os.replace(tmp, path)
+
+
+def _mapped_npz(data, start):
+    """Arrays of an uncompressed .npz stored at data[start:], as read-only views of data (e.g. an mmap)"""
+    arrays = {}
+    # zipfile finds the archive behind the bundle header and reports absolute offsets
+    with zipfile.ZipFile(data) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError("Compressed bundle payloads cannot be memory-mapped")
+            # Local file header: 30 fixed bytes, then the name and extra field
+            local = data[info.header_offset:info.header_offset + 30]
+            offset = info.header_offset + 30 + int.from_bytes(local[26:28], "little") + int.from_bytes(local[28:30], "little")
+            npy = io.BytesIO(data[offset:offset + min(info.file_size, 1 << 16)])
+            version = np.lib.format.read_magic(npy)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(npy)
+            array = np.frombuffer(data, dtype=dtype, count=int(np.prod(shape)), offset=offset + npy.tell())
+            arrays[info.filename[:-len(".npy")]] = array.reshape(shape, order="F" if fortran_order else "C")
+    return arrays
+
+
+def load_bundle(path, hashed=False, mmap=False):
+    """Read and verify a compiled bundle; raises ValueError if it is corrupt.
+
+    With mmap=True the payload arrays (weights, idf, ...) are read-only views
+    of a memory-mapped file, shared by every process that maps it; the
+    decoded vocabulary is still built per process.
+    """
+    with open(path, "rb") as f:
+        data = mmap_module.mmap(f.fileno(), 0, access=mmap_module.ACCESS_READ) if mmap else f.read()
+    magic = data[:len(BUNDLE_MAGIC)]
+    if magic != BUNDLE_MAGIC:
+        if magic.startswith(BUNDLE_MAGIC.split(b"/")[0] + b"/"):
+            raise ValueError(f"{path} was compiled in another bundle format; compile it again")
+        raise ValueError(f"{path} is not a compiled model bundle")
+    header_end = data.find(b"\n", len(BUNDLE_MAGIC))
+    header = json.loads(data[len(BUNDLE_MAGIC):header_end])
+    payload = memoryview(data)[header_end + 1:]
+    checksum = hashlib.sha256(payload).hexdigest()
+    payload.release()
+    if checksum != header["sha256"]:
+        raise ValueError(f"{path} checksum mismatch (expected {header['sha256']}, got {checksum})")
+
+    metadata = header["metadata"]
+    settings = dict(metadata["featurizer"])
+    settings["ngram_range"] = tuple(settings["ngram_range"])
+    settings["dtype"] = np.dtype(settings["dtype"]).type
+    if mmap:
+        arrays = _mapped_npz(data, header_end + 1)
+    else:
+        with np.load(io.BytesIO(memoryview(data)[header_end + 1:]), allow_pickle=False) as f:
+            arrays = {name: f[name] for name in f.files}
+    terms = arrays["terms_utf8"].tobytes().decode().split("\n") if arrays["terms_utf8"].size else []
+    vocabulary = {term: column for column, term in enumerate(terms)}
+    featurizer = FastTfidfFeaturizer(vocabulary, idf=arrays.get("idf"), hashed=hashed, **settings)
+    scorer = LinearScorer(arrays["weights"], arrays["bias"], metadata["link"], arrays["scorer_classes"],
+                          arrays.get("scale"))
+    return CompiledArtifacts(scorer, featurizer, arrays["labels"], arrays["classes"], metadata, checksum,
+                             feature_digest(settings, terms, arrays.get("idf")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export model artifacts for memory-mapped serving or fast startup")
+    parser.add_argument("command", choices=["export", "compile"])
+    parser.add_argument("--src", default="models", help="directory with the trained pickles")
+    parser.add_argument("--out", help="output directory for export (default models/shared), "
+                                      f"bundle file for compile (default <src>/{BUNDLE_FILE})")
+    parser.add_argument("--prune", type=float, default=0.0,
+                        help="compile: drop terms below this fraction of the top term importance")
+    parser.add_argument("--quantize", choices=QUANTIZE, help="compile: store the weights as float16 or int8")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        out = args.out or "models/shared"
+        export_shared(*load_artifacts(args.src), out)
+        print(f"Shared artifacts written to {out}")
+    else:
+        out = args.out or os.path.join(args.src, BUNDLE_FILE)
+        compile_bundle(*load_artifacts(args.src), out, prune=args.prune, quantize=args.quantize)
+        print(f"Compiled bundle written to {out} ({os.path.getsize(out)} bytes)")
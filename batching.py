@@ -0,0 +1,95 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collect concurrent single-text requests and score them as one batch.
+
+    Callers get a Future back from submit(). A background thread waits up to
+    max_wait_ms after the first queued text (or until max_batch_size texts are
+    waiting), runs predict_fn once over the whole batch and fans the results
+    back out to each Future.
+    """
+
+    def __init__(self, predict_fn, max_wait_ms=2.0, max_batch_size=64):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._histogram = Counter()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        """Queue one text; the Future resolves to that text's row of predict_fn's result.
+
+        With the server's predict_fn that is (intents, confidences), the
+        ranked lists for the text (top 1 only: top_k requests bypass the
+        batcher).
+        """
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text):
+        return self.submit(text).result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            histogram = dict(sorted(self._histogram.items()))
+        batches = sum(histogram.values())
+        requests = sum(size * count for size, count in histogram.items())
+        return {
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": batches,
+            "requests": requests,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in histogram.items()},
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            texts = [text for text, _ in batch]
+            try:
+                intents, confs = self.predict_fn(texts)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future), intent, conf in zip(batch, intents, confs):
+                    future.set_result((intent, conf))
+            with self._lock:
+                self._histogram[len(batch)] += 1
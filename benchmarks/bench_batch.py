@@ -0,0 +1,57 @@
+"""Throughput of /api/classify/batch at different batch sizes.
+
+Compares the current endpoint against the previous implementation
+(predict + predict_proba + per-row LabelEncoder calls).
+
+Run from the repo root:  python benchmarks/bench_batch.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import main  # noqa: E402
+
+BATCH_SIZES = [1, 100, 10_000]
+
+
+def legacy_batch(texts):
+    X = main.bundle.vectorizer.transform(texts)
+    preds = main.bundle.model.predict(X)
+    probs = main.bundle.model.predict_proba(X)
+    results = []
+    for text, pred, prob in zip(texts, preds, probs):
+        intent = main.bundle.le.inverse_transform([pred])[0]
+        conf = float(np.max(prob))
+        results.append({"text": text, "intent": intent, "confidence": conf})
+    return results
+
+
+def timeit(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run():
+    pool = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    client = TestClient(main.app)
+    print(f"{'batch':>7} {'legacy texts/s':>15} {'scoring texts/s':>16} {'endpoint texts/s':>17}")
+    for size in BATCH_SIZES:
+        texts = (pool * (size // len(pool) + 1))[:size]
+        repeat = 20 if size < 1000 else 3
+        legacy = timeit(lambda: legacy_batch(texts), repeat)
+        scoring = timeit(lambda: main.predict_intents(texts), repeat)
+        endpoint = timeit(lambda: client.post("/api/classify/batch", json={"texts": texts}), repeat)
+        print(f"{size:>7} {size / legacy:>15,.0f} {size / scoring:>16,.0f} {size / endpoint:>17,.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+"""Cold start: pickles + scikit-learn versus the compiled bundle on the lean path.
+
+For each configuration, measures in fresh interpreters
+  - the time to `import main` (module import and model load), and whether
+    scikit-learn got imported,
+  - the time from launching uvicorn to the first 200 from /api/ready (the
+    server is up and a warm-up inference has run).
+
+Run from the repo root:  python benchmarks/bench_cold_start.py [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import artifacts  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start, "sklearn" in sys.modules)
+"""
+
+
+def import_time(env):
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", IMPORT_PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def time_to_ready(env, port):
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while time.perf_counter() - start < 60:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server exited with status {proc.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/api/ready", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("server did not become ready")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, "models")
+        os.makedirs(model_dir)
+        for name in (artifacts.MODEL_FILE, artifacts.VECTORIZER_FILE, artifacts.LABEL_ENCODER_FILE):
+            shutil.copy(os.path.join(ROOT, "models", name), model_dir)
+        artifacts.compile_bundle(*artifacts.load_artifacts(model_dir), os.path.join(model_dir, artifacts.BUNDLE_FILE))
+        base = {**os.environ, "INTENT_MODEL_DIR": model_dir, "INTENT_REGISTRY_DIR": os.path.join(tmp, "registry")}
+        configs = {
+            "pickles+sklearn": base,
+            "bundle+lean": {**base, "INTENT_SCORING": "linear", "INTENT_FEATURIZER": "fast"},
+        }
+        print(f"{'config':>16} {'import s':>9} {'sklearn':>8} {'to ready s':>11}")
+        for name, env in configs.items():
+            imports = [import_time(env) for _ in range(args.repeat)]
+            ready = [time_to_ready(env, args.port) for _ in range(args.repeat)]
+            print(f"{name:>16} {statistics.median(t for t, _ in imports):>9.3f} {str(imports[0][1]):>8} "
+                  f"{statistics.median(ready):>11.3f}")
+
+
+if __name__ == "__main__":
+    run()
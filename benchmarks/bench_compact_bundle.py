@@ -0,0 +1,95 @@
+"""Accuracy, size, memory and latency of compact (pruned / quantized) bundles.
+
+Compiles the artifacts in --src with each --prune / --quantize setting and
+compares every bundle with the joblib pickles it came from:
+  - size:      bytes on disk (the three pickles vs the one bundle file),
+  - memory:    bytes allocated while loading (tracemalloc),
+  - accuracy:  on data/test_dataset.csv, and the change against the pickles,
+  - agree:     share of data/full_dataset.csv where the top intent matches the pickles,
+  - latency:   median time to score one query, preprocessing included.
+
+Run from the repo root:  python benchmarks/bench_compact_bundle.py [--src models/trained]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import artifacts  # noqa: E402
+from preprocessing import clean_texts  # noqa: E402
+
+SETTINGS = [(0.0, None), (0.0, "float16"), (0.0, "int8"), (0.01, "int8"), (0.02, "int8"), (0.05, "int8")]
+
+
+def allocated(load):
+    tracemalloc.start()
+    result = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def latency(score, texts, repeat):
+    timings = []
+    for text in texts[:repeat]:
+        start = time.perf_counter()
+        score([text])
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--src", default="models", help="directory with the trained pickles")
+    parser.add_argument("--repeat", type=int, default=2000, help="single queries timed per setting")
+    args = parser.parse_args()
+
+    test = pd.read_csv("data/test_dataset.csv")
+    test_texts = test["text"].astype(str).tolist()
+    full_texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    queries = (full_texts * (args.repeat // len(full_texts) + 1))[:args.repeat]
+
+    artifacts.load_artifacts(args.src)  # imports scikit-learn, so it is not counted below
+    (model, vectorizer, le), pickle_memory = allocated(lambda: artifacts.load_artifacts(args.src))
+
+    def pickle_predict(texts):
+        probs = model.predict_proba(vectorizer.transform(clean_texts(texts)))
+        return le.classes_[model.classes_[probs.argmax(axis=1)]]
+
+    pickle_size = sum(os.path.getsize(os.path.join(args.src, name))
+                      for name in (artifacts.MODEL_FILE, artifacts.VECTORIZER_FILE, artifacts.LABEL_ENCODER_FILE))
+    reference = pickle_predict(full_texts)
+    base_accuracy = float(np.mean(pickle_predict(test_texts) == test["intent"].to_numpy()))
+    print(f"{len(vectorizer.vocabulary_)} terms, {len(le.classes_)} intents\n")
+    print(f"{'artifact':<22} {'terms':>6} {'size KB':>8} {'memory KB':>10} {'accuracy':>9} {'delta':>7} "
+          f"{'agree':>7} {'us/query':>9}")
+    print(f"{'pickles':<22} {len(vectorizer.vocabulary_):>6} {pickle_size / 1024:>8.1f} {pickle_memory / 1024:>10.1f} "
+          f"{base_accuracy:>9.4f} {0:>+7.4f} {1:>7.2%} {latency(pickle_predict, queries, args.repeat) * 1e6:>9.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for prune, quantize in SETTINGS:
+            path = os.path.join(tmp, f"{prune}-{quantize}.bundle")
+            artifacts.compile_bundle(model, vectorizer, le, path, prune=prune, quantize=quantize)
+            compiled, memory = allocated(lambda: artifacts.load_bundle(path))
+
+            def bundle_predict(texts, compiled=compiled):
+                probs = compiled.scorer.predict_proba_csr(*compiled.featurizer.transform_arrays(clean_texts(texts)))
+                return compiled.labels[probs.argmax(axis=1)]
+
+            accuracy = float(np.mean(bundle_predict(test_texts) == test["intent"].to_numpy()))
+            agree = float(np.mean(bundle_predict(full_texts) == reference))
+            name = f"bundle {quantize or 'float64'}" + (f" prune {prune:g}" if prune else "")
+            print(f"{name:<22} {compiled.scorer.n_features:>6} {os.path.getsize(path) / 1024:>8.1f} "
+                  f"{memory / 1024:>10.1f} {accuracy:>9.4f} {accuracy - base_accuracy:>+7.4f} {agree:>7.2%} "
+                  f"{latency(bundle_predict, queries, args.repeat) * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
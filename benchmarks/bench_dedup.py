@@ -0,0 +1,53 @@
+"""Batch latency against the share of duplicate texts in the batch.
+
+Posts batches of --batch-size texts drawn from a pool of distinct texts
+(data/test_dataset.csv) to /api/classify/batch in-process, with the
+prediction cache off, so every unique text reaches the model once per batch.
+With 100% unique texts the result is the cost without deduplication.
+
+Run from the repo root:  python benchmarks/bench_dedup.py [--batch-size 256]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("INTENT_CACHE_MAX_ENTRIES", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    rng = np.random.default_rng(0)
+    client = TestClient(main.app)
+    print(f"{'unique %':>9} {'dedup ratio':>12} {'p50 ms':>8} {'texts/s':>9}")
+    for unique_share in (1.0, 0.5, 0.25, 0.1, 0.02):
+        n_unique = max(1, int(args.batch_size * unique_share))
+        latencies = []
+        ratio = None
+        for _ in range(args.requests):
+            # Distinct texts by construction, so the share of duplicates is exact
+            pool = [f"{text} {i}" for i, text in enumerate(rng.choice(texts, n_unique))]
+            batch = [pool[i] for i in rng.permutation(np.arange(args.batch_size) % n_unique)]
+            start = time.perf_counter()
+            response = client.post("/api/classify/batch", json={"texts": batch})
+            latencies.append(time.perf_counter() - start)
+            ratio = response.headers["X-Dedup-Ratio"]
+        p50 = statistics.median(latencies)
+        print(f"{unique_share:>9.0%} {ratio:>12} {p50 * 1000:>8.2f} {args.batch_size / p50:>9.0f}")
+
+
+if __name__ == "__main__":
+    run()
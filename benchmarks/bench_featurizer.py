@@ -0,0 +1,48 @@
+"""Featurization throughput: TfidfVectorizer.transform versus FastTfidfFeaturizer.
+
+Reports tokens/sec over data/full_dataset.csv for one-text calls (the
+/api/classify shape) and for the whole dataset as one batch.
+
+Run from the repo root:  python benchmarks/bench_featurizer.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import artifacts  # noqa: E402
+from featurizer import FastTfidfFeaturizer  # noqa: E402
+
+
+def best_of(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run():
+    _, vectorizer, _ = artifacts.load_artifacts("models")
+    texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    analyzer = vectorizer.build_analyzer()
+    n_tokens = sum(len(analyzer(t)) for t in texts)
+
+    candidates = {
+        "sklearn": vectorizer.transform,
+        "fast": FastTfidfFeaturizer.from_vectorizer(vectorizer).transform_arrays,
+        "fast-hashed": FastTfidfFeaturizer.from_vectorizer(vectorizer, hashed=True).transform_arrays,
+    }
+    print(f"{len(texts)} texts, {n_tokens} tokens")
+    print(f"{'featurizer':>12} {'1-text calls tok/s':>19} {'one batch tok/s':>16}")
+    for name, transform in candidates.items():
+        single = best_of(lambda: [transform([t]) for t in texts], repeat=3)
+        batch = best_of(lambda: transform(texts))
+        print(f"{name:>12} {n_tokens / single:>19,.0f} {n_tokens / batch:>16,.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,73 @@
+"""Cost of an online update per 1k feedback rows.
+
+Seeds an OnlineLearner from data/train_dataset.csv, then for each feedback
+batch size times the three steps of main.apply_feedback():
+  - apply:   partial_fit on the buffered rows,
+  - publish: save the artifacts and copy them into a registry version,
+  - swap:    load and validate the new version as a ModelBundle,
+and reports each per 1k rows. Feedback rows are sampled (with replacement)
+from data/full_dataset.csv.
+
+Run from the repo root:  python benchmarks/bench_feedback.py [--sizes 100 1000 10000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from online import OnlineLearner  # noqa: E402
+from registry import ModelRegistry, validate_bundle  # noqa: E402
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=3, help="partial_fit passes per update")
+    args = parser.parse_args()
+
+    data = pd.read_csv("data/full_dataset.csv")
+    texts = data["text"].astype(str).to_numpy()
+    intents = data["intent"].to_numpy()
+    classes = sorted(set(intents))
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    learner = OnlineLearner.seed_from_csv("data/train_dataset.csv", classes, epochs=args.epochs)
+    print(f"Seeded in {time.perf_counter() - start:.3f}s\n")
+    print(f"{'rows':>7} {'apply ms':>9} {'publish ms':>11} {'swap ms':>8} {'total ms':>9} {'ms / 1k rows':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(os.path.join(tmp, "registry"))
+        version = 0
+        for size in args.sizes:
+            timings = {"apply": [], "publish": [], "swap": []}
+            for _ in range(args.repeat):
+                pick = rng.integers(0, len(texts), size)
+                learner.add(texts[pick].tolist(), intents[pick].tolist())
+                t0 = time.perf_counter()
+                learner.apply()
+                t1 = time.perf_counter()
+                version += 1
+                staging = os.path.join(tmp, f"staging{version}")
+                learner.save(staging)
+                registry.publish(staging, f"v1-online{version}")
+                t2 = time.perf_counter()
+                validate_bundle(registry.load(f"v1-online{version}", scoring="linear", featurizer="fast"))
+                t3 = time.perf_counter()
+                timings["apply"].append(t1 - t0)
+                timings["publish"].append(t2 - t1)
+                timings["swap"].append(t3 - t2)
+            ms = {step: statistics.median(values) * 1000 for step, values in timings.items()}
+            total = sum(ms.values())
+            print(f"{size:>7} {ms['apply']:>9.2f} {ms['publish']:>11.2f} {ms['swap']:>8.2f} {total:>9.2f} "
+                  f"{total / size * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+"""Cost of adversarial inputs under the request limits.
+
+Times one classify call and measures its working memory (peak traced
+memory beyond what the result holds) for texts of growing length in each
+long-text mode, then for batches of growing size with and without
+chunking (INTENT_BATCH_CHUNK_SIZE).
+
+Run from the repo root:  python benchmarks/bench_long_inputs.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+os.environ.setdefault("INTENT_CACHE_MAX_ENTRIES", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import main  # noqa: E402
+from limits import TextLimits  # noqa: E402
+
+
+def measure(call, repeats):
+    tracemalloc.start()
+    result = call()  # held, so only the memory freed again counts
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies), peak - current
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    sentence = "send the quarterly report to the finance team by email "
+    print(f"{'mode':>9} {'chars':>10} {'p50 ms':>8} {'work KB':>8}")
+    for mode in ("truncate", "window"):
+        main.TEXT_LIMITS = TextLimits(mode=mode)
+        for length in (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7):
+            text = (sentence * (length // len(sentence) + 1))[:length]
+            p50, peak = measure(lambda: main.predict_intents([text]), args.repeats)
+            print(f"{mode:>9} {length:>10} {p50 * 1000:>8.2f} {peak / 1024:>8.0f}")
+
+    print(f"\n{'chunk':>9} {'texts':>10} {'p50 ms':>8} {'work KB':>8}")
+    for chunk in (main.BATCH_CHUNK_SIZE, None):
+        for size in (1000, 4000, 16000):
+            batch = [f"{text} {i}" for i, text in enumerate((texts * (size // len(texts) + 1))[:size])]
+            main.BATCH_CHUNK_SIZE = chunk or size
+            p50, peak = measure(lambda: asyncio.run(main.run_chunked(batch)), args.repeats)
+            print(f"{chunk or 'off':>9} {size:>10} {p50 * 1000:>8.2f} {peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    run()
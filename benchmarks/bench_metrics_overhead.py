@@ -0,0 +1,49 @@
+"""Cost of the /metrics instrumentation on the single-query path.
+
+Runs the same /api/classify loop in two fresh interpreters, one with
+INTENT_METRICS=1 and one with INTENT_METRICS=0, and compares the medians.
+The cache is disabled so every request goes through featurize and score.
+
+Run from the repo root:  python benchmarks/bench_metrics_overhead.py [requests]
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+WORKER = """
+import statistics, sys, time
+from fastapi.testclient import TestClient
+import main
+
+client = TestClient(main.app)
+texts = ["Schedule a meeting with the team on Friday", "Send an email to John", "Search the web for news"]
+for i in range(200):
+    client.post("/api/classify", json={"text": texts[i % 3]})
+samples = []
+for i in range(int(sys.argv[1])):
+    start = time.perf_counter()
+    client.post("/api/classify", json={"text": texts[i % 3]})
+    samples.append(time.perf_counter() - start)
+print(statistics.median(samples))
+"""
+
+
+def median_latency(enabled, requests):
+    env = dict(os.environ, INTENT_METRICS="1" if enabled else "0", INTENT_CACHE_MAX_ENTRIES="0")
+    out = subprocess.run([sys.executable, "-c", WORKER, str(requests)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def run(requests=2000):
+    off = median_latency(False, requests)
+    on = median_latency(True, requests)
+    print(f"metrics off: {off * 1e6:8.0f} us/request")
+    print(f"metrics on:  {on * 1e6:8.0f} us/request")
+    print(f"overhead:    {(on - off) / off:8.1%}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
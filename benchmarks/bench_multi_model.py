@@ -0,0 +1,114 @@
+"""Cost of hosting several models on one vectorizer, and of a shadow model.
+
+Trains one model per family on the same features (train.py --family-out)
+into a temporary directory, then times, per batch of --batch-size texts
+from data/full_dataset.csv:
+  - one model:        ModelBundle.predict_top on a single model,
+  - separate passes:  every model scoring the batch with its own featurize pass,
+  - routed (shared):  predict_routed with the batch split across all models,
+  - all on shared:    predict_routed scoring all texts with each model, featurized once,
+and the p50 latency of in-process /api/classify/batch calls with and without a
+shadow model (compared after the response is computed).
+
+Run from the repo root:  python benchmarks/bench_multi_model.py [--batch-size 256]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from registry import ModelBundle  # noqa: E402
+from routing import predict_routed  # noqa: E402
+
+PARENT = """
+import json, statistics, sys, time
+import pandas as pd
+from fastapi.testclient import TestClient
+import main
+texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+client = TestClient(main.app)
+batch_size, repeat = int(sys.argv[1]), int(sys.argv[2])
+latencies = []
+for i in range(repeat):
+    batch = [f"{text} {i}" for text in texts[i * batch_size % len(texts):][:batch_size]]
+    start = time.perf_counter()
+    client.post("/api/classify/batch", json={"texts": batch})
+    latencies.append(time.perf_counter() - start)
+if main.shadow is not None:
+    main.shadow.shutdown()
+print(json.dumps({"p50": statistics.median(latencies), "shadow": main.shadow.stats() if main.shadow else None}))
+"""
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def endpoint(env, batch_size, repeat):
+    import json
+
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", PARENT, str(batch_size), str(repeat)], cwd=ROOT,
+                         env={**os.environ, **env}, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(os.path.join(ROOT, "data/full_dataset.csv"))["text"].astype(str).tolist()
+    batch = (texts * (args.batch_size // len(texts) + 1))[:args.batch_size]
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, "-W", "ignore", "train.py", "--out", os.path.join(tmp, "best"),
+                        "--cache-dir", os.path.join(tmp, "cache"), "--family-out", os.path.join(tmp, "families")],
+                       cwd=ROOT, check=True, capture_output=True)
+        families = sorted(os.listdir(os.path.join(tmp, "families")))
+        bundles = {name: ModelBundle.load(os.path.join(tmp, "families", name), scoring="linear", featurizer="fast")
+                   for name in families}
+        print(f"{len(bundles)} models ({', '.join(families)}), batches of {args.batch_size}\n")
+
+        first = bundles[families[0]]
+        routed = [families[i % len(families)] for i in range(len(batch))]
+
+        def all_on_shared():
+            features = first.featurize(first.prepare(batch))
+            return [bundle.score(features) for bundle in bundles.values()]
+
+        rows = {
+            "one model": lambda: first.predict_top(batch),
+            "separate passes": lambda: [bundle.predict_top(batch) for bundle in bundles.values()],
+            "routed (shared)": lambda: predict_routed(bundles, routed, batch),
+            "all on shared": all_on_shared,
+        }
+        print(f"{'scoring':<18} {'p50 ms':>8}")
+        for name, fn in rows.items():
+            print(f"{name:<18} {timed(fn, args.repeat) * 1000:>8.2f}")
+
+        env = {"INTENT_MODEL_DIR": os.path.join(tmp, "families", families[0]),
+               "INTENT_REGISTRY_DIR": os.path.join(tmp, "registry"), "INTENT_CACHE_MAX_ENTRIES": "0",
+               "INTENT_MODELS": ",".join(f"{name}={os.path.join(tmp, 'families', name)}" for name in families[1:])}
+        print(f"\n{'endpoint':<18} {'p50 ms':>8} {'compared':>9} {'dropped':>8} {'disagree':>9}")
+        for label, extra in (("no shadow", {}), (f"shadow {families[1]}", {"INTENT_SHADOW_MODEL": families[1]})):
+            result = endpoint({**env, **extra}, args.batch_size, args.repeat)
+            stats = result["shadow"] or {}
+            rate = stats.get("disagreement_rate")
+            print(f"{label:<18} {result['p50'] * 1000:>8.2f} {stats.get('compared', '-'):>9} "
+                  f"{stats.get('dropped', '-'):>8} {'-' if rate is None else f'{rate:.2%}':>9}")
+
+
+if __name__ == "__main__":
+    run()
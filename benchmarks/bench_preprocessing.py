@@ -0,0 +1,67 @@
+"""Cost of preprocessing.clean_text per query.
+
+Compares clean_text with the notebook's NLTK implementation (when nltk and
+its punkt/stopwords data are installed) and with one single-text inference,
+over the texts in data/full_dataset.csv.
+
+Run from the repo root:  python benchmarks/bench_preprocessing.py
+"""
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from preprocessing import clean_text  # noqa: E402
+from registry import ModelBundle  # noqa: E402
+
+
+def per_call_us(fn, texts, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def nltk_clean_text():
+    try:
+        from nltk.corpus import stopwords
+        from nltk.tokenize import word_tokenize
+
+        stop_words = set(stopwords.words("english"))
+        word_tokenize("probe")
+    except (ImportError, LookupError):
+        return None
+
+    def clean(text):
+        text = str(text).lower()
+        text = re.sub(r"\n", " ", text)
+        text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
+        return " ".join(t for t in word_tokenize(text) if t not in stop_words)
+
+    return clean
+
+
+def run():
+    texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    raw = ModelBundle.load("models", preprocess=False)
+    lean = ModelBundle.load("models", scoring="linear", featurizer="fast", preprocess=False)
+    rows = [("clean_text", per_call_us(clean_text, texts))]
+    reference = nltk_clean_text()
+    if reference is not None:
+        rows.append(("nltk (notebook)", per_call_us(reference, texts)))
+    rows.append(("inference, sklearn", per_call_us(lambda t: raw.predict([t]), texts, repeat=3)))
+    rows.append(("inference, linear+fast", per_call_us(lambda t: lean.predict([t]), texts, repeat=3)))
+    print(f"{len(texts)} texts")
+    print(f"{'':>24} {'us/text':>9}")
+    for name, us in rows:
+        print(f"{name:>24} {us:>9.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,49 @@
+"""Per-query latency of scikit-learn predict_proba versus the LinearScorer.
+
+Scores each row of data/test_dataset.csv one at a time (the /api/classify
+shape) and reports the median latency of the model step alone and of
+vectorizer + model together.
+
+Run from the repo root:  python benchmarks/bench_scoring.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import artifacts  # noqa: E402
+from scoring import LinearScorer  # noqa: E402
+
+REPEAT = 20
+
+
+def median_us(fn, inputs):
+    timings = []
+    for _ in range(REPEAT):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def run():
+    model, vectorizer, _ = artifacts.load_artifacts("models")
+    scorer = LinearScorer.from_estimator(model)
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    rows = [vectorizer.transform([text]) for text in texts]
+
+    print(f"{'step':>24} {'sklearn us':>11} {'linear us':>10} {'speedup':>8}")
+    sk = median_us(model.predict_proba, rows)
+    lin = median_us(scorer.predict_proba, rows)
+    print(f"{'predict_proba (1 row)':>24} {sk:>11.1f} {lin:>10.1f} {sk / lin:>7.1f}x")
+    sk = median_us(lambda t: model.predict_proba(vectorizer.transform([t])), texts)
+    lin = median_us(lambda t: scorer.predict_proba(vectorizer.transform([t])), texts)
+    print(f"{'transform + score':>24} {sk:>11.1f} {lin:>10.1f} {sk / lin:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,76 @@
+"""Bytes on the wire and end-to-end throughput of the batch response formats.
+
+For each batch size, posts the same batches to /api/classify/batch in-process
+as JSON (one object per text, the default), compact JSON (parallel arrays, no
+echoed text) and, when the msgpack package is installed, MessagePack in both
+shapes. Request encoding and response decoding on the client are part of the
+measured time. The prediction cache is off, so the model is measured too.
+
+Run from the repo root:  python benchmarks/bench_wire_formats.py [--sizes 16 256 2048]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("INTENT_CACHE_MAX_ENTRIES", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def formats():
+    """name -> (encode body, request headers, decode response, compact)"""
+    out = {
+        "json": (json.dumps, {"content-type": "application/json"}, json.loads, False),
+        "json-compact": (json.dumps, {"content-type": "application/json"}, json.loads, True),
+    }
+    if msgpack is not None:
+        headers = {"content-type": "application/msgpack", "accept": "application/msgpack"}
+        out["msgpack"] = (msgpack.packb, headers, msgpack.unpackb, False)
+        out["msgpack-compact"] = (msgpack.packb, headers, msgpack.unpackb, True)
+    return out
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 256, 2048])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    rng = np.random.default_rng(0)
+    client = TestClient(main.app)
+    if msgpack is None:
+        print("msgpack is not installed; measuring the JSON formats only\n")
+    print(f"{'size':>5} {'format':>16} {'req bytes':>10} {'resp bytes':>11} {'p50 ms':>8} {'texts/s':>9}")
+    for size in args.sizes:
+        # Distinct texts so deduplication does not skew the comparison
+        batches = [[f"{text} {i}" for i, text in enumerate(rng.choice(texts, size))] for _ in range(args.requests)]
+        for name, (encode, headers, decode, compact) in formats().items():
+            latencies = []
+            for batch in batches:
+                payload = {"texts": batch, "compact": True} if compact else {"texts": batch}
+                start = time.perf_counter()
+                body = encode(payload)
+                response = client.post("/api/classify/batch", content=body, headers=headers)
+                decode(response.content)
+                latencies.append(time.perf_counter() - start)
+            p50 = statistics.median(latencies)
+            print(f"{size:>5} {name:>16} {len(body):>10,} {len(response.content):>11,} {p50 * 1000:>8.2f} "
+                  f"{size / p50:>9.0f}")
+
+
+if __name__ == "__main__":
+    run()
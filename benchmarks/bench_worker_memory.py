@@ -0,0 +1,107 @@
+"""Per-worker memory with pickled versus memory-mapped artifacts.
+
+Inflates the trained vectorizer/model to a large synthetic vocabulary, writes
+it both as plain pickles and with `artifacts.export_shared`, then starts N
+worker processes per format that load the artifacts and score a few texts.
+RSS counts shared pages in every process; PSS splits them between the
+processes sharing them, so total PSS is the real footprint.
+
+Run from the repo root:  python benchmarks/bench_worker_memory.py [--workers 4] [--vocab 500000]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import artifacts  # noqa: E402
+
+TEXTS = ["Send an email to John about the budget", "Schedule a meeting with the team on Friday"]
+
+
+def memory_kb():
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+
+def worker(directory, mmap, ready, done, results):
+    model, vectorizer, le = artifacts.load_artifacts(directory, mmap=mmap)
+    model.predict_proba(vectorizer.transform(TEXTS))
+    # Touch every coefficient page, as a busy worker eventually would
+    float(np.asarray(model.coef_).sum())
+    ready.wait()
+    results.put(memory_kb())
+    done.wait()
+
+
+def inflate(vocab_size):
+    model, vectorizer, le = artifacts.load_artifacts("models")
+    vocabulary = dict(vectorizer.vocabulary_)
+    rng = np.random.default_rng(0)
+    for i in range(vocab_size - len(vocabulary)):
+        vocabulary[f"synthetic{i:07d}"] = len(vocabulary)
+    vectorizer.vocabulary_ = vocabulary
+    idf = np.ones(len(vocabulary))
+    idf[: len(vectorizer.idf_)] = vectorizer.idf_
+    vectorizer.idf_ = idf
+    vectorizer._tfidf.n_features_in_ = len(vocabulary)
+    coef = rng.normal(scale=1e-3, size=(model.coef_.shape[0], len(vocabulary)))
+    coef[:, : model.coef_.shape[1]] = model.coef_
+    model.coef_ = coef
+    model.n_features_in_ = len(vocabulary)
+    return model, vectorizer, le
+
+
+def measure(directory, mmap, n_workers):
+    ctx = mp.get_context("spawn")
+    ready = ctx.Barrier(n_workers + 1)
+    done = ctx.Event()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(directory, mmap, ready, done, results)) for _ in range(n_workers)]
+    for p in procs:
+        p.start()
+    # A worker that fails to load breaks the barrier instead of hanging here
+    ready.wait(timeout=600)
+    samples = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return samples
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--vocab", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickled, shared = os.path.join(tmp, "pickled"), os.path.join(tmp, "shared")
+        os.makedirs(pickled)
+        model, vectorizer, le = inflate(args.vocab)
+        joblib.dump(model, os.path.join(pickled, artifacts.MODEL_FILE))
+        joblib.dump(vectorizer, os.path.join(pickled, artifacts.VECTORIZER_FILE))
+        joblib.dump(le, os.path.join(pickled, artifacts.LABEL_ENCODER_FILE))
+        artifacts.export_shared(model, vectorizer, le, shared)
+
+        print(f"vocabulary={args.vocab:,} workers={args.workers}")
+        print(f"{'format':>8} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'total PSS MB':>13}")
+        for name, directory, mmap in [("pickle", pickled, False), ("mmap", shared, True)]:
+            samples = measure(directory, mmap, args.workers)
+            rss = np.mean([s["rss"] for s in samples]) / 1024
+            pss = np.mean([s["pss"] for s in samples]) / 1024
+            total = sum(s["pss"] for s in samples) / 1024
+            print(f"{name:>8} {rss:>14.1f} {pss:>14.1f} {total:>13.1f}")
+
+
+if __name__ == "__main__":
+    run()
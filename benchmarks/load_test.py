@@ -0,0 +1,96 @@
+"""Latency versus concurrency for /api/classify under each executor mode.
+
+Starts a local uvicorn server per INTENT_EXECUTOR mode, fires requests from
+data/test_dataset.csv at increasing concurrency and prints throughput,
+p50/p99 latency and the number of 503 (backpressure) responses.
+
+Run from the repo root:  python benchmarks/load_test.py [--requests 2000]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def start_server(port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, **env},
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode} (port {port} in use?)")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+async def drive(url, texts, concurrency, n_requests):
+    latencies = []
+    statuses = []
+    counter = iter(range(n_requests))
+
+    async def worker(client):
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.post(url, json={"text": texts[i % len(texts)]})
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "rps": n_requests / elapsed,
+        "p50": float(np.percentile(lat_ms, 50)),
+        "p99": float(np.percentile(lat_ms, 99)),
+        "rejected": statuses.count(503),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(os.path.join(ROOT, "data/test_dataset.csv"))["text"].astype(str).tolist()
+    print(f"{'mode':>8} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'503s':>6}")
+    for mode in ["thread", "process"]:
+        env = {
+            "INTENT_EXECUTOR": mode,
+            "INTENT_WORKERS": str(args.workers),
+            # Measure the model, not the prediction cache
+            "INTENT_CACHE_MAX_ENTRIES": "0",
+        }
+        proc = start_server(args.port, env)
+        try:
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(f"http://127.0.0.1:{args.port}/api/classify", texts, concurrency, args.requests))
+                print(f"{mode:>8} {concurrency:>5} {result['rps']:>8.0f} {result['p50']:>8.2f} {result['p99']:>8.2f} {result['rejected']:>6}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,263 @@
+"""Reproducible load and latency benchmark suite for the API.
+
+Drives the app either in-process (httpx over the ASGI app, no network) or
+over a real local uvicorn server, for a fixed set of payload scenarios at
+each requested concurrency, and writes throughput, p50/p95/p99 latency and
+peak RSS to a JSON results file. Texts come from data/test_dataset.csv with
+a fixed seed, so two runs send identical requests.
+
+Run from the repo root:
+
+    python benchmarks/suite.py run --out bench_results.json
+    python benchmarks/suite.py run --mode uvicorn --concurrency 1 16 --out new.json --baseline baseline.json
+    python benchmarks/suite.py compare baseline.json new.json --tolerance 0.1
+
+`compare` (and `run --baseline`) exits with status 1 when any scenario's
+throughput drops, or its p95/p99 latency or peak RSS grows, by more than the
+tolerance. The prediction cache is disabled so the model is measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from load_test import ROOT, start_server
+
+# name -> (endpoint, texts per request, text length)
+SCENARIOS = {
+    "single-short": ("single", 1, "short"),
+    "single-long": ("single", 1, "long"),
+    "batch-16-short": ("batch", 16, "short"),
+    "batch-256-short": ("batch", 256, "short"),
+    "batch-64-long": ("batch", 64, "long"),
+}
+ENDPOINTS = {"single": "/api/classify", "batch": "/api/classify/batch"}
+# Sentences joined into one "long" text (a paragraph-sized utterance)
+LONG_TEXT_SENTENCES = 12
+# (metric, direction): +1 means bigger is better
+COMPARED = [("texts_per_s", 1), ("p95_ms", -1), ("p99_ms", -1), ("peak_rss_mb", -1)]
+SERVER_ENV = {"INTENT_CACHE_MAX_ENTRIES": "0"}
+
+
+def load_texts(seed):
+    texts = pd.read_csv(os.path.join(ROOT, "data/test_dataset.csv"))["text"].astype(str).tolist()
+    rng = np.random.default_rng(seed)
+    lengths = np.array([len(t.split()) for t in texts])
+    short = [t for t, n in zip(texts, lengths) if n <= np.median(lengths)]
+    long = [" ".join(rng.choice(texts, LONG_TEXT_SENTENCES)) for _ in range(len(texts))]
+    return {"short": short, "long": long}
+
+
+def build_payloads(scenario, texts, n_requests, seed):
+    endpoint, size, length = SCENARIOS[scenario]
+    pool = texts[length]
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(pool), size=(n_requests, size))
+    if endpoint == "single":
+        return [{"text": pool[row[0]]} for row in picks]
+    return [{"texts": [pool[i] for i in row]} for row in picks]
+
+
+def peak_rss_mb(pid):
+    """Peak resident set size (VmHWM) of a process, in MB"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+async def drive(client, url, payloads, concurrency):
+    """POST every payload with `concurrency` requests in flight; returns (latencies, errors, seconds)"""
+    latencies = []
+    errors = 0
+    counter = iter(payloads)
+
+    async def worker():
+        nonlocal errors
+        for payload in counter:
+            start = time.perf_counter()
+            response = await client.post(url, json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, seconds, texts_per_request):
+    lat_ms = np.array(latencies) * 1000
+    n = len(latencies)
+    return {
+        "requests": n,
+        "errors": errors,
+        "rps": n / seconds,
+        "texts_per_s": n * texts_per_request / seconds,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+
+
+async def run_scenarios(client, base_url, args, texts, pid):
+    results = []
+    for scenario in args.scenarios:
+        endpoint, size, _ = SCENARIOS[scenario]
+        url = base_url + ENDPOINTS[endpoint]
+        warmup = build_payloads(scenario, texts, args.warmup, args.seed + 1)
+        await drive(client, url, warmup, 1)
+        for concurrency in args.concurrency:
+            payloads = build_payloads(scenario, texts, args.requests, args.seed)
+            latencies, errors, seconds = await drive(client, url, payloads, concurrency)
+            result = {"mode": args.mode, "scenario": scenario, "concurrency": concurrency,
+                      **summarize(latencies, errors, seconds, size), "peak_rss_mb": peak_rss_mb(pid)}
+            results.append(result)
+            print(format_row(result), flush=True)
+    return results
+
+
+def run_inprocess(args, texts):
+    for key, value in SERVER_ENV.items():
+        os.environ.setdefault(key, value)
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import main
+
+    async def go():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_scenarios(client, "http://bench", args, texts, os.getpid())
+
+    return asyncio.run(go())
+
+
+def run_uvicorn(args, texts):
+    proc = start_server(args.port, SERVER_ENV)
+    try:
+        async def go():
+            limits = httpx.Limits(max_connections=max(args.concurrency))
+            async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+                return await run_scenarios(client, f"http://127.0.0.1:{args.port}", args, texts, proc.pid)
+
+        return asyncio.run(go())
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(r):
+    rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+    return (f"{r['mode']:>9} {r['scenario']:>16} {r['concurrency']:>5} {r['rps']:>9.0f} {r['texts_per_s']:>10.0f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {rss:>8} {r['errors']:>5}")
+
+
+def compare(baseline, current, tolerance):
+    """Regressions of current against baseline, as human-readable strings"""
+    key = lambda r: (r["mode"], r["scenario"], r["concurrency"])  # noqa: E731
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        for metric, direction in COMPARED:
+            if old.get(metric) is None or r.get(metric) is None or not old[metric]:
+                continue
+            change = (r[metric] - old[metric]) / old[metric]
+            if change * direction < -tolerance:
+                regressions.append(f"{'/'.join(map(str, key(r)))}: {metric} {old[metric]:.2f} -> {r[metric]:.2f} "
+                                   f"({change:+.1%})")
+    return regressions
+
+
+def report(baseline_path, current, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%} vs {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {tolerance:.0%} vs {baseline_path}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run the suite and write a results file")
+    run.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    run.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    run.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency")
+    run.add_argument("--warmup", type=int, default=50)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--port", type=int, default=8766)
+    run.add_argument("--out", default="bench_results.json")
+    run.add_argument("--baseline", help="results file to compare against")
+    run.add_argument("--tolerance", type=float, default=0.10)
+    cmp = sub.add_parser("compare", help="compare two results files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.current) as f:
+            return report(args.baseline, json.load(f), args.tolerance)
+
+    # The in-process run changes directory to the repo root to load the model
+    args.out = os.path.abspath(args.out)
+    args.baseline = args.baseline and os.path.abspath(args.baseline)
+    texts = load_texts(args.seed)
+    print(f"{'mode':>9} {'scenario':>16} {'conc':>5} {'req/s':>9} {'texts/s':>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8} {'errs':>5}")
+    results = (run_inprocess if args.mode == "inprocess" else run_uvicorn)(args, texts)
+    current = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("command", "out", "baseline")},
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Wrote {args.out}")
+    if args.baseline:
+        return report(args.baseline, current, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
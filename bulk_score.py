@@ -0,0 +1,138 @@
+"""Offline bulk scoring of CSV or Parquet files.
+
+Uses the same artifacts as the API (a model directory, or a version from the
+model registry), reads the input in chunks, scores the chunks on a process
+pool and appends predictions to the output file in input order, so memory
+stays bounded by a few chunks however large the file is.
+
+    python bulk_score.py data/full_dataset.csv predictions.csv --jobs 8
+    python bulk_score.py logs.parquet predictions.parquet --registry models/registry --version v2
+
+The output holds every input column plus predicted_intent and confidence.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from registry import ModelBundle, ModelRegistry
+
+_bundle = None
+
+
+def _init_worker(model_dir, registry_dir, version, scoring, featurizer):
+    global _bundle
+    if registry_dir:
+        _bundle = ModelRegistry(registry_dir).load(version, scoring=scoring, featurizer=featurizer)
+    else:
+        _bundle = ModelBundle.load(model_dir, scoring=scoring, featurizer=featurizer)
+
+
+def _score(texts):
+    return _bundle.predict(texts)
+
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(path, chunk_size, text_column):
+    """Yield DataFrame chunks of the input file"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={text_column: str}, keep_default_na=False)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(input_path, output_path, model_dir="models", registry_dir=None, version=None,
+               scoring="sklearn", featurizer="sklearn", chunk_size=10000, jobs=None,
+               text_column="text", progress=False):
+    """Score input_path into output_path; returns (rows, seconds)"""
+    jobs = jobs or os.cpu_count() or 1
+    initargs = (model_dir, registry_dir, version, scoring, featurizer)
+    writer = ChunkWriter(output_path)
+    pending = deque()
+    rows = 0
+    start = time.perf_counter()
+
+    def drain_one():
+        nonlocal rows
+        df, future = pending.popleft()
+        intents, confs = future.result()
+        df = df.assign(predicted_intent=intents, confidence=confs)
+        writer.write(df)
+        rows += len(df)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\r{rows:,} rows  {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as pool:
+            for df in read_chunks(input_path, chunk_size, text_column):
+                texts = df[text_column].astype(str).tolist()
+                pending.append((df, pool.submit(_score, texts)))
+                # Keep every worker busy but only a bounded number of chunks in memory
+                if len(pending) >= 2 * jobs:
+                    drain_one()
+            while pending:
+                drain_one()
+    finally:
+        writer.close()
+        if progress:
+            print(file=sys.stderr)
+    return rows, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file with the intent model")
+    parser.add_argument("input", help="input .csv or .parquet file")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--model-dir", default="models", help="artifact directory (ignored with --registry)")
+    parser.add_argument("--registry", help="model registry directory")
+    parser.add_argument("--version", help="registry version (default: newest)")
+    parser.add_argument("--scoring", default="sklearn", choices=["sklearn", "linear"])
+    parser.add_argument("--featurizer", default="sklearn", choices=["sklearn", "fast", "hashed"])
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--text-column", default="text")
+    args = parser.parse_args()
+
+    rows, seconds = score_file(
+        args.input, args.output, args.model_dir, args.registry, args.version, args.scoring,
+        args.featurizer, args.chunk_size, args.jobs, args.text_column, progress=True,
+    )
+    print(f"Scored {rows:,} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/s) -> {args.output}")
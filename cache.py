@@ -0,0 +1,108 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+# Longer keys are replaced by their digest, so huge texts never sit in the cache
+KEY_MAX_CHARS = 1000
+
+
+def normalize_text(text, max_chars=None):
+    """Cache key for a query: lowercased with whitespace collapsed.
+
+    The TF-IDF vectorizer lowercases and splits on word boundaries, so texts
+    with the same key produce the same features. That does not hold for
+    texts over max_chars, which limits.TextLimits truncates or windows at
+    raw character positions: they are keyed on their exact content instead.
+    """
+    if max_chars is not None and len(text) > max_chars:
+        return "exact:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+    key = " ".join(text.lower().split())
+    if len(key) > KEY_MAX_CHARS:
+        return "sha256:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return key
+
+
+def dedupe(texts, max_chars=None):
+    """Collapse texts that normalize to the same key (see normalize_text for max_chars).
+
+    Returns (keys, unique_texts, inverse): the distinct keys and the first
+    text seen for each, in order of first appearance, and for every input
+    text the index of its key, so results computed for unique_texts are
+    scattered back with [results[j] for j in inverse].
+    """
+    index = {}
+    keys = []
+    unique_texts = []
+    inverse = []
+    for text in texts:
+        key = normalize_text(text, max_chars)
+        j = index.get(key)
+        if j is None:
+            j = index[key] = len(keys)
+            keys.append(key)
+            unique_texts.append(text)
+        inverse.append(j)
+    return keys, unique_texts, inverse
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of (intent, confidence) with a per-entry TTL"""
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
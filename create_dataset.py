@@ -1,7 +1,14 @@
 
 import pandas as pd
+import numpy as np
+import argparse
+import os
 import random
 import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 
 intent_templates = {
@@ -157,8 +164,6 @@ class NoiseGenerator:
     
     def add_extra_words(self, text):
         """Add unnecessary filler words"""
-        filler_words = ['like', 'um', 'uh', 'you know', 'actually', 'basically', 'so', 'well', 'right']
-        
         if random.random() < 0.30:
             words = text.split()
             if len(words) > 3:
@@ -188,12 +193,6 @@ class NoiseGenerator:
     
     def add_noise(self, text, noise_level='medium'):
         """Apply all noise types with specified intensity"""
-        noise_intensity = {
-            'low': 0.3,
-            'medium': 0.6,
-            'high': 0.9
-        }
-        
         intensity = noise_intensity[noise_level]
         
         if random.random() < intensity:
@@ -209,6 +208,38 @@ class NoiseGenerator:
         
         return text
 
+# Phrasings wrapped around a filled template
+variations = [
+    lambda x: x + ".",
+    lambda x: x + "?",
+    lambda x: x + "!",
+    lambda x: "Can you " + x.lower() + "?",
+    lambda x: "I need to " + x.lower() + ".",
+    lambda x: "Please " + x.lower() + ".",
+    lambda x: "Could you " + x.lower() + "?",
+    lambda x: "I want to " + x.lower() + ".",
+    lambda x: "Would you mind " + x.lower().replace('?', 'ing') + "?",
+    lambda x: "Hey, " + x.lower(),
+    lambda x: "Hello, " + x.lower(),
+]
+
+# Noise level per intent
+noise_levels = {
+    'email_send': 'low',
+    'calendar_schedule': 'medium',
+    'web_search': 'high',
+    'knowledge_query': 'low',
+    'general_chat': 'high'
+}
+
+noise_intensity = {
+    'low': 0.3,
+    'medium': 0.6,
+    'high': 0.9
+}
+
+filler_words = ['like', 'um', 'uh', 'you know', 'actually', 'basically', 'so', 'well', 'right']
+
 def generate_example(template, noise_generator, intent):
     """Generate one example by filling in the template with random words"""
     example = template
@@ -219,21 +250,6 @@ def generate_example(template, noise_generator, intent):
             example = example.replace(f"{{{placeholder}}}", random.choice(word_list))
     
     
-    variations = [
-        lambda x: x + ".",
-        lambda x: x + "?",
-        lambda x: x + "!",
-        lambda x: "Can you " + x.lower() + "?",
-        lambda x: "I need to " + x.lower() + ".",
-        lambda x: "Please " + x.lower() + ".",
-        lambda x: "Could you " + x.lower() + "?",
-        lambda x: "I want to " + x.lower() + ".",
-        lambda x: "Would you mind " + x.lower().replace('?', 'ing') + "?",
-        lambda x: "Hey, " + x.lower(),
-        lambda x: "Hello, " + x.lower(),
-    ]
-    
-    
     variation_func = random.choice(variations)
     example = variation_func(example)
     
@@ -260,16 +276,7 @@ def create_dataset():
             template = random.choice(templates)
             text = generate_example(template, noise_generator, intent)
             
-            # Apply noise based on intent 
-            noise_levels = {
-                'email_send': 'low',       
-                'calendar_schedule': 'medium',
-                'web_search': 'high',       
-                'knowledge_query': 'low',     
-                'general_chat': 'high'      
-            }
-            
-            # Add noise 
+            # Add noise based on intent
             text = noise_generator.add_noise(text, noise_levels[intent])
             
             data.append({
@@ -432,8 +439,189 @@ def verify_requirements():
     except Exception as e:
         print(f"Error verifying requirements: {e}")
 
+
+# =========================================
+# Scalable generation (millions of rows)
+# =========================================
+# Same templates, phrasings and noise model as generate_example + add_noise,
+# but templates are compiled once, every random number is read from batched
+# draws of a seeded NumPy generator, and rows are produced in fixed-size
+# shards on a process pool and streamed to CSV/Parquet in order.
+# Shard i always uses the seed (seed, i), so the output only depends on
+# --seed and --chunk-size, not on the number of processes.
+
+_placeholder_re = re.compile(r'\{(\w+)\}')
+_punctuation_re = re.compile(r'[.,!?;]')
+
+
+def _uniform_stream(rng, block=1 << 16):
+    """Endless U[0, 1) floats, drawn from rng a block at a time"""
+    while True:
+        yield from rng.random(block).tolist()
+
+
+class FastExampleGenerator:
+    """Noisy examples for a range of row numbers, from one seeded NumPy generator"""
+
+    def __init__(self, seed):
+        self.rng = np.random.default_rng(seed)
+        # Per-word decisions (typos, casing, ...) read from a stream of batched draws
+        self.u = _uniform_stream(self.rng).__next__
+        self.intents = list(intent_templates)
+        # Per intent: [(template, [(placeholder, words)])]
+        self.templates = [
+            [(t, [(p, word_variations[p]) for p in _placeholder_re.findall(t)]) for t in intent_templates[intent]]
+            for intent in self.intents
+        ]
+        self.n_templates = np.array([len(t) for t in self.templates])
+        self.max_slots = max(len(slots) for templates in self.templates for _, slots in templates)
+        self.intensity = np.array([noise_intensity[noise_levels[intent]] for intent in self.intents])
+        noise = NoiseGenerator()
+        self.typos = noise.typos
+        self.slang = list(noise.slang_words.items())
+
+    def generate(self, start, n):
+        """(texts, intents) for rows start .. start + n - 1; row i gets intent i % 5, so classes stay balanced"""
+        rng = self.rng
+        intent_ids = np.arange(start, start + n) % len(self.intents)
+        # Every per-row decision for the whole chunk in a few vectorized draws
+        template_ids = (rng.random(n) * self.n_templates[intent_ids]).astype(np.int64).tolist()
+        word_draws = rng.random((n, self.max_slots)).tolist()
+        variation_ids = (rng.random(n) * len(variations)).astype(np.int64).tolist()
+        # Which of the five add_noise steps apply to each row
+        apply_noise = (rng.random((n, 5)) < self.intensity[intent_ids, None]).tolist()
+
+        texts = []
+        for intent_id, template_id, draws, variation_id, (typos, slang, punctuation, extra, case) in zip(
+            intent_ids.tolist(), template_ids, word_draws, variation_ids, apply_noise
+        ):
+            template, slots = self.templates[intent_id][template_id]
+            text = template.format(**{p: words[int(d * len(words))] for (p, words), d in zip(slots, draws)})
+            text = variations[variation_id](text)
+            if typos:
+                text = self.add_typos(text)
+            if slang:
+                text = self.add_slang(text)
+            if punctuation:
+                text = self.add_punctuation_errors(text)
+            if extra:
+                text = self.add_extra_words(text)
+            if case:
+                text = self.add_case_inconsistency(text)
+            texts.append(text)
+        return texts, [self.intents[i] for i in intent_ids.tolist()]
+
+    def add_typos(self, text):
+        u = self.u
+        words = text.split()
+        for i, word in enumerate(words):
+            if u() < 0.20 and len(word) > 2:
+                pos = 1 + int(u() * (len(word) - 1))
+                options = self.typos.get(word[pos])
+                if options is not None:
+                    words[i] = word[:pos] + options[int(u() * len(options))] + word[pos + 1:]
+        return ' '.join(words)
+
+    def add_slang(self, text):
+        u = self.u
+        lower = text.lower()
+        for proper, options in self.slang:
+            if proper in lower and u() < 0.15:
+                text = lower = lower.replace(proper, options[int(u() * len(options))])
+        return text
+
+    def add_punctuation_errors(self, text):
+        u = self.u
+        if u() < 0.25:
+            text = _punctuation_re.sub('', text)
+        if u() < 0.20:
+            text += ('..', '...', '!!', '??')[int(u() * 4)]
+        if u() < 0.15:
+            text = text.replace('.', ',').replace('?', '!')
+        return text
+
+    def add_extra_words(self, text):
+        u = self.u
+        if u() < 0.30:
+            words = text.split()
+            if len(words) > 3:
+                pos = 1 + int(u() * (len(words) - 1))
+                words.insert(pos, filler_words[int(u() * len(filler_words))])
+                text = ' '.join(words)
+        return text
+
+    def add_case_inconsistency(self, text):
+        u = self.u
+        if u() < 0.35:
+            words = text.split()
+            if len(words) > 2:
+                for i, word in enumerate(words):
+                    if u() < 0.4:
+                        words[i] = word.upper() if word.islower() else word.lower()
+                text = ' '.join(words)
+        return text
+
+
+def generate_shard(seed, shard, start, n):
+    """DataFrame of rows start .. start + n - 1, seeded by (seed, shard)"""
+    texts, intents = FastExampleGenerator([seed, shard]).generate(start, n)
+    return pd.DataFrame({'text': texts, 'intent': intents})
+
+
+def generate_to_file(path, rows, seed=0, jobs=None, chunk_size=100_000, progress=False):
+    """Write `rows` generated examples to a .csv or .parquet file; returns (rows, seconds)"""
+    from bulk_score import ChunkWriter
+
+    jobs = jobs or os.cpu_count() or 1
+    shards = [(seed, i, start, min(chunk_size, rows - start)) for i, start in enumerate(range(0, rows, chunk_size))]
+    writer = ChunkWriter(path)
+    written = 0
+    start_time = time.perf_counter()
+
+    def write(df):
+        nonlocal written
+        writer.write(df)
+        written += len(df)
+        if progress:
+            elapsed = time.perf_counter() - start_time
+            print(f"\r{written:,} rows  {written / elapsed:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        if jobs == 1:
+            for shard in shards:
+                write(generate_shard(*shard))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                # At most 2 * jobs shards in memory; written in shard order
+                pending = deque()
+                for shard in shards:
+                    pending.append(pool.submit(generate_shard, *shard))
+                    if len(pending) >= 2 * jobs:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        writer.close()
+        if progress:
+            print(file=sys.stderr)
+    return written, time.perf_counter() - start_time
+
+
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the intent classification dataset")
+    parser.add_argument("--rows", type=int, help="generate this many noisy examples into --out instead of the 1,000-row split")
+    parser.add_argument("--out", default="data/augmented.parquet", help=".csv or .parquet output for --rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows per shard / write")
+    args = parser.parse_args()
+
+    if args.rows:
+        rows, seconds = generate_to_file(args.out, args.rows, args.seed, args.jobs, args.chunk_size, progress=True)
+        print(f"Generated {rows:,} rows in {seconds:.2f}s ({rows / seconds:,.0f} rows/s) -> {args.out}")
+        sys.exit(0)
+
     print("=== INTENT CLASSIFICATION DATASET CREATOR ===\n")
     print("Creating dataset that follows exact requirements:")
     print("- 200 examples per intent class (5 intents = 1000 total)")
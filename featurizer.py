@@ -0,0 +1,266 @@
+"""Serving-side TF-IDF featurizer equivalent to a fitted TfidfVectorizer.
+
+FastTfidfFeaturizer copies the fitted vectorizer's analyzer settings,
+vocabulary and idf weights, then builds the CSR arrays for a batch directly
+with NumPy instead of going through scikit-learn's per-document dict
+counting and sparse-matrix validation. The output matches
+vectorizer.transform() for the word analyzer with any lowercase /
+strip_accents / token_pattern / stop_words / ngram_range / binary /
+sublinear_tf / norm settings; custom preprocessor, tokenizer or analyzer
+callables are not supported.
+
+With hashed=True the vocabulary is stored as a sorted array of 64-bit term
+hashes plus a column array (16 bytes per term) instead of a Python dict,
+for very large vocabularies. A memory-mapped vocabulary
+(artifacts.MappedVocabulary) is searched in its own arrays, so they stay
+shared between processes.
+"""
+import hashlib
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+
+def _strip_accents_unicode(s):
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(s):
+    return unicodedata.normalize("NFKD", s).encode("ASCII", errors="ignore").decode("ASCII")
+
+
+def term_hash(term):
+    """Stable 64-bit hash of a term (independent of PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mapped_arrays(vocabulary):
+    """(sorted terms, columns) arrays of an artifacts.MappedVocabulary, None for a plain dict"""
+    terms = getattr(vocabulary, "terms", None)
+    if isinstance(terms, np.ndarray):
+        return terms, vocabulary.indices
+    return None
+
+
+class HashedVocabulary:
+    """term -> column lookup over a sorted uint64 hash array"""
+
+    def __init__(self, vocabulary):
+        mapped = _mapped_arrays(vocabulary)
+        if mapped is not None:
+            # Straight from the arrays: a mapped vocabulary does a binary search per values() item
+            terms, columns = mapped
+            columns = np.asarray(columns, dtype=np.int64)
+        else:
+            terms = vocabulary
+            columns = np.fromiter(vocabulary.values(), dtype=np.int64, count=len(vocabulary))
+        hashes = np.fromiter((term_hash(str(term)) for term in terms), dtype=np.uint64, count=len(vocabulary))
+        order = np.argsort(hashes)
+        self.hashes = hashes[order]
+        self.columns = columns[order]
+        if len(self.hashes) > 1 and (self.hashes[1:] == self.hashes[:-1]).any():
+            raise ValueError("64-bit hash collision inside the vocabulary; use the dict vocabulary")
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, terms):
+        """Column for each term, -1 where the term is not in the vocabulary"""
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        hashes = np.fromiter((term_hash(t) for t in terms), dtype=np.uint64, count=len(terms))
+        pos = np.searchsorted(self.hashes, hashes)
+        pos[pos == len(self.hashes)] = 0
+        found = self.hashes[pos] == hashes
+        return np.where(found, self.columns[pos], -1)
+
+
+class SortedVocabulary:
+    """term -> column lookup by binary search over a sorted term array, which is used in place.
+
+    Serves an artifacts.MappedVocabulary: memory-mapped arrays stay shared
+    between processes instead of being copied into a dict per process.
+    """
+
+    def __init__(self, terms, columns):
+        self.terms = terms
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.terms)
+
+    def lookup(self, terms):
+        """Column for each term, -1 where the term is not in the vocabulary"""
+        if not terms or not len(self.terms):
+            return np.full(len(terms), -1, dtype=np.int64)
+        # As wide as the longest query term, so no term is truncated into a false match
+        queries = np.array(terms, dtype=str)
+        pos = np.searchsorted(self.terms, queries)
+        pos[pos == len(self.terms)] = 0
+        found = self.terms[pos] == queries
+        return np.where(found, self.columns[pos], -1)
+
+
+def vectorizer_settings(vectorizer):
+    """Analyzer/weighting keyword arguments of FastTfidfFeaturizer for a fitted TfidfVectorizer"""
+    if vectorizer.analyzer != "word" or vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError("Only the built-in word analyzer is supported")
+    if vectorizer.input != "content":
+        raise ValueError("Only input='content' is supported")
+    stop_words = vectorizer.get_stop_words()
+    return {
+        "lowercase": vectorizer.lowercase,
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": tuple(vectorizer.ngram_range),
+        "stop_words": sorted(stop_words) if stop_words else None,
+        "strip_accents": vectorizer.strip_accents,
+        "binary": vectorizer.binary,
+        "sublinear_tf": vectorizer.sublinear_tf,
+        "norm": vectorizer.norm,
+        "dtype": vectorizer.dtype,
+    }
+
+
+def feature_digest(settings, terms, idf=None):
+    """SHA-256 of everything that determines the features: analyzer settings, terms in column order and idf.
+
+    Models with equal digests produce identical feature matrices, so one
+    featurize pass can serve all of them.
+    """
+    settings = {**settings, "dtype": np.dtype(settings["dtype"]).name}
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode())
+    digest.update("\n".join(terms).encode())
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class FastTfidfFeaturizer:
+    def __init__(self, vocabulary, idf=None, lowercase=True, token_pattern=r"(?u)\b\w\w+\b",
+                 ngram_range=(1, 1), stop_words=None, strip_accents=None, binary=False,
+                 sublinear_tf=False, norm="l2", hashed=False, dtype=np.float64):
+        if norm not in ("l1", "l2", None):
+            raise ValueError(f"Unsupported norm: {norm!r}")
+        self.n_features = len(vocabulary)
+        self.hashed = hashed
+        mapped = _mapped_arrays(vocabulary)
+        if hashed:
+            self._vocabulary = HashedVocabulary(vocabulary)
+        elif mapped is not None:
+            self._vocabulary = SortedVocabulary(*mapped)
+        else:
+            self._vocabulary = dict(vocabulary.items())
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float64)
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+        if self._token_re.groups > 1:
+            raise ValueError("token_pattern may contain at most one capturing group")
+        self.min_n, self.max_n = ngram_range
+        self.stop_words = frozenset(stop_words) if stop_words else None
+        if strip_accents is None:
+            self._strip_accents = None
+        elif strip_accents == "unicode":
+            self._strip_accents = _strip_accents_unicode
+        elif strip_accents == "ascii":
+            self._strip_accents = _strip_accents_ascii
+        else:
+            raise ValueError(f"Unsupported strip_accents: {strip_accents!r}")
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.dtype = dtype
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, hashed=False):
+        """Copy the settings and fitted state of a TfidfVectorizer"""
+        return cls(
+            vectorizer.vocabulary_,
+            idf=vectorizer.idf_ if vectorizer.use_idf else None,
+            hashed=hashed,
+            **vectorizer_settings(vectorizer),
+        )
+
+    def analyze(self, text):
+        """Same terms, in the same order, as the vectorizer's build_analyzer()"""
+        if self.lowercase:
+            text = text.lower()
+        if self._strip_accents is not None:
+            text = self._strip_accents(text)
+        tokens = self._token_re.findall(text)
+        if self.stop_words is not None:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        terms = list(tokens) if self.min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(self.min_n, 2), min(self.max_n, n_tokens) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(n_tokens - n + 1))
+        return terms
+
+    def _columns(self, texts):
+        """Column ids of known terms for every text, plus the row of each id"""
+        if not isinstance(self._vocabulary, dict):
+            # Hashed or sorted-array vocabulary: one vectorized lookup for the whole batch
+            terms, counts = [], []
+            for text in texts:
+                analyzed = self.analyze(text)
+                terms.extend(analyzed)
+                counts.append(len(analyzed))
+            cols = self._vocabulary.lookup(terms)
+            rows = np.repeat(np.arange(len(texts)), counts)
+            known = cols >= 0
+            return rows[known], cols[known]
+        get = self._vocabulary.get
+        cols, counts = [], []
+        for text in texts:
+            found = [c for c in map(get, self.analyze(text)) if c is not None]
+            cols.extend(found)
+            counts.append(len(found))
+        rows = np.repeat(np.arange(len(texts)), counts)
+        return rows, np.array(cols, dtype=np.int64)
+
+    def transform_arrays(self, texts):
+        """(data, indices, indptr) of the TF-IDF CSR matrix for texts"""
+        n_rows = len(texts)
+        rows, cols = self._columns(texts)
+        # One sort over (row, column) keys counts term frequencies and leaves
+        # the column indices sorted within each row, as scikit-learn does
+        keys, counts = np.unique(rows * self.n_features + cols, return_counts=True)
+        rows = keys // self.n_features
+        indices = (keys % self.n_features).astype(np.int32)
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+
+        data = counts.astype(np.float64)
+        if self.binary:
+            data[:] = 1.0
+        elif self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1.0
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm is not None and len(data):
+            starts = indptr[:-1]
+            nonempty = starts < indptr[1:]
+            values = data * data if self.norm == "l2" else np.abs(data)
+            norms = np.ones(n_rows)
+            norms[nonempty] = np.add.reduceat(values, starts[nonempty])
+            if self.norm == "l2":
+                np.sqrt(norms, out=norms)
+            norms[norms == 0.0] = 1.0
+            data /= np.repeat(norms, np.diff(indptr))
+        return data.astype(self.dtype, copy=False), indices, indptr
+
+    def transform(self, texts):
+        """scipy CSR matrix, like vectorizer.transform(texts)"""
+        from scipy.sparse import csr_matrix
+
+        data, indices, indptr = self.transform_arrays(texts)
+        return csr_matrix((data, indices, indptr), shape=(len(texts), self.n_features))
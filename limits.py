@@ -0,0 +1,81 @@
+"""Bounding what one long text costs to classify.
+
+Featurizing is linear in the text length, so without a cap a single huge
+string pins a worker and builds an equally huge term list. TextLimits
+decides what happens to texts longer than max_chars:
+
+  - "reject":   the request is refused (the caller checks too_long()),
+  - "truncate": only the first max_chars characters are classified,
+  - "window":   at most max_windows windows of window_chars characters
+                are classified and the text's probabilities are the mean
+                over its windows. Windows overlap by half while max_windows
+                of them can cover the text; past that they are spread
+                evenly from its start to its end and the text between them
+                is never scored.
+
+split() turns a batch into the pieces to score plus, when any text was
+windowed, the owning text of every piece; merge_windows() folds the piece
+probabilities back into one row per text with a single reduceat. Either
+way a text costs at most max_windows * window_chars characters of work.
+"""
+import numpy as np
+
+MODES = ("reject", "truncate", "window")
+
+
+class TextLimits:
+    def __init__(self, max_chars=5000, mode="window", window_chars=1000, max_windows=16):
+        if mode not in MODES:
+            raise ValueError(f"Unknown long-text mode {mode!r} (expected one of {MODES})")
+        if max_chars < 1 or window_chars < 1 or max_windows < 1:
+            raise ValueError("Text limits must be positive")
+        self.max_chars = max_chars
+        self.mode = mode
+        self.window_chars = min(window_chars, max_chars)
+        self.max_windows = max_windows
+
+    def too_long(self, text):
+        """True for texts the "reject" mode refuses"""
+        return self.mode == "reject" and len(text) > self.max_chars
+
+    def windows(self, text):
+        size = self.window_chars
+        stride = max(1, size // 2)
+        # Enough windows to cover the text at half overlap, capped; the last one ends at the end of the text.
+        # While uncapped, every word lies whole inside some window despite cut edges. Once capped, the
+        # windows are spaced further apart and the text in the gaps between them is dropped.
+        count = min(self.max_windows, -(-(len(text) - size) // stride) + 1)
+        starts = np.linspace(0, len(text) - size, count).astype(np.int64) if count > 1 else [0]
+        return [text[start:start + size] for start in starts]
+
+    def split(self, texts):
+        """(pieces, owners): texts with the long ones cut down; owners is None when no text was windowed"""
+        long_rows = [i for i, text in enumerate(texts) if len(text) > self.max_chars]
+        if not long_rows:
+            return texts, None
+        if self.mode != "window":
+            # "reject" is enforced before scoring; truncating here keeps the cost bounded regardless
+            texts = list(texts)
+            for i in long_rows:
+                texts[i] = texts[i][:self.max_chars]
+            return texts, None
+        pieces = []
+        owners = []
+        for i, text in enumerate(texts):
+            windows = self.windows(text) if len(text) > self.max_chars else [text]
+            pieces.extend(windows)
+            owners.extend([i] * len(windows))
+        return pieces, np.asarray(owners, dtype=np.int64)
+
+    def info(self):
+        return {"max_chars": self.max_chars, "mode": self.mode, "window_chars": self.window_chars,
+                "max_windows": self.max_windows}
+
+
+def merge_windows(probs, owners):
+    """(unique owners, mean probability row per owner) for piece rows whose owners are non-decreasing"""
+    owners = np.asarray(owners)
+    unique, starts, counts = np.unique(owners, return_index=True, return_counts=True)
+    if len(unique) == len(owners):
+        return unique, probs
+    return unique, np.add.reduceat(probs, starts, axis=0) / counts[:, None]
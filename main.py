@@ -1,14 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, status
-from pydantic import BaseModel
-from typing import List
-import joblib
-import numpy as np
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Union
+import os
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from batching import MicroBatcher
+from cache import PredictionCache, dedupe, normalize_text
+from workers import InferencePool, PoolSaturated
+from registry import ModelBundle, ModelRegistry, validate_bundle, SMOKE_TEXTS
+from streaming import DuplexStreamingResponse, iter_lines, parse_ndjson_text
+from online import FeedbackBufferFull, OnlineLearner, ONLINE_VERSION, is_online_model, next_online_version
+from routing import ShadowEvaluator, TrafficSplit, parse_mapping, predict_routed
+from limits import TextLimits
+from metrics import MetricsMiddleware, MetricsRegistry, LATENCY_BUCKETS, SIZE_BUCKETS, CONFIDENCE_BUCKETS, request_started
+from collections import Counter
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import tempfile
+import threading
+import time
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for MessagePack request and response bodies
+    msgpack = None
 
 
 #  FastAPI App
 
-app = FastAPI(title="Intent Classification API", version="1.0")
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up off the event loop so /api/health answers while the first inference runs
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Intent Classification API", version="1.0", lifespan=lifespan)
 
 security = HTTPBasic()
 USERNAME = "admin"
@@ -20,69 +49,940 @@ def get_current_user(credentials: HTTPBasicCredentials = Depends(security)):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
 
+#  Metrics
+#  Request counts/latency per route, per-stage timings inside classification
+#  (parse, featurize, score, decode, serialize), batch sizes and the
+#  predicted-intent / confidence distributions, served at /metrics.
+
+METRICS_ENABLED = os.getenv("INTENT_METRICS", "1") == "1"
+
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.counter("intent_http_requests_total", "HTTP requests", ("method", "path", "status"))
+HTTP_LATENCY = metrics.histogram("intent_http_request_duration_seconds", "HTTP request latency", ("method", "path"))
+STAGE_LATENCY = metrics.histogram("intent_stage_duration_seconds", "Time per classification stage", ("stage",), LATENCY_BUCKETS)
+BATCH_SIZE = metrics.histogram("intent_inference_batch_size", "Texts per model call", (), SIZE_BUCKETS)
+PREDICTIONS = metrics.counter("intent_predictions_total", "Predictions by intent", ("intent",))
+CONFIDENCE = metrics.histogram("intent_prediction_confidence", "Confidence of predictions", (), CONFIDENCE_BUCKETS)
+DEDUP_TEXTS = metrics.counter("intent_dedup_texts_total", "Batch and stream texts, unique or repeating one earlier in the same request", ("outcome",))
+COALESCED = metrics.counter("intent_coalesced_requests_total", "Single queries that joined an identical in-flight query")
+ROUTED = metrics.counter("intent_routed_texts_total", "Texts scored per served model", ("model",))
+SHADOW = metrics.counter("intent_shadow_comparisons_total", "Shadow model top intents that agreed or disagreed with the served one", ("outcome",))
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, requests=HTTP_REQUESTS, latency=HTTP_LATENCY)
+
+
+def observe_parse():
+    """Time from the request entering the app to the handler starting (routing, body read, validation)"""
+    started = request_started.get()
+    if METRICS_ENABLED and started is not None:
+        STAGE_LATENCY.observe(time.perf_counter() - started, "parse")
+
+
+def serialize(content, binary=False):
+    """JSON response, or MessagePack when binary=True"""
+    start = time.perf_counter()
+    if binary:
+        response = Response(msgpack.packb(content), media_type=MSGPACK_MEDIA_TYPE)
+    else:
+        response = JSONResponse(content)
+    if METRICS_ENABLED:
+        STAGE_LATENCY.observe(time.perf_counter() - start, "serialize")
+    return response
+
+
+#  Request limits
+#  Bodies over INTENT_MAX_BODY_BYTES are refused with 413 before they are
+#  read in full, and batches over INTENT_MAX_BATCH_SIZE texts with 422.
+#  Texts over INTENT_MAX_TEXT_CHARS are rejected, truncated or classified
+#  over sliding windows (INTENT_LONG_TEXT_MODE, see limits.py), and batches
+#  are scored INTENT_BATCH_CHUNK_SIZE texts per model call, so neither one
+#  huge text nor one huge batch builds an unbounded feature matrix.
+
+MAX_BODY_BYTES = int(os.getenv("INTENT_MAX_BODY_BYTES", str(16 * 2 ** 20)))
+MAX_BATCH_SIZE = int(os.getenv("INTENT_MAX_BATCH_SIZE", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("INTENT_BATCH_CHUNK_SIZE", "1000"))
+TEXT_LIMITS = TextLimits(
+    int(os.getenv("INTENT_MAX_TEXT_CHARS", "5000")),
+    os.getenv("INTENT_LONG_TEXT_MODE", "window"),
+    int(os.getenv("INTENT_WINDOW_CHARS", "1000")),
+    int(os.getenv("INTENT_MAX_WINDOWS", "16")),
+)
+
+
+def body_too_large():
+    return HTTPException(status_code=413, detail=f"Request body is larger than {MAX_BODY_BYTES} bytes")
+
+
+async def read_body(request):
+    """The request body; 413 as soon as it is known to exceed MAX_BODY_BYTES"""
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_BODY_BYTES:
+        raise body_too_large()
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise body_too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def check_text_lengths(texts):
+    """413 for the first text the "reject" long-text mode refuses"""
+    for i, text in enumerate(texts):
+        if TEXT_LIMITS.too_long(text):
+            raise HTTPException(status_code=413, detail=f"Text {i} has {len(text)} characters; "
+                                                        f"the limit is {TEXT_LIMITS.max_chars}")
+
+
+#  Content negotiation
+#  The classify endpoints read JSON or MessagePack bodies (by Content-Type)
+#  and answer in MessagePack when the Accept header asks for it and the
+#  msgpack package is installed, JSON otherwise. Bodies are validated with
+#  the pydantic models directly (model_validate_json for JSON), so both
+#  formats give the same 422 errors.
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def wants_msgpack(request):
+    return msgpack is not None and any(t in request.headers.get("accept", "") for t in MSGPACK_MEDIA_TYPES)
+
+
+async def parse_body(request, model):
+    """Validate a JSON or MessagePack request body against a pydantic model"""
+    body = await read_body(request)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in MSGPACK_MEDIA_TYPES:
+            if msgpack is None:
+                raise HTTPException(status_code=415, detail="MessagePack bodies need the msgpack package on the server")
+            try:
+                data = msgpack.unpackb(body)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid MessagePack body")
+            return model.model_validate(data)
+        return model.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError([{**e, "loc": ("body", *e["loc"])} for e in exc.errors(include_url=False)])
+
+
+def body_schema(model):
+    """openapi_extra documenting a body that is parsed by hand with parse_body"""
+    schema = model.model_json_schema()
+    content = {"application/json": {"schema": schema}, MSGPACK_MEDIA_TYPE: {"schema": schema}}
+    return {"requestBody": {"content": content, "required": True}}
+
+
+#  Prediction cache keyed on normalized text
+
+CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600"))
+
+cache = PredictionCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
 #  Load Pre-trained Model & Artifacts
+#  The live model is one immutable ModelBundle. Reloading builds and validates
+#  a new bundle off to the side, then swaps the module-level reference, so
+#  requests already holding the old bundle finish on it.
+#  With INTENT_MMAP=1 the artifacts should have been written by
+#  `python artifacts.py export`; their arrays are then memory-mapped and
+#  shared between all workers on the host.
+
+MODEL_DIR = os.getenv("INTENT_MODEL_DIR", "models")
+MMAP_ARTIFACTS = os.getenv("INTENT_MMAP", "0") == "1"
+# "sklearn" calls model.predict_proba; "linear" uses the NumPy scorer from scoring.py
+SCORING_MODE = os.getenv("INTENT_SCORING", "sklearn")
+# "sklearn" calls vectorizer.transform; "fast"/"hashed" use featurizer.py
+FEATURIZER_MODE = os.getenv("INTENT_FEATURIZER", "sklearn")
+# Run texts through preprocessing.clean_text, as the training data was
+PREPROCESS = os.getenv("INTENT_PREPROCESS", "1") == "1"
+REGISTRY_DIR = os.getenv("INTENT_REGISTRY_DIR", "models/registry")
+REGISTRY_WATCH_SECONDS = float(os.getenv("INTENT_REGISTRY_WATCH_SECONDS", "0"))
+
+# Keyword arguments for every bundle load (initial, process-pool workers, reloads)
+LOAD_OPTIONS = {"mmap": MMAP_ARTIFACTS, "scoring": SCORING_MODE, "featurizer": FEATURIZER_MODE, "preprocess": PREPROCESS}
+
+registry = ModelRegistry(REGISTRY_DIR)
+reload_lock = threading.Lock()
+
+
+def load_initial_bundle():
+    # Newest registry version if there is one, else the plain artifact directory
+    if registry.latest() is not None:
+        return registry.load(**LOAD_OPTIONS)
+    return ModelBundle.load(MODEL_DIR, version="baseline", **LOAD_OPTIONS)
+
+
+bundle = load_initial_bundle()
+
+
+def init_worker(source, version):
+    """Process-pool initializer: load the live bundle inside the worker and warm it up"""
+    global bundle, shadow
+    bundle = ModelBundle.load(source, version, **LOAD_OPTIONS)
+    # Every worker runs this before taking tasks, so none of them serves its first request cold
+    bundle.predict(SMOKE_TEXTS)
+    # Shadow comparisons are counted in the server process, which featurizes for them itself
+    shadow = None
+
+
+def predict_intents(texts, k=1, names=None):
+    """Score texts on the live bundle, or on the models named per text (runs on the inference pool).
+
+    Returns the top-k (intents, confidences) per text, best first, and the
+    stage timings; the timings travel back so process-pool workers are
+    measured too.
+    """
+    timings = {}
+    if names is None and shadow is None:
+        intents, confs = bundle.predict_top(texts, k, timings, TEXT_LIMITS)
+        return intents, confs, timings
+    names = names or [DEFAULT_MODEL] * len(texts)
+    intents, confs, groups = predict_routed(serving_bundles(), names, texts, k, timings, TEXT_LIMITS)
+    if shadow is not None:
+        shadow.submit(texts, shadow_rows(names, intents), groups)
+    return intents, confs, timings
+
+
+def record_inference(result, texts, names=None):
+    """Record stage timings and prediction distributions; returns ranked (intents, confidences)"""
+    intents, confs, timings = result
+    if METRICS_ENABLED:
+        for stage, seconds in timings.items():
+            STAGE_LATENCY.observe(seconds, stage)
+        BATCH_SIZE.observe(len(intents))
+        for intent, count in Counter(row[0] for row in intents).items():
+            PREDICTIONS.inc(intent, amount=count)
+        CONFIDENCE.observe_many([row[0] for row in confs])
+        for name, count in Counter(names or [DEFAULT_MODEL] * len(texts)).items():
+            ROUTED.inc(name, amount=count)
+    if shadow is not None and EXECUTOR_MODE == "process":
+        shadow.submit(texts, shadow_rows(names or [DEFAULT_MODEL] * len(texts), intents))
+    return intents, confs
+
+
+def reload_model(version=None):
+    """Load a registry version (newest by default), validate it and make it live.
+
+    Blocking; raises KeyError for an unknown version and ValueError when the
+    smoke batch fails, leaving the current bundle in place.
+    """
+    global bundle
+    with reload_lock:
+        new_bundle = registry.load(version, **LOAD_OPTIONS)
+        validate_bundle(new_bundle)
+        if pool is not None and pool.mode == "process":
+            # Workers hold their own copy; start fresh ones on the new version
+            pool.restart(init_worker, (new_bundle.source, new_bundle.version))
+        bundle = new_bundle
+        cache.clear()
+        return new_bundle
+
+
+def watch_registry(interval):
+    """Poll the registry and reload whenever a newer version appears"""
+    while True:
+        time.sleep(interval)
+        latest = registry.latest()
+        if latest is not None and latest != bundle.version:
+            try:
+                reload_model(latest)
+            except Exception as exc:
+                print(f"Model reload to {latest!r} failed: {exc}")
+
+
+if REGISTRY_WATCH_SECONDS > 0:
+    threading.Thread(target=watch_registry, args=(REGISTRY_WATCH_SECONDS,), name="registry-watch", daemon=True).start()
+
+
+#  Multi-model serving and shadow evaluation
+#  INTENT_MODELS hosts more artifact directories next to the live model
+#  ("nb=models/nb,sgd=models/sgd"). A request picks one with "model", and
+#  INTENT_TRAFFIC_SPLIT ("default=90,nb=10") routes the others by weight.
+#  Models built on the same vectorizer share one featurize pass per call
+#  (routing.py). INTENT_SHADOW_MODEL names a hosted model that scores the
+#  same features again on a background thread after the response is
+#  computed, counting how often it would have answered differently.
+#  Hosted models are loaded once at startup; only the default one follows
+#  the registry.
+
+DEFAULT_MODEL = "default"
+HOSTED_MODELS = parse_mapping(os.getenv("INTENT_MODELS", ""))
+TRAFFIC_SPLIT = parse_mapping(os.getenv("INTENT_TRAFFIC_SPLIT", ""))
+SHADOW_MODEL = os.getenv("INTENT_SHADOW_MODEL", "")
+SHADOW_MAX_PENDING = int(os.getenv("INTENT_SHADOW_MAX_PENDING", "64"))
+
+if DEFAULT_MODEL in HOSTED_MODELS:
+    raise ValueError(f"INTENT_MODELS cannot redefine the {DEFAULT_MODEL!r} model")
+if set(TRAFFIC_SPLIT) - set(HOSTED_MODELS) - {DEFAULT_MODEL}:
+    raise ValueError(f"INTENT_TRAFFIC_SPLIT names models missing from INTENT_MODELS: {TRAFFIC_SPLIT}")
+if SHADOW_MODEL and SHADOW_MODEL not in HOSTED_MODELS:
+    raise ValueError(f"INTENT_SHADOW_MODEL {SHADOW_MODEL!r} is not in INTENT_MODELS")
+
+# Hosted bundles take their name as version, which also keys their cache entries
+hosted = {name: ModelBundle.load(path, version=name, **LOAD_OPTIONS) for name, path in HOSTED_MODELS.items()}
+for hosted_bundle in hosted.values():
+    validate_bundle(hosted_bundle)
+split = TrafficSplit(TRAFFIC_SPLIT) if TRAFFIC_SPLIT else None
+
+
+def serving_bundles():
+    return {DEFAULT_MODEL: bundle, **hosted}
+
+
+def model_bundle(name=None):
+    return bundle if name in (None, DEFAULT_MODEL) else hosted[name]
+
+
+def require_model(name):
+    if name not in (None, DEFAULT_MODEL) and name not in hosted:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+
+
+def route(keys, model=None):
+    """Model name per normalized text, or None when all of them go to the live bundle"""
+    if model not in (None, DEFAULT_MODEL):
+        return [model] * len(keys)
+    if model is None and split is not None:
+        return [split.assign(key) for key in keys]
+    return None
+
+
+def shadow_rows(names, intents):
+    """Served top intents to compare; rows the shadow model served itself are skipped"""
+    return [None if name == shadow.name else row[0] for name, row in zip(names, intents)]
+
+
+def record_shadow(agreed, disagreed):
+    if METRICS_ENABLED:
+        SHADOW.inc("agree", amount=agreed)
+        SHADOW.inc("disagree", amount=disagreed)
+
+
+shadow = None
+if SHADOW_MODEL:
+    shadow = ShadowEvaluator(SHADOW_MODEL, hosted[SHADOW_MODEL], SHADOW_MAX_PENDING, on_compare=record_shadow,
+                             limits=TEXT_LIMITS)
+
+
+#  Inference executor
+#  Handlers are async and await scoring on a dedicated, explicitly sized pool
+#  ("thread" or "process"); once INTENT_MAX_PENDING calls are waiting, new
+#  requests get a fast 503 instead of queueing.
+
+EXECUTOR_MODE = os.getenv("INTENT_EXECUTOR", "thread")
+EXECUTOR_WORKERS = int(os.getenv("INTENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTOR_MAX_PENDING = int(os.getenv("INTENT_MAX_PENDING", "256"))
+
+pool = None
+pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Created on first use so process-pool children importing this module don't build pools of their own
+    global pool
+    if pool is None:
+        # The warm-up thread and the first requests can get here together; only one may build the pool
+        with pool_lock:
+            if pool is None:
+                initializer, initargs = (init_worker, (bundle.source, bundle.version)) if EXECUTOR_MODE == "process" else (None, ())
+                pool = InferencePool(EXECUTOR_MODE, EXECUTOR_WORKERS, EXECUTOR_MAX_PENDING, initializer, initargs)
+    return pool
+
+
+#  Readiness: /api/ready turns green once the pool has answered one warm-up
+#  call per worker, so load balancers only route to warm instances. That
+#  alone would not reach every process worker; instead each one scores
+#  SMOKE_TEXTS in init_worker before taking any task (also after a restart),
+#  and thread workers share the server's bundle that the warm-up scored.
+
+ready = threading.Event()
+
+
+def warm_up():
+    try:
+        pool = get_pool()
+        futures = [pool.executor.submit(predict_intents, SMOKE_TEXTS) for _ in range(pool.max_workers)]
+        for future in futures:
+            future.result()
+    except Exception as exc:
+        print(f"Warm-up inference failed: {exc}")
+        return
+    ready.set()
 
-model = joblib.load("models/intent_model.pkl")
-vectorizer = joblib.load("models/tfidf_vectorizer.pkl")
-le = joblib.load("models/label_encoder.pkl")
+
+async def run_inference(texts, k=1, names=None):
+    """predict_intents on the inference pool; returns ranked (intents, confidences)"""
+    args = (texts, k) if names is None else (texts, k, names)
+    return record_inference(await get_pool().run(predict_intents, *args), texts, names)
+
+
+def predict_on_pool(texts):
+    """Blocking run_inference, for callers outside the event loop"""
+    return record_inference(get_pool().executor.submit(predict_intents, texts).result(), texts)
+
+
+async def run_chunked(texts, k=1, names=None):
+    """run_inference over BATCH_CHUNK_SIZE texts at a time.
+
+    Only the first chunk can fail fast with PoolSaturated; later ones wait
+    for capacity rather than throw away the chunks already scored.
+    """
+    intents, confs = [], []
+    for start in range(0, len(texts), BATCH_CHUNK_SIZE):
+        chunk = slice(start, start + BATCH_CHUNK_SIZE)
+        while True:
+            try:
+                chunk_intents, chunk_confs = await run_inference(texts[chunk], k, None if names is None else names[chunk])
+                break
+            except PoolSaturated:
+                if start == 0:
+                    raise
+                await asyncio.sleep(0.01)
+        intents += chunk_intents
+        confs += chunk_confs
+    return intents, confs
+
+
+def record_dedup(total, unique):
+    if METRICS_ENABLED:
+        DEDUP_TEXTS.inc("unique", amount=unique)
+        DEDUP_TEXTS.inc("duplicate", amount=total - unique)
+
+
+async def predict_cached(texts, k=1, model=None):
+    """Top-k predict_intents behind the prediction cache; only cache misses reach the model.
+
+    Texts that normalize to the same key are looked up and scored once and
+    the result is copied to each of their positions. Each text goes to the
+    model `model`, or the one route() picks. Returns (intents, confidences,
+    number of unique texts).
+    """
+    keys, unique_texts, inverse = dedupe(texts, TEXT_LIMITS.max_chars)
+    names = route(keys, model)
+    live = serving_bundles()
+    # Keyed by model version too, so a result computed just before a swap is never served after it
+    served = [live[DEFAULT_MODEL]] * len(keys) if names is None else [live[name] for name in names]
+    intents = [None] * len(keys)
+    confs = [None] * len(keys)
+    missing = []
+    for j, key in enumerate(keys):
+        hit = cache.get((served[j].version, key))
+        # Cached rankings shorter than k (stored by a smaller top_k request) count as misses
+        if hit is None or len(hit[0]) < min(k, len(served[j].labels)):
+            missing.append(j)
+        else:
+            intents[j], confs[j] = hit
+    if missing:
+        new_intents, new_confs = await run_chunked([unique_texts[j] for j in missing], k,
+                                                   None if names is None else [names[j] for j in missing])
+        for j, intent, conf in zip(missing, new_intents, new_confs):
+            intents[j], confs[j] = intent, conf
+            cache.put((served[j].version, keys[j]), (intent, conf))
+    record_dedup(len(texts), len(keys))
+    return [intents[j] for j in inverse], [confs[j] for j in inverse], len(keys)
+
+
+#  Coalescing of identical in-flight single queries
+#  A query arriving while the same (model version, normalized text, k) is
+#  already being scored awaits that computation instead of starting its own.
+
+inflight = {}
+
+
+async def coalesce(key, compute):
+    """Await compute() once for all concurrent callers with the same key"""
+    future = inflight.get(key)
+    if future is None:
+        future = inflight[key] = asyncio.ensure_future(compute())
+        future.add_done_callback(lambda _: inflight.pop(key, None))
+    elif METRICS_ENABLED:
+        COALESCED.inc()
+    # Shielded so one caller disconnecting does not cancel the others' result
+    return await asyncio.shield(future)
+
+
+async def score_single(text, k, key, name=DEFAULT_MODEL):
+    """Top-k ranking for one query (micro-batched when enabled), stored in the cache under key"""
+    if name != DEFAULT_MODEL:
+        intents, confs = await run_inference([text], k, [name])
+        intents, confs = intents[0], confs[0]
+    elif k == 1 and get_batcher() is not None:
+        # The micro-batcher only ranks the top intent; top_k requests go straight to the pool
+        with get_pool().admit():
+            intents, confs = await asyncio.wrap_future(batcher.submit(text))
+    else:
+        intents, confs = await run_inference([text], k)
+        intents, confs = intents[0], confs[0]
+    cache.put(key, (intents, confs))
+    return intents, confs
+
+
+#  Top-k and abstaining
+#  Every prediction is a ranking; top_k exposes its head and a confidence
+#  threshold (per request, or INTENT_ABSTAIN_THRESHOLD) turns low-confidence
+#  predictions into UNKNOWN_INTENT, so callers can route those to a fallback.
+
+TOP_K_MAX = int(os.getenv("INTENT_TOP_K_MAX", "10"))
+ABSTAIN_THRESHOLD = float(os.getenv("INTENT_ABSTAIN_THRESHOLD", "0"))
+UNKNOWN_INTENT = "unknown"
+
+
+def compact_results(intents, confs, top_k=None, threshold=None, live=None):
+    """Batch response as parallel arrays: indices into "labels" (-1 when abstaining) and confidences, no echoed text"""
+    threshold = ABSTAIN_THRESHOLD if threshold is None else threshold
+    live = live or bundle
+    labels = list(live.classes)
+    index = {label: i for i, label in enumerate(labels)}
+
+    def position(label):
+        # A model swapped in mid-request (or another routed model) may rank labels this bundle does not have
+        if label not in index:
+            index[label] = len(labels)
+            labels.append(label)
+        return index[label]
+
+    out = {
+        "version": live.version,
+        "labels": labels,
+        "intents": [position(row[0]) if conf[0] >= threshold else -1 for row, conf in zip(intents, confs)],
+        "confidences": [conf[0] for conf in confs],
+    }
+    if top_k is not None:
+        out["top_intents"] = [[position(label) for label in row[:top_k]] for row in intents]
+        out["top_confidences"] = [conf[:top_k] for conf in confs]
+    return out
+
+
+def format_result(text, intents, confs, top_k=None, threshold=None):
+    """Response row for one text from its ranked (intents, confidences)"""
+    threshold = ABSTAIN_THRESHOLD if threshold is None else threshold
+    intent, conf = intents[0], confs[0]
+    row = {"text": text, "intent": intent if conf >= threshold else UNKNOWN_INTENT, "confidence": conf}
+    if top_k is not None:
+        row["top_intents"] = [{"intent": i, "confidence": c} for i, c in zip(intents[:top_k], confs[:top_k])]
+    return row
+
+
+#  Streaming bulk classification
+#  Lines are scored in fixed-size chunks as they arrive, so memory stays flat
+#  however long the request stream is.
+
+STREAM_CHUNK_SIZE = int(os.getenv("INTENT_STREAM_CHUNK_SIZE", "1000"))
+
+
+async def score_stream_chunk(texts, k=1, model=None):
+    """Score one chunk's unique texts on the pool; waits for capacity instead of failing the stream"""
+    keys, unique_texts, inverse = dedupe(texts, TEXT_LIMITS.max_chars)
+    names = route(keys, model)
+    while True:
+        try:
+            intents, confs = await run_inference(unique_texts, k, names)
+            break
+        except PoolSaturated:
+            await asyncio.sleep(0.01)
+    record_dedup(len(texts), len(unique_texts))
+    return [intents[j] for j in inverse], [confs[j] for j in inverse]
+
+
+async def classify_lines(lines, ndjson, top_k=None, threshold=None, model=None):
+    """NDJSON result lines for a stream of input lines, one output row per non-empty input line"""
+    chunk = []
+    errors = {}
+
+    async def flush():
+        valid = [text for text in chunk if text is not None]
+        intents, confs = await score_stream_chunk(valid, top_k or 1, model) if valid else ([], [])
+        results = iter(zip(valid, intents, confs))
+        out = []
+        for i, text in enumerate(chunk):
+            if text is None:
+                out.append(json.dumps(errors[i]))
+            else:
+                text, intent, conf = next(results)
+                out.append(json.dumps(format_result(text, intent, conf, top_k, threshold)))
+        chunk.clear()
+        errors.clear()
+        return ("\n".join(out) + "\n").encode("utf-8")
+
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line is not None and not line.strip():
+            continue
+        try:
+            if line is None:
+                raise ValueError(f"Line is longer than {MAX_BODY_BYTES} bytes")
+            text = parse_ndjson_text(line) if ndjson else line
+            if not text.strip():
+                raise ValueError("Text cannot be empty")
+            if TEXT_LIMITS.too_long(text):
+                raise ValueError(f"Text has {len(text)} characters; the limit is {TEXT_LIMITS.max_chars}")
+        except ValueError as exc:
+            errors[len(chunk)] = {"line": line_no, "error": str(exc)}
+            text = None
+        chunk.append(text)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield await flush()
+    if chunk:
+        yield await flush()
+
+
+#  Dynamic micro-batching for single queries (opt-in)
+
+MICROBATCH_ENABLED = os.getenv("INTENT_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("INTENT_MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("INTENT_MICROBATCH_MAX_SIZE", "64"))
+
+batcher = None
+
+
+def get_batcher():
+    global batcher
+    if batcher is None and MICROBATCH_ENABLED:
+        batcher = MicroBatcher(predict_on_pool, MICROBATCH_MAX_WAIT_MS, MICROBATCH_MAX_SIZE)
+    return batcher
+
+
+#  Online learning from feedback (opt-in)
+#  Operators POST corrected (text, intent) pairs; they are buffered and every
+#  INTENT_FEEDBACK_INTERVAL_SECONDS folded into an SGD model over hashed
+#  features (online.py) with partial_fit. Each update is published to the
+#  registry as a new "<version>-onlineN" version and hot-swapped like a
+#  reload, so process-pool workers and registry watchers pick it up too.
+
+FEEDBACK_ENABLED = os.getenv("INTENT_FEEDBACK", "0") == "1"
+FEEDBACK_INTERVAL_SECONDS = float(os.getenv("INTENT_FEEDBACK_INTERVAL_SECONDS", "60"))
+# Training data the online model is seeded from when the live model is not already an online one
+FEEDBACK_SEED_DATA = os.getenv("INTENT_FEEDBACK_SEED_DATA", "data/train_dataset.csv")
+FEEDBACK_KEEP_VERSIONS = int(os.getenv("INTENT_FEEDBACK_KEEP_VERSIONS", "3"))
+# Rows buffered between updates; further feedback gets 503 until the next update drains the buffer
+FEEDBACK_MAX_BUFFERED = int(os.getenv("INTENT_FEEDBACK_MAX_BUFFERED", "100000"))
+
+feedback_lock = threading.Lock()
+
+
+def make_learner():
+    live = bundle
+    if is_online_model(live.model, live.vectorizer):
+        return OnlineLearner.resume(live.source, PREPROCESS, max_buffered=FEEDBACK_MAX_BUFFERED)
+    return OnlineLearner.seed_from_csv(FEEDBACK_SEED_DATA, live.classes, PREPROCESS, max_buffered=FEEDBACK_MAX_BUFFERED)
+
+
+learner = make_learner() if FEEDBACK_ENABLED else None
+
+
+def apply_feedback():
+    """Apply buffered feedback, publish the updated model and make it live.
+
+    Blocking; returns (rows applied, new bundle), or (0, None) when nothing
+    was buffered. A version that fails validation is removed again.
+    """
+    with feedback_lock:
+        applied = learner.apply()
+        if not applied:
+            return 0, None
+        version = next_online_version(bundle.version, registry.versions())
+        with tempfile.TemporaryDirectory() as tmp:
+            learner.save(tmp)
+            registry.publish(tmp, version)
+        try:
+            new_bundle = reload_model(version)
+        except Exception:
+            registry.remove(version)
+            raise
+        prune_online_versions()
+        return applied, new_bundle
+
+
+def prune_online_versions():
+    """Delete all but the newest FEEDBACK_KEEP_VERSIONS online versions (never the live one)"""
+    online = [v for v in registry.versions() if ONLINE_VERSION.match(v)]
+    for version in online[:-FEEDBACK_KEEP_VERSIONS or None]:
+        if version != bundle.version:
+            registry.remove(version)
+
+
+def feedback_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            apply_feedback()
+        except Exception as exc:
+            print(f"Applying feedback failed: {exc}")
+
+
+if FEEDBACK_ENABLED and FEEDBACK_INTERVAL_SECONDS > 0:
+    threading.Thread(target=feedback_loop, args=(FEEDBACK_INTERVAL_SECONDS,), name="feedback", daemon=True).start()
+
+
+# Read at scrape time from the cache, pool, feedback learner and live model
+metrics.gauge("intent_cache_entries", "Entries in the prediction cache", lambda: cache.stats()["size"])
+metrics.callback_counter("intent_cache_hits_total", "Prediction cache hits", lambda: cache.hits)
+metrics.callback_counter("intent_cache_misses_total", "Prediction cache misses", lambda: cache.misses)
+metrics.gauge("intent_executor_pending", "Inference calls queued or running", lambda: pool.pending if pool else 0)
+metrics.callback_counter("intent_executor_rejected_total", "Inference calls rejected with 503", lambda: pool.rejected if pool else 0)
+metrics.gauge("intent_feedback_buffered", "Feedback rows waiting for the next update", lambda: learner.buffered if learner else 0)
+metrics.callback_counter("intent_feedback_applied_total", "Feedback rows applied to the online model", lambda: learner.applied if learner else 0)
+metrics.gauge("intent_model_info", "Live model version", lambda: {bundle.version: 1}, labelname="version")
 
 
 # Request / Response Schemas
 
 class SingleQuery(BaseModel):
     text: str
+    top_k: Optional[int] = Field(None, ge=1, le=TOP_K_MAX)
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    # A hosted model name (see INTENT_MODELS); unset follows the traffic split
+    model: Optional[str] = None
 
 class BatchQuery(BaseModel):
-    texts: List[str]
+    texts: List[str] = Field(max_length=MAX_BATCH_SIZE)
+    top_k: Optional[int] = Field(None, ge=1, le=TOP_K_MAX)
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    model: Optional[str] = None
+    # Answer with parallel arrays (see compact_results) instead of one object per text
+    compact: bool = False
+
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None
+
+class FeedbackItem(BaseModel):
+    text: str
+    intent: str
+
+class FeedbackBatch(BaseModel):
+    items: List[FeedbackItem]
+
+class IntentScore(BaseModel):
+    intent: str
+    confidence: float
 
 class ClassificationResult(BaseModel):
     text: str
     intent: str
     confidence: float
+    top_intents: Optional[List[IntentScore]] = None
+
+class CompactBatchResult(BaseModel):
+    """A batch with compact=true: parallel arrays, intents as indices into labels (-1 when abstaining)"""
+    version: str
+    labels: List[str]
+    intents: List[int]
+    confidences: List[float]
+    top_intents: Optional[List[List[int]]] = None
+    top_confidences: Optional[List[List[float]]] = None
 
 
 # Endpoints
 
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request, exc):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, retry later"},
+        headers={"Retry-After": "1"},
+    )
+
 
 # Health check
 @app.get("/api/health")
 def health_check():
     return {"status": "ok", "message": "API is running"}
 
+# Readiness check: 503 until the warm-up inference has finished
+@app.get("/api/ready")
+def readiness_check():
+    if not ready.is_set():
+        return JSONResponse({"status": "warming_up"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready", "version": bundle.version}
+
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Model info (requires basic auth)
 @app.get("/api/model/info")
 def model_info(user: str = Depends(get_current_user)):
+    live = bundle
     info = {
         "model_name": "Trained Intent Classifier",
-        "classes": list(le.classes_),
-        "num_classes": len(le.classes_),
-        # You can add real accuracy or metrics if you saved them
-        "accuracy": 0.88
+        **live.info(),
+        # Only known when the version was published with a metrics.json
+        "accuracy": live.metrics.get("accuracy"),
+        "available_versions": registry.versions(),
+        "limits": {
+            **TEXT_LIMITS.info(),
+            "max_body_bytes": MAX_BODY_BYTES,
+            "max_batch_size": MAX_BATCH_SIZE,
+            "batch_chunk_size": BATCH_CHUNK_SIZE,
+        },
     }
     return info
 
+# Hot-reload a registry version (requires basic auth)
+@app.post("/api/admin/model/reload")
+async def admin_reload_model(request: Optional[ReloadRequest] = None, user: str = Depends(get_current_user)):
+    version = request.version if request else None
+    try:
+        new_bundle = await asyncio.to_thread(reload_model, version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version or 'latest'}")
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Model failed validation: {exc}")
+    return {"status": "reloaded", **new_bundle.info()}
+
+# Served models and the traffic split (requires basic auth)
+@app.get("/api/models")
+def list_models(user: str = Depends(get_current_user)):
+    total = sum(split.weights.values()) if split is not None else None
+    models = []
+    for name, served in serving_bundles().items():
+        if split is not None:
+            share = split.weights.get(name, 0.0) / total
+        else:
+            share = 1.0 if name == DEFAULT_MODEL else 0.0
+        models.append({
+            "name": name,
+            "version": served.version,
+            "model_type": served.model_type,
+            "source": served.source,
+            # Models with the same value share one featurize pass
+            "features": served.feature_key[0][:12],
+            "traffic_share": share,
+            "shadow": shadow is not None and name == shadow.name,
+        })
+    return {"default": DEFAULT_MODEL, "models": models}
+
+# Shadow model agreement (requires basic auth)
+@app.get("/api/shadow/stats")
+def shadow_stats(user: str = Depends(get_current_user)):
+    if shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow.stats()}
+
+# Micro-batching stats (requires basic auth)
+@app.get("/api/batching/stats")
+def batching_stats(user: str = Depends(get_current_user)):
+    if get_batcher() is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+# Prediction cache stats (requires basic auth)
+@app.get("/api/cache/stats")
+def cache_stats(user: str = Depends(get_current_user)):
+    return cache.stats()
+
+# Inference pool stats (requires basic auth)
+@app.get("/api/executor/stats")
+def executor_stats(user: str = Depends(get_current_user)):
+    return get_pool().stats()
+
+# Submit corrected labels for online learning (requires basic auth)
+@app.post("/api/feedback")
+def submit_feedback(batch: FeedbackBatch, user: str = Depends(get_current_user)):
+    if learner is None:
+        raise HTTPException(status_code=404, detail="Feedback is disabled (set INTENT_FEEDBACK=1)")
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="Feedback list cannot be empty")
+    if any(not item.text.strip() for item in batch.items):
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    try:
+        buffered = learner.add([item.text for item in batch.items], [item.intent for item in batch.items])
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except FeedbackBufferFull as exc:
+        # Retry once the next update has drained the buffer
+        retry_after = str(max(1, int(FEEDBACK_INTERVAL_SECONDS)))
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": retry_after})
+    return {"accepted": len(batch.items), "buffered": buffered}
+
+# Online learning stats (requires basic auth)
+@app.get("/api/feedback/stats")
+def feedback_stats(user: str = Depends(get_current_user)):
+    if learner is None:
+        return {"enabled": False}
+    return {"enabled": True, "interval_seconds": FEEDBACK_INTERVAL_SECONDS, **learner.stats()}
+
+# Apply buffered feedback now instead of waiting for the next interval (requires basic auth)
+@app.post("/api/admin/feedback/apply")
+async def admin_apply_feedback(user: str = Depends(get_current_user)):
+    if learner is None:
+        raise HTTPException(status_code=404, detail="Feedback is disabled (set INTENT_FEEDBACK=1)")
+    try:
+        applied, new_bundle = await asyncio.to_thread(apply_feedback)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Model failed validation: {exc}")
+    if new_bundle is None:
+        return {"status": "no_feedback", "applied": 0}
+    return {"status": "applied", "applied": applied, **new_bundle.info()}
+
 # Classify single query
-@app.post("/api/classify", response_model=ClassificationResult)
-def classify_single(query: SingleQuery):
+@app.post("/api/classify", response_model=ClassificationResult, openapi_extra=body_schema(SingleQuery))
+async def classify_single(request: Request):
+    query = await parse_body(request, SingleQuery)
+    observe_parse()
     if not query.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
-    X = vectorizer.transform([query.text])
-    pred = model.predict(X)[0]
-    conf = float(np.max(model.predict_proba(X)))
-    intent = le.inverse_transform([pred])[0]
-    return {"text": query.text, "intent": intent, "confidence": conf}
+    check_text_lengths([query.text])
+    require_model(query.model)
+    k = query.top_k or 1
+    text_key = normalize_text(query.text, TEXT_LIMITS.max_chars)
+    name = (route([text_key], query.model) or [DEFAULT_MODEL])[0]
+    live = model_bundle(name)
+    key = (live.version, text_key)
+    hit = cache.get(key)
+    if hit is not None and len(hit[0]) >= min(k, len(live.labels)):
+        intents, confs = hit
+    else:
+        intents, confs = await coalesce(key + (k,), lambda: score_single(query.text, k, key, name))
+    response = serialize(format_result(query.text, intents, confs, query.top_k, query.threshold), wants_msgpack(request))
+    response.headers["X-Model"] = name
+    return response
+
+# Classify a stream of NDJSON ({"text": ...} per line) or text/plain lines
+@app.post("/api/classify/stream")
+async def classify_stream(
+    request: Request,
+    top_k: Optional[int] = Query(None, ge=1, le=TOP_K_MAX),
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    model: Optional[str] = None,
+):
+    require_model(model)
+    ndjson = not request.headers.get("content-type", "").startswith("text/plain")
+    lines = iter_lines(request.stream(), MAX_BODY_BYTES)
+    return DuplexStreamingResponse(classify_lines(lines, ndjson, top_k, threshold, model),
+                                   media_type="application/x-ndjson")
 
 # Classify batch queries
-@app.post("/api/classify/batch", response_model=List[ClassificationResult])
-def classify_batch(batch: BatchQuery):
+@app.post("/api/classify/batch", response_model=Union[List[ClassificationResult], CompactBatchResult],
+          openapi_extra=body_schema(BatchQuery))
+async def classify_batch(request: Request):
+    batch = await parse_body(request, BatchQuery)
+    observe_parse()
     if not batch.texts:
         raise HTTPException(status_code=400, detail="Text list cannot be empty")
-    X = vectorizer.transform(batch.texts)
-    preds = model.predict(X)
-    probs = model.predict_proba(X)
-    results = []
-    for text, pred, prob in zip(batch.texts, preds, probs):
-        intent = le.inverse_transform([pred])[0]
-        conf = float(np.max(prob))
-        results.append({"text": text, "intent": intent, "confidence": conf})
-    return results
+    check_text_lengths(batch.texts)
+    require_model(batch.model)
+    intents, confs, unique = await predict_cached(batch.texts, batch.top_k or 1, batch.model)
+    if batch.compact:
+        results = compact_results(intents, confs, batch.top_k, batch.threshold, model_bundle(batch.model))
+    else:
+        # Rows are already plain str/float, so skip response_model re-validation
+        results = [
+            format_result(text, intent, conf, batch.top_k, batch.threshold)
+            for text, intent, conf in zip(batch.texts, intents, confs)
+        ]
+    response = serialize(results, wants_msgpack(request))
+    # Share of the batch that repeated an earlier text and was not scored again
+    response.headers["X-Unique-Texts"] = str(unique)
+    response.headers["X-Dedup-Ratio"] = f"{1 - unique / len(batch.texts):.4f}"
+    if batch.model is not None or split is None:
+        response.headers["X-Model"] = batch.model or DEFAULT_MODEL
+    return response
@@ -0,0 +1,181 @@
+"""Incremental model updates from labelled feedback.
+
+The trained TF-IDF + LogisticRegression model can only be refit from scratch.
+OnlineLearner keeps an incrementally trainable model instead: an
+SGDClassifier with log loss (so predict_proba exists) over HashingVectorizer
+features, which have no vocabulary and therefore never need refitting. It is
+seeded with a few passes over the training CSV, or resumed from a previously
+published online version, and buffered (text, intent) corrections are then
+folded in with partial_fit.
+
+save() writes the usual three artifact files, so an updated model is
+published to the registry and hot-swapped like any trained version. Online
+versions are named after the trained version they started from:
+v2-online1, v2-online2, ... (which sort after v2 and before v3).
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import artifacts
+from preprocessing import clean_texts
+from registry import METRICS_FILE
+
+HASH_FEATURES = 2 ** 16
+# Feedback rows held between updates; add() refuses more, so the buffer cannot grow without bound
+MAX_BUFFERED = 100000
+ONLINE_VERSION = re.compile(r"^(?P<base>.+)-online(?P<n>\d+)$")
+
+
+def base_version(version):
+    """The trained version an online version descends from"""
+    match = ONLINE_VERSION.match(version)
+    return match.group("base") if match else version
+
+
+def next_online_version(version, existing):
+    """Name for the next online version on top of `version`, given the registry's versions"""
+    base = base_version(version)
+    taken = [int(m.group("n")) for m in map(ONLINE_VERSION.match, existing) if m and m.group("base") == base]
+    return f"{base}-online{max(taken, default=0) + 1}"
+
+
+class FeedbackBufferFull(Exception):
+    """add() would take the buffer past max_buffered rows"""
+
+
+def is_online_model(model, vectorizer):
+    return type(model).__name__ == "SGDClassifier" and type(vectorizer).__name__ == "HashingVectorizer"
+
+
+class OnlineLearner:
+    """SGD model over hashed features plus a buffer of feedback not yet applied"""
+
+    def __init__(self, model, vectorizer, le, preprocess=True, epochs=3, max_buffered=MAX_BUFFERED):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.le = le
+        self.preprocess = preprocess
+        self.epochs = epochs
+        self.max_buffered = max_buffered
+        self.applied = 0
+        self.rejected = 0
+        self.updates = 0
+        self.last_update_seconds = None
+        self.last_update_at = None
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        # One partial_fit / save at a time
+        self.lock = threading.Lock()
+
+    @classmethod
+    def seed(cls, classes, texts, intents, preprocess=True, epochs=3, seed_epochs=10, n_features=HASH_FEATURES,
+             random_state=0, max_buffered=MAX_BUFFERED):
+        """A fresh learner trained with seed_epochs passes over (texts, intents)"""
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import LabelEncoder
+
+        le = LabelEncoder().fit(classes)
+        vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm="l2")
+        model = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=random_state)
+        learner = cls(model, vectorizer, le, preprocess, epochs, max_buffered)
+        learner._fit(texts, intents, seed_epochs)
+        return learner
+
+    @classmethod
+    def seed_from_csv(cls, path, classes, preprocess=True, **kwargs):
+        import pandas as pd
+
+        df = pd.read_csv(path)
+        return cls.seed(classes, df["text"].astype(str).tolist(), df["intent"].tolist(), preprocess, **kwargs)
+
+    @classmethod
+    def resume(cls, directory, preprocess=True, epochs=3, max_buffered=MAX_BUFFERED):
+        """Continue from an online version's artifact files (a private copy, never the served objects)"""
+        model, vectorizer, le = artifacts.load_artifacts(directory)
+        if not is_online_model(model, vectorizer):
+            raise ValueError(f"{directory} does not hold an online (SGD + hashing) model")
+        learner = cls(model, vectorizer, le, preprocess, epochs, max_buffered)
+        metrics_path = os.path.join(directory, METRICS_FILE)
+        if os.path.exists(metrics_path):
+            with open(metrics_path) as f:
+                metrics = json.load(f)
+            learner.applied = metrics.get("feedback_rows", 0)
+            learner.updates = metrics.get("updates", 0)
+        return learner
+
+    @property
+    def classes(self):
+        return [str(c) for c in self.le.classes_]
+
+    @property
+    def buffered(self):
+        return len(self._buffer)
+
+    def add(self, texts, intents):
+        """Buffer corrections; returns the rows now buffered.
+
+        Buffers nothing and raises ValueError for an unknown intent, or
+        FeedbackBufferFull when the rows do not fit under max_buffered.
+        """
+        unknown = sorted(set(intents) - set(self.classes))
+        if unknown:
+            raise ValueError(f"Unknown intent(s): {', '.join(unknown)}")
+        with self._buffer_lock:
+            if len(self._buffer) + len(texts) > self.max_buffered:
+                self.rejected += len(texts)
+                raise FeedbackBufferFull(f"Feedback buffer is full ({len(self._buffer)} of {self.max_buffered} rows)")
+            self._buffer.extend(zip(texts, intents))
+            return len(self._buffer)
+
+    def apply(self):
+        """partial_fit on everything buffered so far; returns the number of rows applied"""
+        with self.lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            start = time.perf_counter()
+            texts, intents = zip(*rows)
+            self._fit(list(texts), list(intents), self.epochs)
+            self.applied += len(rows)
+            self.updates += 1
+            self.last_update_seconds = time.perf_counter() - start
+            self.last_update_at = datetime.now(timezone.utc)
+            return len(rows)
+
+    def _fit(self, texts, intents, epochs):
+        X = self.vectorizer.transform(clean_texts(texts) if self.preprocess else texts)
+        y = self.le.transform(intents)
+        classes = np.arange(len(self.le.classes_))
+        for _ in range(epochs):
+            self.model.partial_fit(X, y, classes=classes)
+
+    def save(self, directory):
+        """Write the artifact files and a metrics.json with the feedback counters"""
+        import joblib
+
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            joblib.dump(self.model, os.path.join(directory, artifacts.MODEL_FILE))
+            joblib.dump(self.vectorizer, os.path.join(directory, artifacts.VECTORIZER_FILE))
+            joblib.dump(self.le, os.path.join(directory, artifacts.LABEL_ENCODER_FILE))
+            with open(os.path.join(directory, METRICS_FILE), "w") as f:
+                json.dump({"online": True, "feedback_rows": self.applied, "updates": self.updates}, f)
+
+    def stats(self):
+        return {
+            "buffered": self.buffered,
+            "max_buffered": self.max_buffered,
+            "rejected": self.rejected,
+            "applied": self.applied,
+            "updates": self.updates,
+            "last_update_seconds": self.last_update_seconds,
+            "last_update_at": self.last_update_at.isoformat() if self.last_update_at else None,
+        }
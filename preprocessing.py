@@ -0,0 +1,55 @@
+"""Text preprocessing shared by training and serving.
+
+clean_text() gives the same output as the notebook's original pipeline
+
+    lowercase -> strip everything but [a-zA-Z0-9\\s] -> nltk.word_tokenize
+    -> drop NLTK English stopwords -> join with single spaces
+
+without NLTK at run time. Once punctuation is stripped, only letters, digits
+and whitespace are left, and the only word_tokenize rules that can still
+fire are the Treebank CONTRACTIONS2 splits ("cannot" -> "can not", "gonna"
+-> "gon na", ...); everything else is a whitespace split. So the whole
+pipeline is two precompiled regex passes, str.split() and a frozenset
+lookup per token.
+"""
+import re
+
+# nltk.corpus.stopwords.words("english"), nltk_data 2024 revision
+STOPWORDS = frozenset("""
+a about above after again against ain all am an and any are aren aren't as at be because been before
+being below between both but by can couldn couldn't d did didn didn't do does doesn doesn't doing don
+don't down during each few for from further had hadn hadn't has hasn hasn't have haven haven't having
+he he'd he'll he's her here hers herself him himself his how i i'd i'll i'm i've if in into is isn
+isn't it it'd it'll it's its itself just ll m ma me mightn mightn't more most mustn mustn't my myself
+needn needn't no nor not now o of off on once only or other our ours ourselves out over own re s same
+shan shan't she she'd she'll she's should should've shouldn shouldn't so some such t than that that'll
+the their theirs them themselves then there these they they'd they'll they're they've this those
+through to too under until up ve very was wasn wasn't we we'd we'll we're we've were weren weren't what
+when where which while who whom why will with won won't wouldn wouldn't y you you'd you'll you're
+you've your yours yourself yourselves
+""".split())
+
+# Treebank CONTRACTIONS2 rules that can match text with no punctuation left
+CONTRACTIONS = {
+    "cannot": "can not",
+    "gimme": "gim me",
+    "gonna": "gon na",
+    "gotta": "got ta",
+    "lemme": "lem me",
+    "wanna": "wan na",
+}
+
+_NON_ALNUM = re.compile(r"[^a-zA-Z0-9\s]")
+_CONTRACTION = re.compile(r"\b(?:%s)\b" % "|".join(CONTRACTIONS))
+
+
+def clean_text(text):
+    """Normalize one text the way the training data was normalized"""
+    text = _NON_ALNUM.sub("", str(text).lower())
+    if _CONTRACTION.search(text):
+        text = _CONTRACTION.sub(lambda m: CONTRACTIONS[m.group()], text)
+    return " ".join([token for token in text.split() if token not in STOPWORDS])
+
+
+def clean_texts(texts):
+    return [clean_text(text) for text in texts]
@@ -0,0 +1,313 @@
+"""Versioned model registry and the immutable bundle that serves predictions.
+
+The registry is a directory with one sub-directory per model version, each
+holding the three artifact files (and optionally a metrics.json written at
+training time and a compiled model.bundle):
+
+    models/registry/
+        v1/  intent_model.pkl  tfidf_vectorizer.pkl  label_encoder.pkl  metrics.json
+        v2/  ...
+
+`python registry.py publish --src <dir> --version v2` copies a trained
+artifact set in under a temporary name and renames it into place, so a
+watcher never sees a half-written version.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+
+import numpy as np
+
+import artifacts
+from featurizer import FastTfidfFeaturizer, feature_digest, vectorizer_settings
+from limits import merge_windows
+from preprocessing import clean_texts
+from scoring import LinearScorer
+
+METRICS_FILE = "metrics.json"
+ARTIFACT_FILES = (artifacts.MODEL_FILE, artifacts.VECTORIZER_FILE, artifacts.LABEL_ENCODER_FILE)
+
+# Scored by validate_bundle() before a new version is allowed to go live
+SMOKE_TEXTS = [
+    "Send an email to John about the budget",
+    "Schedule a meeting with the team on Friday at 3pm",
+    "Search the web for weather forecast",
+    "What is our company's vacation policy",
+    "How are you doing today",
+]
+
+
+def top_k(probs, k):
+    """Column indices and values of the k largest entries of each row, largest first.
+
+    argpartition selects the k columns in linear time; only those k are then
+    sorted, instead of argsorting every row of the probability matrix.
+    """
+    n_classes = probs.shape[1]
+    k = min(k, n_classes)
+    if k == 1:
+        idx = probs.argmax(axis=1)[:, None]
+    else:
+        idx = np.argpartition(probs, n_classes - k, axis=1)[:, n_classes - k:]
+        order = np.argsort(-np.take_along_axis(probs, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+    return idx, np.take_along_axis(probs, idx, axis=1)
+
+
+class ModelBundle:
+    """One loaded artifact set. Never mutated after construction, so a request
+    holding a reference keeps scoring on it while a newer bundle goes live.
+
+    scoring="linear" scores with a LinearScorer converted from the model
+    instead of calling the estimator's predict_proba; featurizer="fast" (or
+    "hashed") builds features with FastTfidfFeaturizer instead of
+    vectorizer.transform.
+
+    With both lean paths on, a bundle can instead be built from
+    CompiledArtifacts (compiled=...); model, vectorizer and le are then None
+    and scikit-learn is never imported.
+
+    preprocess=True runs texts through preprocessing.clean_text first, as
+    was done to the training data.
+    """
+
+    def __init__(self, version, model, vectorizer, le, source=None, metrics=None, scoring="sklearn",
+                 featurizer="sklearn", compiled=None, preprocess=True):
+        if scoring not in ("sklearn", "linear"):
+            raise ValueError(f"Unknown scoring mode: {scoring!r} (expected 'sklearn' or 'linear')")
+        if featurizer not in ("sklearn", "fast", "hashed"):
+            raise ValueError(f"Unknown featurizer: {featurizer!r} (expected 'sklearn', 'fast' or 'hashed')")
+        if compiled is not None and (scoring != "linear" or featurizer == "sklearn"):
+            raise ValueError("A compiled bundle needs scoring='linear' and featurizer 'fast' or 'hashed'")
+        self.version = version
+        self.model = model
+        self.vectorizer = vectorizer
+        self.le = le
+        self.source = source
+        self.metrics = metrics or {}
+        self.scoring = scoring
+        self.featurizer_mode = featurizer
+        self.preprocess = preprocess
+        self.compiled = compiled
+        self.loaded_at = datetime.now(timezone.utc)
+        if compiled is not None:
+            self.scorer = compiled.scorer
+            self.featurizer = compiled.featurizer
+            self.labels = compiled.labels
+            self.classes = [str(c) for c in compiled.classes]
+            self.model_type = compiled.metadata["model_type"]
+            return
+        self.scorer = LinearScorer.from_estimator(model) if scoring == "linear" else None
+        self.featurizer = None
+        # A HashingVectorizer (online models) has no vocabulary to copy and always featurizes itself
+        if featurizer != "sklearn" and hasattr(vectorizer, "vocabulary_"):
+            self.featurizer = FastTfidfFeaturizer.from_vectorizer(vectorizer, hashed=featurizer == "hashed")
+        # Column index of predict_proba -> intent label, so decoding is one array lookup
+        self.labels = le.classes_[model.classes_]
+        self.classes = [str(c) for c in le.classes_]
+        self.model_type = type(model).__name__
+
+    def _vectorizer_digest(self):
+        vectorizer = self.vectorizer
+        try:
+            settings = vectorizer_settings(vectorizer)
+        except (AttributeError, ValueError):
+            # HashingVectorizer (its parameters are its whole state) or a custom analyzer
+            settings = {"params": vectorizer.get_params(), "dtype": vectorizer.dtype}
+        vocabulary = getattr(vectorizer, "vocabulary_", {})
+        if isinstance(vocabulary, artifacts.MappedVocabulary):
+            # Terms in column order straight from the arrays; a lookup per term is slow on a mapped vocabulary
+            terms = vocabulary.terms[np.argsort(vocabulary.indices)]
+        else:
+            terms = sorted(vocabulary, key=vocabulary.get)
+        idf = vectorizer.idf_ if getattr(vectorizer, "use_idf", False) else None
+        return feature_digest(settings, terms, idf)
+
+    @cached_property
+    def feature_key(self):
+        """Bundles with equal keys featurize identically and can share one featurize pass.
+
+        Computed on first use: only the server process routes, so pool
+        workers loading the bundle never hash the vocabulary.
+        """
+        digest = self.compiled.feature_digest if self.compiled is not None else self._vectorizer_digest()
+        # The featurize() output type depends on the lean paths, not just the vectorizer state
+        return (digest, self.preprocess, self.featurizer is not None, self.scorer is not None)
+
+    @classmethod
+    def load(cls, directory, version=None, mmap=False, scoring="sklearn", featurizer="sklearn", preprocess=True):
+        """Load an artifact directory; the compiled bundle is preferred when the lean paths allow it"""
+        metrics = None
+        metrics_path = os.path.join(directory, METRICS_FILE)
+        if os.path.exists(metrics_path):
+            with open(metrics_path) as f:
+                metrics = json.load(f)
+        version = version or os.path.basename(os.path.normpath(directory))
+        bundle_path = os.path.join(directory, artifacts.BUNDLE_FILE)
+        if scoring == "linear" and featurizer != "sklearn" and os.path.exists(bundle_path):
+            compiled = artifacts.load_bundle(bundle_path, hashed=featurizer == "hashed", mmap=mmap)
+            return cls(version, None, None, None, directory, metrics, scoring, featurizer, compiled, preprocess)
+        model, vectorizer, le = artifacts.load_artifacts(directory, mmap=mmap)
+        return cls(version, model, vectorizer, le, directory, metrics, scoring, featurizer, preprocess=preprocess)
+
+    def featurize(self, texts):
+        """TF-IDF features of already preprocessed texts: a CSR matrix, or raw CSR arrays when both fast paths are on"""
+        if self.featurizer is None:
+            return self.vectorizer.transform(texts)
+        if self.scorer is not None:
+            return self.featurizer.transform_arrays(texts)
+        return self.featurizer.transform(texts)
+
+    def score(self, features):
+        if isinstance(features, tuple):
+            return self.scorer.predict_proba_csr(*features)
+        if self.scorer is not None:
+            return self.scorer.predict_proba(features)
+        return self.model.predict_proba(features)
+
+    def prepare(self, texts):
+        return clean_texts(texts) if self.preprocess else texts
+
+    def predict_proba(self, texts):
+        return self.score(self.featurize(self.prepare(texts)))
+
+    def predict_top(self, texts, k=1, timings=None, limits=None):
+        """The k most likely intents per text, best first, from a single predict_proba pass.
+
+        Returns (intents, confidences) as lists of k-long lists. If a timings
+        dict is given, per-stage seconds are stored in it under "preprocess",
+        "featurize", "score" and "decode". With limits (a limits.TextLimits),
+        long texts are truncated or scored over windows.
+        """
+        start = time.perf_counter()
+        owners = None
+        if limits is not None:
+            texts, owners = limits.split(texts)
+        texts = self.prepare(texts)
+        prepared = time.perf_counter()
+        features = self.featurize(texts)
+        featurized = time.perf_counter()
+        probs = self.score(features)
+        if owners is not None:
+            probs = merge_windows(probs, owners)[1]
+        scored = time.perf_counter()
+        idx, conf = top_k(probs, k)
+        result = self.labels[idx].tolist(), conf.tolist()
+        if timings is not None:
+            timings["preprocess"] = prepared - start
+            timings["featurize"] = featurized - prepared
+            timings["score"] = scored - featurized
+            timings["decode"] = time.perf_counter() - scored
+        return result
+
+    def predict(self, texts, timings=None):
+        """Score texts with a single predict_proba pass; returns (intents, confidences) lists"""
+        intents, confs = self.predict_top(texts, 1, timings)
+        return [row[0] for row in intents], [row[0] for row in confs]
+
+    def info(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at.isoformat(),
+            "model_type": self.model_type,
+            "scoring": self.scoring,
+            "featurizer": self.featurizer_mode,
+            "preprocess": self.preprocess,
+            "compiled_sha256": self.compiled.checksum if self.compiled is not None else None,
+            "quantize": self.compiled.metadata.get("quantize") if self.compiled is not None else None,
+            "pruned_terms": self.compiled.metadata.get("pruned_terms", 0) if self.compiled is not None else 0,
+            "classes": self.classes,
+            "num_classes": len(self.classes),
+            "metrics": self.metrics,
+        }
+
+
+def validate_bundle(bundle, texts=SMOKE_TEXTS):
+    """Raise ValueError unless the bundle scores a smoke batch sanely"""
+    probs = bundle.predict_proba(texts)
+    if probs.shape != (len(texts), len(bundle.labels)):
+        raise ValueError(f"predict_proba returned shape {probs.shape}, expected {(len(texts), len(bundle.labels))}")
+    if not np.all(np.isfinite(probs)) or not np.allclose(probs.sum(axis=1), 1.0):
+        raise ValueError("predict_proba rows are not valid probability distributions")
+    intents, _ = bundle.predict(texts)
+    if len(intents) != len(texts):
+        raise ValueError("label decoding dropped rows")
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def versions(self):
+        """Complete versions, oldest first (natural sort on the directory name)"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            if all(os.path.exists(os.path.join(path, f)) for f in ARTIFACT_FILES):
+                found.append(name)
+        return sorted(found, key=_natural_key)
+
+    def latest(self):
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def path(self, version):
+        if version not in self.versions():
+            raise KeyError(version)
+        return os.path.join(self.root, version)
+
+    def load(self, version=None, mmap=False, scoring="sklearn", featurizer="sklearn", preprocess=True):
+        version = version or self.latest()
+        if version is None:
+            raise KeyError("registry is empty")
+        return ModelBundle.load(self.path(version), version, mmap=mmap, scoring=scoring, featurizer=featurizer,
+                                preprocess=preprocess)
+
+    def remove(self, version):
+        shutil.rmtree(self.path(version))
+
+    def publish(self, src, version):
+        """Copy an artifact directory into the registry atomically"""
+        target = os.path.join(self.root, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"version {version!r} already exists")
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f".{version}.{os.getpid()}.{int(time.time())}")
+        os.makedirs(staging)
+        for name in ARTIFACT_FILES + (METRICS_FILE, artifacts.BUNDLE_FILE):
+            if os.path.exists(os.path.join(src, name)):
+                shutil.copy2(os.path.join(src, name), os.path.join(staging, name))
+        os.rename(staging, target)
+        return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument("command", choices=["publish", "list"])
+    parser.add_argument("--root", default="models/registry")
+    parser.add_argument("--src", default="models", help="artifact directory to publish")
+    parser.add_argument("--version", help="version name for publish")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "publish":
+        if not args.version:
+            parser.error("publish needs --version")
+        print(f"Published {registry.publish(args.src, args.version)}")
+    else:
+        for version in registry.versions():
+            print(version)
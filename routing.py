@@ -0,0 +1,211 @@
+"""Serving several models side by side in one process.
+
+Extra model directories are hosted next to the live registry model under
+short names. A request can name the model it wants; otherwise a
+TrafficSplit assigns each text to a model by weight, hashing the text's
+cache key so the same text always lands on the same model.
+
+predict_routed() scores a batch whose texts may be routed to different
+models. Models whose bundles have equal feature_key values (same
+vectorizer state, preprocessing and lean paths) share one featurize pass:
+the texts of all of them are featurized together and each model scores its
+own rows of that matrix.
+
+A ShadowEvaluator scores the same features with a candidate model on a
+background thread, after the response has been computed, and counts how
+often its top intent disagrees with the one that was served.
+"""
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from limits import merge_windows
+from registry import top_k
+
+
+def parse_mapping(value):
+    """ "a=x, b=y" -> {"a": "x", "b": "y"} (insertion ordered); raises ValueError on a malformed entry"""
+    mapping = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, sep, item = entry.partition("=")
+        if not sep or not name.strip() or not item.strip():
+            raise ValueError(f"Expected name=value, got {entry!r}")
+        mapping[name.strip()] = item.strip()
+    return mapping
+
+
+class TrafficSplit:
+    """Weighted, deterministic assignment of texts to model names"""
+
+    def __init__(self, weights):
+        weights = {name: float(weight) for name, weight in weights.items() if float(weight) > 0}
+        if not weights:
+            raise ValueError("A traffic split needs at least one positive weight")
+        self.weights = weights
+        self.names = list(weights)
+        total = sum(weights.values())
+        # Upper bound of each model's share of [0, 1)
+        self.bounds = np.cumsum([weight / total for weight in weights.values()])
+
+    def assign(self, key):
+        """Model name for one normalized text"""
+        point = zlib.crc32(key.encode("utf-8")) / 2 ** 32
+        return self.names[min(int(np.searchsorted(self.bounds, point, side="right")), len(self.names) - 1)]
+
+
+def take_rows(features, rows):
+    """Rows of a feature matrix: a CSR matrix, or its raw (data, indices, indptr) arrays"""
+    if not isinstance(features, tuple):
+        return features[rows]
+    data, indices, indptr = features
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = np.asarray(indptr)[rows]
+    lengths = np.asarray(indptr)[rows + 1] - starts
+    new_indptr = np.zeros(len(rows) + 1, dtype=np.asarray(indptr).dtype)
+    np.cumsum(lengths, out=new_indptr[1:])
+    positions = np.repeat(starts - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    return np.asarray(data)[positions], np.asarray(indices)[positions], new_indptr
+
+
+def predict_routed(bundles, names, texts, k=1, timings=None, limits=None):
+    """Top-k (intents, confidences) per text from bundles[names[i]].
+
+    Texts routed to bundles with the same feature_key are preprocessed and
+    featurized once, together. Also returns the feature groups as
+    {feature_key: (features, rows)}, rows being the text of each feature
+    row, so a shadow model can reuse them. With limits (a limits.TextLimits),
+    long texts are truncated or scored over windows.
+    """
+    n_texts = len(texts)
+    texts, owners = limits.split(texts) if limits is not None else (texts, None)
+    if owners is None:
+        owners = np.arange(n_texts)
+    by_key = {}
+    for row, owner in enumerate(owners.tolist()):
+        name = names[owner]
+        by_key.setdefault(bundles[name].feature_key, {}).setdefault(name, []).append(row)
+    intents = [None] * n_texts
+    confs = [None] * n_texts
+    groups = {}
+    spent = dict.fromkeys(("preprocess", "featurize", "score", "decode"), 0.0)
+    for key, members in by_key.items():
+        rows = sorted(row for member_rows in members.values() for row in member_rows)
+        first = bundles[next(iter(members))]
+        start = time.perf_counter()
+        prepared = first.prepare([texts[row] for row in rows])
+        featurized_at = time.perf_counter()
+        features = first.featurize(prepared)
+        spent["preprocess"] += featurized_at - start
+        spent["featurize"] += time.perf_counter() - featurized_at
+        groups[key] = (features, owners[rows])
+        position = {row: i for i, row in enumerate(rows)}
+        for name, member_rows in members.items():
+            start = time.perf_counter()
+            subset = features if len(member_rows) == len(rows) else take_rows(features, [position[r] for r in member_rows])
+            # Windows of one text are adjacent rows; their probabilities are averaged
+            member_owners, probs = merge_windows(bundles[name].score(subset), owners[member_rows])
+            scored = time.perf_counter()
+            idx, conf = top_k(probs, k)
+            for row, labels, values in zip(member_owners.tolist(), bundles[name].labels[idx].tolist(), conf.tolist()):
+                intents[row], confs[row] = labels, values
+            spent["score"] += scored - start
+            spent["decode"] += time.perf_counter() - scored
+    if timings is not None:
+        timings.update(spent)
+    return intents, confs, groups
+
+
+class ShadowEvaluator:
+    """Scores served traffic with a candidate bundle off the response path and counts disagreements.
+
+    Work runs on one background thread; once max_pending calls are queued,
+    further ones are dropped (and counted) rather than queued, so the shadow
+    can never build up a backlog under load.
+    """
+
+    def __init__(self, name, bundle, max_pending=64, samples=20, on_compare=None, limits=None):
+        self.name = name
+        self.bundle = bundle
+        # The served side's limits.TextLimits, so long texts are cut down the same way
+        self.limits = limits
+        self.max_pending = max_pending
+        # on_compare(agreed, disagreed) after every evaluated call, e.g. to update metrics
+        self.on_compare = on_compare
+        self.pending = 0
+        self.compared = 0
+        self.disagreed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.recent = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    def submit(self, texts, served, groups=None):
+        """Queue a comparison; served[i] is the top intent returned for texts[i] (None to skip the row)"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += len(texts)
+                return False
+            self.pending += 1
+        self._executor.submit(self._run, texts, served, groups or {})
+        return True
+
+    def _run(self, texts, served, groups):
+        try:
+            self.evaluate(texts, served, groups)
+        except Exception as exc:
+            self.errors += 1
+            print(f"Shadow evaluation on {self.name!r} failed: {exc}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def evaluate(self, texts, served, groups):
+        predicted = [None] * len(texts)
+        shared = groups.get(self.bundle.feature_key)
+        if shared is not None:
+            features, rows = shared
+            rows, probs = merge_windows(self.bundle.score(features), rows)
+            labels = self.bundle.labels[probs.argmax(axis=1)]
+            for row, label in zip(rows.tolist(), labels.tolist()):
+                predicted[row] = label
+        rest = [row for row, intent in enumerate(served) if intent is not None and predicted[row] is None]
+        if rest:
+            # Rows featurized with another vectorizer: this model builds its own features
+            intents, _ = self.bundle.predict_top([texts[row] for row in rest], 1, limits=self.limits)
+            for row, label in zip(rest, intents):
+                predicted[row] = label[0]
+        agreed = disagreed = 0
+        for text, intent, shadow_intent in zip(texts, served, predicted):
+            if intent is None:
+                continue
+            if intent == shadow_intent:
+                agreed += 1
+            else:
+                disagreed += 1
+                self.recent.append({"text": text, "served": intent, "shadow": shadow_intent})
+        with self._lock:
+            self.compared += agreed + disagreed
+            self.disagreed += disagreed
+        if self.on_compare is not None:
+            self.on_compare(agreed, disagreed)
+
+    def stats(self):
+        return {
+            "model": self.name,
+            "version": self.bundle.version,
+            "compared": self.compared,
+            "disagreed": self.disagreed,
+            "disagreement_rate": self.disagreed / self.compared if self.compared else None,
+            "dropped": self.dropped,
+            "pending": self.pending,
+            "errors": self.errors,
+            "recent_disagreements": list(self.recent),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,170 @@
+"""Lean NumPy scoring engine for linear intent models.
+
+Every model family the training notebook uses reduces to a sparse TF-IDF row
+times a dense (n_features, n_classes) matrix plus a bias, followed by a link
+function. LinearScorer stores just those arrays and scores CSR input
+directly, skipping scikit-learn's per-call input validation and dispatch.
+
+    python scoring.py export --src models --out models/linear_scorer.npz
+
+Supported estimators: LogisticRegression, MultinomialNB, LinearSVC and
+SGDClassifier. Models without a logistic predict_proba (LinearSVC, non-log-loss
+SGD) get a softmax over their decision scores as the confidence.
+
+Weights may also be kept compact: float16, or int8 with one scale factor per
+class (weights = q * scale). Gathered rows are widened to float64 while
+scoring, so the stored matrix stays small.
+"""
+import argparse
+
+import numpy as np
+
+LINKS = ("softmax", "ovr")
+QUANTIZE = ("float16", "int8")
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+def _ovr(scores):
+    # One-vs-rest: independent sigmoids, renormalised per row
+    probs = 1.0 / (1.0 + np.exp(-scores))
+    probs /= probs.sum(axis=1, keepdims=True)
+    return probs
+
+
+def _lr_link(model):
+    # Mirrors the installed scikit-learn: versions that still take multi_class
+    # use one-vs-rest for liblinear / multi_class="ovr", newer ones always softmax
+    params = model.get_params()
+    if "multi_class" not in params:
+        return "softmax"
+    multi_class = params["multi_class"]
+    if multi_class == "ovr" or (multi_class in ("auto", "warn", "deprecated") and model.solver == "liblinear"):
+        return "ovr"
+    return "softmax"
+
+
+def quantize_weights(weights, mode):
+    """(compact weights, per-class scale or None) for mode float16 or int8"""
+    if mode == "float16":
+        return weights.astype(np.float16), None
+    if mode == "int8":
+        # Symmetric per-class scale, so each class keeps its full 8-bit range
+        scale = np.abs(weights).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(weights / scale).astype(np.int8), scale
+    raise ValueError(f"Unknown quantization {mode!r} (expected one of {QUANTIZE})")
+
+
+def term_importance(weights, link):
+    """How much each feature can move the scores: the spread of its weights across
+    classes under softmax (a shift shared by all classes cancels out), the largest
+    absolute weight under one-vs-rest"""
+    if link == "softmax":
+        return weights.max(axis=1) - weights.min(axis=1)
+    return np.abs(weights).max(axis=1)
+
+
+class LinearScorer:
+    """probs = link(X @ (weights * scale) + bias) over CSR rows"""
+
+    def __init__(self, weights, bias, link, classes, scale=None):
+        if link not in LINKS:
+            raise ValueError(f"Unknown link {link!r} (expected one of {LINKS})")
+        weights = np.asarray(weights)
+        if weights.dtype == np.int8 and scale is None:
+            raise ValueError("int8 weights need a per-class scale")
+        if weights.dtype not in (np.float16, np.int8):
+            weights = weights.astype(np.float64, copy=False)
+        # Kept as given, never copied: from_estimator passes coef_.T, a view of a possibly
+        # memory-mapped array shared by every worker (C-contiguous if exported by export_shared)
+        self.weights = weights
+        self.scale = None if scale is None else np.ascontiguousarray(scale, dtype=np.float64)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float64)
+        self.link = link
+        self.classes_ = np.asarray(classes)
+
+    @property
+    def n_features(self):
+        return self.weights.shape[0]
+
+    @classmethod
+    def from_estimator(cls, model):
+        """Convert a fitted scikit-learn classifier"""
+        name = type(model).__name__
+        if name == "MultinomialNB":
+            return cls(model.feature_log_prob_.T, model.class_log_prior_, "softmax", model.classes_)
+        if name not in ("LogisticRegression", "LinearSVC", "SGDClassifier"):
+            raise ValueError(f"Cannot convert {name} to a linear scorer")
+
+        coef = np.asarray(model.coef_)
+        intercept = np.broadcast_to(np.asarray(model.intercept_, dtype=np.float64), (coef.shape[0],))
+        if name == "LogisticRegression":
+            link = _lr_link(model)
+        elif name == "SGDClassifier" and model.loss == "log_loss":
+            link = "ovr"
+        else:
+            link = "softmax"
+        if coef.shape[0] == 1:
+            # Binary models score only the positive class; softmax([0, d]) == sigmoid(d)
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.array([0.0, intercept[0]])
+            link = "softmax"
+        return cls(coef.T, intercept, link, model.classes_)
+
+    def decision_csr(self, data, indices, indptr):
+        """Raw class scores for a CSR matrix given as its three arrays"""
+        n_rows = len(indptr) - 1
+        scores = np.empty((n_rows, len(self.bias)))
+        scores[:] = self.bias
+        if len(data) == 0:
+            return scores
+        contrib = self.weights[indices] * np.asarray(data, dtype=np.float64)[:, None]
+        starts = np.asarray(indptr[:-1])
+        nonempty = starts < np.asarray(indptr[1:])
+        # reduceat needs strictly non-empty segments; empty rows keep only the bias
+        sums = np.add.reduceat(contrib, starts[nonempty], axis=0)
+        if self.scale is not None:
+            sums *= self.scale
+        scores[nonempty] += sums
+        return scores
+
+    def decision_function(self, X):
+        return self.decision_csr(X.data, X.indices, X.indptr)
+
+    def predict_proba_csr(self, data, indices, indptr):
+        scores = self.decision_csr(data, indices, indptr)
+        return _softmax(scores) if self.link == "softmax" else _ovr(scores)
+
+    def predict_proba(self, X):
+        return self.predict_proba_csr(X.data, X.indices, X.indptr)
+
+    def save(self, path):
+        arrays = {"weights": self.weights, "bias": self.bias, "link": np.array(self.link), "classes": self.classes_}
+        if self.scale is not None:
+            arrays["scale"] = self.scale
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f["weights"], f["bias"], str(f["link"]), f["classes"], f["scale"] if "scale" in f else None)
+
+
+if __name__ == "__main__":
+    import artifacts
+
+    parser = argparse.ArgumentParser(description="Export a trained model as a lean linear scorer")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--src", default="models", help="directory with the trained pickles")
+    parser.add_argument("--out", default="models/linear_scorer.npz", help="output .npz file")
+    args = parser.parse_args()
+
+    model, _, _ = artifacts.load_artifacts(args.src)
+    LinearScorer.from_estimator(model).save(args.out)
+    print(f"Linear scorer written to {args.out}")
@@ -0,0 +1,64 @@
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body iterator reads the request stream itself.
+
+    The stock StreamingResponse also listens on receive() for a client
+    disconnect while streaming, which would race the iterator for request
+    body messages. Here the iterator is the only reader; a disconnect
+    surfaces as ClientDisconnect from request.stream().
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_lines(byte_chunks, max_line_bytes=None):
+    """Yield decoded lines from an async iterator of byte chunks, as they complete.
+
+    A line longer than max_line_bytes is not buffered: the rest of it is
+    skipped and None is yielded in its place.
+    """
+    # Pieces of the unfinished line, joined once it completes (appending to one bytes object is quadratic)
+    parts = []
+    size = 0
+    skipping = False
+    async for chunk in byte_chunks:
+        if not chunk:
+            continue
+        pieces = chunk.split(b"\n")
+        for i, piece in enumerate(pieces):
+            if not skipping:
+                parts.append(piece)
+                size += len(piece)
+                if max_line_bytes is not None and size > max_line_bytes:
+                    parts, size, skipping = [], 0, True
+            if i == len(pieces) - 1:
+                break
+            # A newline ends the current line
+            if skipping:
+                skipping = False
+                yield None
+            else:
+                line = b"".join(parts)
+                parts, size = [], 0
+                yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+    if skipping:
+        yield None
+    elif parts and any(parts):
+        yield b"".join(parts).rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def parse_ndjson_text(line):
+    """Text from one NDJSON line: either {"text": "..."} or a bare JSON string"""
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get("text")
+    if not isinstance(value, str):
+        raise ValueError('expected {"text": "..."} or a JSON string')
+    return value
@@ -0,0 +1,113 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import artifacts
+from artifacts import MappedVocabulary
+from scoring import LinearScorer
+
+
+def test_mapped_vocabulary_lookup():
+    vocab = MappedVocabulary({"meeting": 2, "email": 0, "search": 1})
+    assert vocab["email"] == 0
+    assert vocab["search"] == 1
+    assert len(vocab) == 3
+    assert sorted(vocab) == ["email", "meeting", "search"]
+    with pytest.raises(KeyError):
+        vocab["emails"]
+    with pytest.raises(KeyError):
+        vocab["a"]
+
+
+def test_shared_export_matches_pickles(tmp_path):
+    model, vectorizer, le = artifacts.load_artifacts("models")
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    expected = model.predict_proba(vectorizer.transform(texts))
+
+    artifacts.export_shared(*artifacts.load_artifacts("models"), tmp_path)
+    shared_model, shared_vectorizer, shared_le = artifacts.load_artifacts(tmp_path, mmap=True)
+
+    assert isinstance(shared_model.coef_, np.memmap)
+    assert isinstance(shared_vectorizer.vocabulary_.terms, np.memmap)
+    # The scorer uses the mapped weights in place, already in its row-gather layout
+    weights = LinearScorer.from_estimator(shared_model).weights
+    assert np.shares_memory(weights, shared_model.coef_) and weights.flags.c_contiguous
+    np.testing.assert_allclose(shared_model.predict_proba(shared_vectorizer.transform(texts)), expected)
+    assert list(shared_le.classes_) == list(le.classes_)
+
+
+def test_compiled_bundle_matches_pickles(tmp_path):
+    model, vectorizer, le = artifacts.load_artifacts("models")
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    expected = model.predict_proba(vectorizer.transform(texts))
+
+    path = tmp_path / artifacts.BUNDLE_FILE
+    artifacts.compile_bundle(model, vectorizer, le, path)
+    compiled = artifacts.load_bundle(path)
+
+    probs = compiled.scorer.predict_proba_csr(*compiled.featurizer.transform_arrays(texts))
+    np.testing.assert_allclose(probs, expected, atol=1e-12)
+    assert list(compiled.labels) == list(le.classes_[model.classes_])
+
+    # Memory-mapped: the same results, with read-only weights viewed straight from the file mapping
+    mapped = artifacts.load_bundle(path, mmap=True)
+    assert compiled.scorer.weights.flags.writeable and not mapped.scorer.weights.flags.writeable
+    probs = mapped.scorer.predict_proba_csr(*mapped.featurizer.transform_arrays(texts))
+    np.testing.assert_allclose(probs, expected, atol=1e-12)
+    assert mapped.feature_digest == compiled.feature_digest
+    assert compiled.metadata["model_type"] == "LogisticRegression"
+
+
+def test_compiled_bundle_checksum(tmp_path):
+    path = tmp_path / artifacts.BUNDLE_FILE
+    artifacts.compile_bundle(*artifacts.load_artifacts("models"), path)
+    data = bytearray(path.read_bytes())
+    data[-100] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="checksum"):
+        artifacts.load_bundle(path)
+    path.write_bytes(b"INTENT-BUNDLE/1\n" + bytes(data)[len(artifacts.BUNDLE_MAGIC):])
+    with pytest.raises(ValueError, match="another bundle format"):
+        artifacts.load_bundle(path)
+
+
+def test_compact_bundle(tmp_path):
+    model, vectorizer, le = artifacts.load_artifacts("models")
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    expected = model.predict_proba(vectorizer.transform(texts))
+
+    full, compact = tmp_path / "full.bundle", tmp_path / "compact.bundle"
+    artifacts.compile_bundle(model, vectorizer, le, full)
+    artifacts.compile_bundle(model, vectorizer, le, compact, prune=0.1, quantize="int8")
+    compiled = artifacts.load_bundle(compact)
+
+    assert compiled.scorer.weights.dtype == np.int8
+    assert compiled.metadata["quantize"] == "int8"
+    pruned = compiled.metadata["pruned_terms"]
+    assert pruned > 0 and compiled.scorer.n_features == len(vectorizer.vocabulary_) - pruned
+    assert compact.stat().st_size < full.stat().st_size / 2
+    probs = compiled.scorer.predict_proba_csr(*compiled.featurizer.transform_arrays(texts))
+    assert (probs.argmax(axis=1) == expected.argmax(axis=1)).mean() >= 0.95
+    with pytest.raises(ValueError, match="quantization"):
+        artifacts.compile_bundle(model, vectorizer, le, compact, quantize="int4")
+
+
+def test_lean_startup_skips_sklearn(tmp_path):
+    for name in (artifacts.MODEL_FILE, artifacts.VECTORIZER_FILE, artifacts.LABEL_ENCODER_FILE):
+        shutil.copy(f"models/{name}", tmp_path / name)
+    artifacts.compile_bundle(*artifacts.load_artifacts("models"), tmp_path / artifacts.BUNDLE_FILE)
+    env = {
+        "INTENT_MODEL_DIR": str(tmp_path),
+        "INTENT_REGISTRY_DIR": str(tmp_path / "registry"),
+        "INTENT_SCORING": "linear",
+        "INTENT_FEATURIZER": "fast",
+    }
+    code = "import sys, main; print(main.bundle.predict(['send an email'])[0][0], 'sklearn' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], env={**os.environ, **env},
+                         capture_output=True, text=True, check=True).stdout.split()
+    assert out == ["email_send", "False"]
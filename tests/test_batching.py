@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def fake_predict(texts):
+    return [t.upper() for t in texts], [float(len(t)) for t in texts]
+
+
+def test_results_fan_out_to_callers():
+    batcher = MicroBatcher(fake_predict, max_wait_ms=50, max_batch_size=8)
+    futures = [batcher.submit(t) for t in ["a", "bb", "ccc"]]
+    assert [f.result(timeout=5) for f in futures] == [("A", 1.0), ("BB", 2.0), ("CCC", 3.0)]
+    batcher.close()
+
+
+def test_concurrent_requests_are_batched():
+    batcher = MicroBatcher(fake_predict, max_wait_ms=100, max_batch_size=4)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.predict(f"text{i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: (f"TEXT{i}", float(len(f"text{i}"))) for i in range(8)}
+    stats = batcher.stats()
+    assert stats["requests"] == 8
+    assert stats["batches"] < 8
+    assert max(int(size) for size in stats["batch_size_histogram"]) <= 4
+
+
+def test_errors_propagate_to_every_caller():
+    def broken(texts):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_wait_ms=10)
+    future = batcher.submit("hello")
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+    batcher.close()
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from bulk_score import score_file
+from registry import ModelBundle
+
+
+def expected_predictions():
+    df = pd.read_csv("data/test_dataset.csv")
+    intents, confs = ModelBundle.load("models").predict(df["text"].astype(str).tolist())
+    return df, intents, confs
+
+
+def test_score_csv_in_order(tmp_path):
+    out = tmp_path / "predictions.csv"
+    rows, _ = score_file("data/test_dataset.csv", str(out), chunk_size=17, jobs=2)
+    df, intents, confs = expected_predictions()
+    result = pd.read_csv(out)
+    assert rows == len(df) == len(result)
+    assert list(result.columns) == ["text", "intent", "predicted_intent", "confidence"]
+    assert result["text"].tolist() == df["text"].tolist()
+    assert result["predicted_intent"].tolist() == intents
+    assert result["confidence"].tolist() == pytest.approx(confs)
+
+
+def test_score_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    src, out = tmp_path / "input.parquet", tmp_path / "predictions.parquet"
+    pd.read_csv("data/test_dataset.csv").to_parquet(src)
+    rows, _ = score_file(str(src), str(out), chunk_size=30, jobs=2, featurizer="fast", scoring="linear")
+    _, intents, _ = expected_predictions()
+    result = pd.read_parquet(out)
+    assert rows == len(result) == len(intents)
+    assert result["predicted_intent"].tolist() == intents
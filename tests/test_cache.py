@@ -0,0 +1,55 @@
+import time
+
+from cache import PredictionCache, dedupe, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("  How ARE\tyou \n") == "how are you"
+    # Texts the long-text limits cut are cut at raw positions, so only identical ones share a key
+    long_text = "Email the report " * 10
+    assert normalize_text(long_text, max_chars=len(long_text)) == normalize_text(long_text.upper())
+    assert normalize_text(long_text, max_chars=100) == normalize_text(long_text, max_chars=100)
+    assert normalize_text(long_text, max_chars=100) != normalize_text("  " + long_text, max_chars=100)
+    assert len(dedupe([long_text, long_text.upper(), long_text], max_chars=100)[0]) == 2
+
+
+def test_dedupe():
+    keys, unique, inverse = dedupe(["Hi there", "Book a room", "hi  THERE", "Hi there"])
+    assert keys == ["hi there", "book a room"]
+    assert unique == ["Hi there", "Book a room"]
+    assert inverse == [0, 1, 0, 0]
+    assert dedupe([]) == ([], [], [])
+
+
+def test_hit_and_miss_counters():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    assert cache.get("hi") is None
+    cache.put("hi", ("general_chat", 0.9))
+    assert cache.get("hi") == ("general_chat", 0.9)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disabled_when_size_zero():
+    cache = PredictionCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
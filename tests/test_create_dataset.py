@@ -0,0 +1,28 @@
+import pandas as pd
+
+from create_dataset import FastExampleGenerator, generate_to_file, intent_templates
+
+
+def test_fast_generator_balanced_and_seeded():
+    texts, intents = FastExampleGenerator(0).generate(0, 1000)
+    assert len(texts) == 1000 and all(texts)
+    assert pd.Series(intents).value_counts().to_dict() == {intent: 200 for intent in intent_templates}
+    assert FastExampleGenerator(0).generate(0, 1000)[0] == texts
+    assert FastExampleGenerator(1).generate(0, 1000)[0] != texts
+
+
+def test_output_independent_of_jobs(tmp_path):
+    generate_to_file(str(tmp_path / "one.csv"), 2500, seed=3, jobs=1, chunk_size=1000)
+    rows, _ = generate_to_file(str(tmp_path / "two.csv"), 2500, seed=3, jobs=2, chunk_size=1000)
+    assert rows == 2500
+    one = pd.read_csv(str(tmp_path / "one.csv"), keep_default_na=False)
+    two = pd.read_csv(str(tmp_path / "two.csv"), keep_default_na=False)
+    assert len(one) == 2500
+    pd.testing.assert_frame_equal(one, two)
+
+
+def test_parquet_output(tmp_path):
+    generate_to_file(str(tmp_path / "out.parquet"), 1200, jobs=1, chunk_size=500)
+    df = pd.read_parquet(str(tmp_path / "out.parquet"))
+    assert list(df.columns) == ["text", "intent"]
+    assert len(df) == 1200
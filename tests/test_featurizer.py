@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import artifacts
+from featurizer import FastTfidfFeaturizer, HashedVocabulary, SortedVocabulary
+
+EXTRA_TEXTS = ["", "   ", "!!!", "Café naïve résumé", "a b c", "meeting meeting MEETING email"]
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist() + EXTRA_TEXTS
+
+
+def assert_same_csr(actual, expected):
+    expected = expected.tocsr()
+    expected.sort_indices()
+    np.testing.assert_array_equal(actual.indptr, expected.indptr)
+    np.testing.assert_array_equal(actual.indices, expected.indices)
+    np.testing.assert_allclose(actual.data, expected.data, rtol=1e-12)
+
+
+@pytest.mark.parametrize("hashed", [False, True])
+def test_matches_trained_vectorizer_on_full_dataset(texts, hashed):
+    _, vectorizer, _ = artifacts.load_artifacts("models")
+    featurizer = FastTfidfFeaturizer.from_vectorizer(vectorizer, hashed=hashed)
+    assert_same_csr(featurizer.transform(texts), vectorizer.transform(texts))
+
+
+@pytest.mark.parametrize("params", [
+    dict(ngram_range=(1, 3)),
+    dict(ngram_range=(2, 2), stop_words="english"),
+    dict(sublinear_tf=True, norm="l1", strip_accents="unicode"),
+    dict(binary=True, use_idf=False, strip_accents="ascii", lowercase=False),
+    dict(token_pattern=r"(?u)\b\w+\b", norm=None, smooth_idf=False),
+])
+def test_matches_vectorizer_settings(texts, params):
+    vectorizer = TfidfVectorizer(**params).fit(texts[:800])
+    for hashed in (False, True):
+        featurizer = FastTfidfFeaturizer.from_vectorizer(vectorizer, hashed=hashed)
+        for term_list, text in zip(map(featurizer.analyze, texts[:50]), texts[:50]):
+            assert term_list == vectorizer.build_analyzer()(text)
+        assert_same_csr(featurizer.transform(texts), vectorizer.transform(texts))
+
+
+def test_hashed_vocabulary_lookup():
+    vocab = HashedVocabulary({"email": 3, "meeting": 0})
+    np.testing.assert_array_equal(vocab.lookup(["meeting", "nope", "email"]), [0, -1, 3])
+    assert len(vocab.lookup([])) == 0
+
+
+def test_custom_analyzer_rejected():
+    vectorizer = TfidfVectorizer(analyzer="char").fit(["abc"])
+    with pytest.raises(ValueError):
+        FastTfidfFeaturizer.from_vectorizer(vectorizer)
+
+
+@pytest.mark.parametrize("hashed", [False, True])
+def test_mapped_vocabulary_featurizer(texts, hashed, tmp_path, monkeypatch):
+    artifacts.export_shared(*artifacts.load_artifacts("models"), tmp_path)
+    _, vectorizer, _ = artifacts.load_artifacts(tmp_path, mmap=True)
+    expected = vectorizer.transform(texts)
+    monkeypatch.setattr(artifacts.MappedVocabulary, "__getitem__", lambda *args: pytest.fail("per-term lookup"))
+    featurizer = FastTfidfFeaturizer.from_vectorizer(vectorizer, hashed=hashed)
+    if not hashed:
+        # Looked up in the memory-mapped arrays themselves, not a private copy
+        assert featurizer._vocabulary.terms is vectorizer.vocabulary_.terms
+    assert_same_csr(featurizer.transform(texts), expected)
+
+
+def test_sorted_vocabulary_lookup():
+    vocab = SortedVocabulary(np.array(["email", "meeting"]), np.array([3, 0]))
+    np.testing.assert_array_equal(vocab.lookup(["meeting", "nope", "emails", "a", "email"]), [0, -1, -1, -1, 3])
+    assert len(vocab.lookup([])) == 0
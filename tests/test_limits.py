@@ -0,0 +1,91 @@
+import asyncio
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from limits import TextLimits, merge_windows
+from registry import ModelBundle
+from streaming import iter_lines
+
+EMAIL = "please send an email to the whole team about the quarterly budget review "
+
+
+def long_text(chars, sentence=EMAIL):
+    return (sentence * (chars // len(sentence) + 1))[:chars]
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return ModelBundle.load("models")
+
+
+def test_windows_cover_the_text_and_are_capped():
+    limits = TextLimits(max_chars=100, window_chars=40, max_windows=4)
+    text = "".join(chr(ord("a") + i % 26) for i in range(130))
+    windows = limits.windows(text)
+    assert len(windows) == 4 and all(len(w) == 40 for w in windows)
+    assert windows[0] == text[:40] and windows[-1] == text[-40:]
+    assert len(limits.windows("x" * 10 ** 6)) == 4
+
+    pieces, owners = limits.split(["short", text, "also short"])
+    assert pieces[0] == "short" and pieces[-1] == "also short"
+    assert owners.tolist() == [0, 1, 1, 1, 1, 2]
+    assert limits.split(["short", "texts"]) == (["short", "texts"], None)
+
+    truncate = TextLimits(max_chars=100, mode="truncate")
+    assert truncate.split(["short", text]) == (["short", text[:100]], None)
+    assert TextLimits(max_chars=100, mode="reject").too_long(text) and not limits.too_long(text)
+    with pytest.raises(ValueError):
+        TextLimits(mode="drop")
+
+
+def test_merge_windows_averages_each_texts_rows():
+    probs = np.array([[1.0, 0.0], [0.2, 0.8], [0.4, 0.6], [0.5, 0.5]])
+    owners, merged = merge_windows(probs, [0, 1, 1, 2])
+    assert owners.tolist() == [0, 1, 2]
+    np.testing.assert_allclose(merged, [[1.0, 0.0], [0.3, 0.7], [0.5, 0.5]])
+
+
+def test_windowed_prediction_is_the_mean_over_windows(bundle):
+    limits = TextLimits(max_chars=2000, window_chars=500, max_windows=8)
+    text = long_text(3000, EMAIL) + long_text(3000, "search the web for the weather forecast in paris ")
+    intents, confs = bundle.predict_top(["send an email", text], 5, limits=limits)
+    probs = bundle.predict_proba(limits.windows(text)).mean(axis=0)
+    order = np.argsort(-probs)
+    assert intents[1] == bundle.labels[order].tolist()
+    np.testing.assert_allclose(confs[1], probs[order])
+    assert intents[0] == bundle.predict_top(["send an email"], 5)[0][0]
+
+
+@pytest.mark.parametrize("mode", ["window", "truncate"])
+def test_long_texts_cost_flat_memory_and_time(bundle, mode):
+    limits = TextLimits(max_chars=5000, mode=mode, window_chars=1000, max_windows=16)
+    bundle.predict_top([long_text(10 ** 4)], limits=limits)
+    peaks, seconds = [], []
+    for chars in (10 ** 5, 10 ** 6, 10 ** 7):
+        text = long_text(chars)
+        tracemalloc.start()
+        start = time.perf_counter()
+        intents, _ = bundle.predict_top([text], limits=limits)
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert intents == [["email_send"]]
+    # A 100x longer input allocates and takes about the same; the text itself is never copied
+    assert max(peaks) < 2 * min(peaks) < 10 ** 6
+    assert max(seconds) < 5 * min(seconds) + 0.05
+
+
+def test_iter_lines_skips_overlong_lines():
+    async def chunks():
+        yield b'{"text": "a"}\n' + b"x" * 40
+        yield b"y" * 40
+        yield b'z\n{"text": "b"}\r\n{"text": "c"}'
+
+    async def collect(limit):
+        return [line async for line in iter_lines(chunks(), limit)]
+
+    assert asyncio.run(collect(50)) == ['{"text": "a"}', None, '{"text": "b"}', '{"text": "c"}']
+    assert asyncio.run(collect(None))[1] == "x" * 40 + "y" * 40 + "z"
@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 from main import app
 
@@ -45,3 +46,397 @@ def test_model_info():
     assert "model_name" in data
     assert "classes" in data
     assert "num_classes" in data
+
+
+# 5 Batch results match single-query results
+
+def test_classify_batch_matches_single():
+    texts = ["Send an email to John", "Schedule a meeting", "What's the weather like in Paris", "How are you"]
+    batch = client.post("/api/classify/batch", json={"texts": texts}).json()
+    for item, text in zip(batch, texts):
+        single = client.post("/api/classify", json={"text": text}).json()
+        assert item["intent"] == single["intent"]
+        assert abs(item["confidence"] - single["confidence"]) < 1e-9
+
+
+# 6 Micro-batching stats (disabled by default)
+
+def test_batching_stats():
+    response = client.get("/api/batching/stats", auth=("admin", "admin123"))
+    assert response.status_code == 200
+    assert "enabled" in response.json()
+
+
+# 7 Prediction cache serves repeats
+
+def test_cache_hits():
+    client.post("/api/classify", json={"text": "How are you"})
+    before = client.get("/api/cache/stats", auth=("admin", "admin123")).json()
+    batch = client.post("/api/classify/batch", json={"texts": ["how  ARE you", "Search the web for budget"]})
+    assert batch.status_code == 200
+    after = client.get("/api/cache/stats", auth=("admin", "admin123")).json()
+    assert after["hits"] == before["hits"] + 1
+
+
+# 8 Saturated inference pool answers 503 instead of queueing
+
+def test_pool_backpressure():
+    import main
+
+    pool = main.get_pool()
+    max_pending = pool.max_pending
+    pool.max_pending = 0
+    try:
+        response = client.post("/api/classify", json={"text": "Book a meeting with the board on Friday"})
+    finally:
+        pool.max_pending = max_pending
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_pool_created_once(monkeypatch):
+    import threading
+    import time
+    import main
+
+    built = []
+
+    def slow_pool(*args):
+        built.append(args)
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(main, "pool", None)
+    monkeypatch.setattr(main, "InferencePool", slow_pool)
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(main.get_pool())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1 and len({id(pool) for pool in pools}) == 1
+
+
+# 9 Hot reload swaps in a registry version and clears the cache
+
+def test_admin_reload(tmp_path, monkeypatch):
+    import main
+    from registry import ModelRegistry
+
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish("models", "v2")
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "bundle", main.bundle)
+
+    assert client.post("/api/admin/model/reload").status_code == 401
+    response = client.post("/api/admin/model/reload", json={"version": "v3"}, auth=("admin", "admin123"))
+    assert response.status_code == 404
+
+    client.post("/api/classify", json={"text": "Tell me about company travel"})
+    response = client.post("/api/admin/model/reload", auth=("admin", "admin123"))
+    assert response.status_code == 200
+    assert response.json()["version"] == "v2"
+    assert client.get("/api/cache/stats", auth=("admin", "admin123")).json()["size"] == 0
+
+    info = client.get("/api/model/info", auth=("admin", "admin123")).json()
+    assert info["version"] == "v2"
+    assert info["available_versions"] == ["v2"]
+
+
+# 10 /metrics exposes request and per-stage latency in Prometheus format
+
+def test_metrics_endpoint():
+    client.post("/api/classify/batch", json={"texts": ["Email the report to Sara", "Search for flights"]})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'intent_http_requests_total{method="POST",path="/api/classify/batch",status="200"}' in text
+    for stage in ("parse", "preprocess", "featurize", "score", "decode", "serialize"):
+        assert f'intent_stage_duration_seconds_count{{stage="{stage}"}}' in text
+    assert "intent_inference_batch_size_bucket" in text
+    assert "intent_predictions_total{intent=" in text
+    assert 'intent_model_info{version="' in text
+
+
+# 11 /api/ready stays 503 until the warm-up inference has run
+
+def test_readiness():
+    import time
+
+    import main
+
+    main.ready.clear()
+    assert client.get("/api/ready").status_code == 503
+    with TestClient(app) as started:
+        deadline = time.time() + 30
+        while started.get("/api/ready").status_code != 200 and time.time() < deadline:
+            time.sleep(0.05)
+        assert started.get("/api/ready").json()["status"] == "ready"
+
+
+def test_process_workers_warm_themselves(monkeypatch):
+    import main
+    from registry import ModelBundle, SMOKE_TEXTS
+
+    scored = []
+    monkeypatch.setattr(ModelBundle, "predict", lambda self, texts, timings=None: scored.append(texts))
+    monkeypatch.setattr(main, "bundle", main.bundle)
+    monkeypatch.setattr(main, "shadow", main.shadow)
+    main.init_worker("models", "worker")
+    assert main.bundle.version == "worker" and scored == [SMOKE_TEXTS]
+
+
+# 12 top_k returns a ranking and a threshold abstains with "unknown"
+
+def test_top_k_and_abstain():
+    response = client.post("/api/classify", json={"text": "Send an email to John", "top_k": 3})
+    data = response.json()
+    assert [s["confidence"] for s in data["top_intents"]] == sorted((s["confidence"] for s in data["top_intents"]), reverse=True)
+    assert data["top_intents"][0] == {"intent": data["intent"], "confidence": data["confidence"]}
+
+    response = client.post("/api/classify", json={"text": "Send an email to John", "threshold": 1.0})
+    assert response.json()["intent"] == "unknown"
+    assert "top_intents" not in response.json()
+
+    texts = ["Send an email to John", "Search the web for news"]
+    rows = client.post("/api/classify/batch", json={"texts": texts, "top_k": 10, "threshold": 0.0}).json()
+    assert all(len(row["top_intents"]) == 5 for row in rows)
+    assert client.post("/api/classify/batch", json={"texts": texts, "top_k": 0}).status_code == 422
+
+
+# 13 Feedback is buffered, applied with partial_fit and hot-swapped in as a registry version
+
+def test_feedback(tmp_path, monkeypatch):
+    import main
+    from online import OnlineLearner
+    from registry import ModelRegistry
+
+    auth = ("admin", "admin123")
+    assert client.post("/api/feedback", json={"items": []}, auth=auth).status_code == 404
+    assert client.get("/api/feedback/stats", auth=auth).json() == {"enabled": False}
+
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish("models", "v2")
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "bundle", registry.load("v2"))
+    monkeypatch.setattr(main, "learner", OnlineLearner.seed_from_csv("data/train_dataset.csv", main.bundle.classes))
+    monkeypatch.setattr(main, "FEEDBACK_KEEP_VERSIONS", 1)
+
+    item = {"text": "ping the quarterly numbers over to dana", "intent": "email_send"}
+    assert client.post("/api/feedback", json={"items": [item]}).status_code == 401
+    response = client.post("/api/feedback", json={"items": [item, {**item, "intent": "travel_booking"}]}, auth=auth)
+    assert response.status_code == 422
+    response = client.post("/api/feedback", json={"items": [item] * 3}, auth=auth)
+    assert response.json() == {"accepted": 3, "buffered": 3}
+    monkeypatch.setattr(main.learner, "max_buffered", 4)
+    response = client.post("/api/feedback", json={"items": [item] * 2}, auth=auth)
+    assert response.status_code == 503 and response.headers["Retry-After"] == "60"
+    monkeypatch.setattr(main.learner, "max_buffered", 100)
+
+    response = client.post("/api/admin/feedback/apply", auth=auth)
+    assert response.status_code == 200
+    assert response.json()["applied"] == 3
+    assert response.json()["version"] == "v2-online1"
+    assert response.json()["model_type"] == "SGDClassifier"
+    assert client.get("/api/model/info", auth=auth).json()["version"] == "v2-online1"
+    assert client.post("/api/admin/feedback/apply", auth=auth).json() == {"status": "no_feedback", "applied": 0}
+
+    client.post("/api/feedback", json={"items": [item]}, auth=auth)
+    assert client.post("/api/admin/feedback/apply", auth=auth).json()["version"] == "v2-online2"
+    assert registry.versions() == ["v2", "v2-online2"]
+    stats = client.get("/api/feedback/stats", auth=auth).json()
+    assert (stats["applied"], stats["updates"], stats["buffered"]) == (4, 2, 0)
+
+
+# 14 Duplicate texts are scored once per batch, identical in-flight queries share one computation
+
+def test_dedup_and_coalescing(monkeypatch):
+    import asyncio
+    import time
+    import httpx
+    import main
+    from cache import PredictionCache
+
+    monkeypatch.setattr(main, "cache", PredictionCache(0))
+    scored = []
+    predict = main.predict_intents
+
+    def counting_predict(texts, k=1):
+        scored.append(len(texts))
+        time.sleep(0.2)
+        return predict(texts, k)
+
+    monkeypatch.setattr(main, "predict_intents", counting_predict)
+
+    texts = ["Email Sara the notes", "email sara  the notes", "Search for flights", "Email Sara the notes"]
+    response = client.post("/api/classify/batch", json={"texts": texts})
+    assert scored == [2]
+    assert response.headers["X-Unique-Texts"] == "2"
+    assert response.headers["X-Dedup-Ratio"] == "0.5000"
+    rows = response.json()
+    assert [row["text"] for row in rows] == texts
+    assert rows[0]["intent"] == rows[1]["intent"] == rows[3]["intent"]
+
+    async def burst():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(ac.post("/api/classify", json={"text": "Book a meeting at noon"})
+                                          for _ in range(8)))
+
+    scored.clear()
+    before = main.COALESCED.value()
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.json()["intent"] for r in responses}) == 1
+    assert len(scored) == 1
+    assert main.COALESCED.value() - before == 7
+    assert main.inflight == {}
+
+
+# 15 Compact parallel-array responses and MessagePack bodies
+
+def test_compact_and_msgpack(monkeypatch):
+    import main
+
+    texts = ["Send an email to John", "Search the web for news", "Send an email to John"]
+    rows = client.post("/api/classify/batch", json={"texts": texts}).json()
+    data = client.post("/api/classify/batch", json={"texts": texts, "compact": True, "top_k": 2}).json()
+    assert data["labels"] == main.bundle.classes
+    assert [data["labels"][i] for i in data["intents"]] == [row["intent"] for row in rows]
+    assert data["confidences"] == [row["confidence"] for row in rows]
+    assert [len(top) for top in data["top_intents"]] == [2, 2, 2]
+    assert data["top_intents"][0][0] == data["intents"][0]
+    # The OpenAPI schema describes the compact shape
+    assert main.CompactBatchResult.model_validate(data).top_confidences == data["top_confidences"]
+    data = client.post("/api/classify/batch", json={"texts": texts, "compact": True, "threshold": 1.0}).json()
+    assert data["intents"] == [-1, -1, -1]
+
+    monkeypatch.setattr(main, "msgpack", None)
+    response = client.post("/api/classify/batch", content=b"\x81", headers={"content-type": "application/msgpack"})
+    assert response.status_code == 415
+    response = client.post("/api/classify", json={"text": "hi"}, headers={"accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/json"
+    monkeypatch.undo()
+
+    msgpack = pytest.importorskip("msgpack")
+    headers = {"content-type": "application/msgpack", "accept": "application/msgpack"}
+    response = client.post("/api/classify/batch", content=msgpack.packb({"texts": texts}), headers=headers)
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == rows
+    response = client.post("/api/classify/batch", content=msgpack.packb({"texts": "x"}), headers=headers)
+    assert response.status_code == 422
+    assert client.post("/api/classify", content=b"\xc1", headers=headers).status_code == 400
+
+
+# 16 Hosted models: per-request choice, weighted split, shadow evaluation
+
+def test_multi_model_routing_and_shadow(monkeypatch):
+    import pandas as pd
+    from sklearn.naive_bayes import MultinomialNB
+    import artifacts
+    import main
+    from cache import PredictionCache, normalize_text
+    from registry import ModelBundle
+    from routing import ShadowEvaluator, TrafficSplit
+
+    _, vectorizer, le = artifacts.load_artifacts("models")
+    train = pd.read_csv("data/train_dataset.csv")
+    nb = MultinomialNB().fit(vectorizer.transform(train["text"].astype(str)), le.transform(train["intent"]))
+    options = {name: main.LOAD_OPTIONS[name] for name in ("scoring", "featurizer", "preprocess")}
+    nb_bundle = ModelBundle("nb", nb, vectorizer, le, **options)
+    monkeypatch.setattr(main, "hosted", {"nb": nb_bundle})
+    monkeypatch.setattr(main, "cache", PredictionCache(0))
+    auth = ("admin", "admin123")
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()[:40]
+
+    models = client.get("/api/models", auth=auth).json()["models"]
+    assert [m["name"] for m in models] == ["default", "nb"]
+    assert models[0]["features"] == models[1]["features"]
+
+    response = client.post("/api/classify", json={"text": texts[0], "model": "nb"})
+    assert response.headers["X-Model"] == "nb"
+    assert response.json()["intent"] == nb_bundle.predict([texts[0]])[0][0]
+    assert client.post("/api/classify", json={"text": texts[0], "model": "svm"}).status_code == 404
+    assert client.post("/api/classify/batch", json={"texts": texts, "model": "svm"}).status_code == 404
+    assert client.post("/api/classify/stream?model=svm", content="hi\n").status_code == 404
+    response = client.post("/api/classify/batch", json={"texts": texts, "model": "nb"})
+    assert response.headers["X-Model"] == "nb"
+    assert [row["intent"] for row in response.json()] == nb_bundle.predict(texts)[0]
+
+    split = TrafficSplit({"default": 1, "nb": 1})
+    monkeypatch.setattr(main, "split", split)
+    response = client.post("/api/classify/batch", json={"texts": texts})
+    assert "X-Model" not in response.headers
+    for text, row in zip(texts, response.json()):
+        served = main.model_bundle(split.assign(normalize_text(text)))
+        assert row["intent"] == served.predict([text])[0][0]
+
+    monkeypatch.setattr(main, "split", None)
+    shadow = ShadowEvaluator("nb", nb_bundle, on_compare=main.record_shadow)
+    monkeypatch.setattr(main, "shadow", shadow)
+    assert client.post("/api/classify/batch", json={"texts": texts}).status_code == 200
+    assert client.post("/api/classify", json={"text": texts[0], "model": "nb"}).status_code == 200
+    shadow.shutdown()
+    stats = client.get("/api/shadow/stats", auth=auth).json()
+    served = main.bundle.predict(texts)[0]
+    disagreed = sum(a != b for a, b in zip(served, nb_bundle.predict(texts)[0]))
+    # The query served by nb itself is not compared
+    assert (stats["enabled"], stats["compared"], stats["disagreed"]) == (True, len(set(texts)), disagreed)
+    assert 'intent_shadow_comparisons_total{outcome="agree"}' in client.get("/metrics").text
+
+
+# 17 Request limits: body size, batch size, long texts, chunked batches
+
+def test_request_limits(monkeypatch):
+    import asyncio
+    import tracemalloc
+    import pandas as pd
+    import main
+    from cache import PredictionCache
+    from limits import TextLimits
+
+    monkeypatch.setattr(main, "cache", PredictionCache(0))
+    long_text = "send the quarterly report to the finance team by email " * 2000
+
+    # Windowed by default: a long text is classified, not rejected
+    response = client.post("/api/classify", json={"text": long_text})
+    assert response.status_code == 200 and response.json()["intent"] == "email_send"
+    assert client.post("/api/classify/batch", json={"texts": ["hi"] * (main.MAX_BATCH_SIZE + 1)}).status_code == 422
+
+    monkeypatch.setattr(main, "TEXT_LIMITS", TextLimits(max_chars=1000, mode="reject"))
+    response = client.post("/api/classify/batch", json={"texts": ["hi", long_text]})
+    assert response.status_code == 413 and response.json()["detail"].startswith("Text 1 has")
+    rows = client.post("/api/classify/stream", content=f'"hi"\n"{long_text}"\n').text.splitlines()
+    assert "error" not in rows[0] and "limit is 1000" in rows[1]
+
+    monkeypatch.setattr(main, "MAX_BODY_BYTES", 1000)
+    assert client.post("/api/classify", json={"text": long_text}).status_code == 413
+    rows = client.post("/api/classify/stream", content=f'"hi"\n"{long_text}"\n"bye"\n').text.splitlines()
+    assert len(rows) == 3 and "longer than 1000 bytes" in rows[1]
+
+    # Batches are scored BATCH_CHUNK_SIZE texts per model call
+    texts = [f"{text} {i}" for i, text in enumerate(pd.read_csv("data/full_dataset.csv")["text"].astype(str))]
+    sizes = []
+    predict = main.predict_intents
+    monkeypatch.setattr(main, "predict_intents", lambda texts, k=1: sizes.append(len(texts)) or predict(texts, k))
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 300)
+    monkeypatch.setattr(main, "MAX_BODY_BYTES", 2 ** 20)
+    response = client.post("/api/classify/batch", json={"texts": texts[:700]})
+    assert response.status_code == 200 and len(response.json()) == 700
+    assert sizes == [300, 300, 100]
+
+    def working_memory(batch):
+        tracemalloc.start()
+        result = asyncio.run(main.run_chunked(batch))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(result[0]) == len(batch)
+        return peak - current
+
+    # Beyond the results themselves, memory stays flat as the batch grows
+    batch = (texts * 8)[:8000]
+    small, large = working_memory(batch[:1000]), working_memory(batch)
+    assert large < 1.5 * small
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", len(batch))
+    assert working_memory(batch) > 3 * large
@@ -0,0 +1,63 @@
+import asyncio
+
+from metrics import Histogram, MetricsMiddleware, MetricsRegistry
+
+
+def test_counter_and_histogram_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    latency = registry.histogram("latency_seconds", "Latency", ("path",), buckets=(0.1, 1.0))
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    latency.observe(0.05, "/a")
+    latency.observe(0.5, "/a")
+    latency.observe(5.0, "/a")
+    text = registry.render()
+    assert 'requests_total{path="/a"} 3' in text
+    assert 'latency_seconds_bucket{path="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{path="/a",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{path="/a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{path="/a"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_observe_many_matches_observe():
+    values = [0.0, 0.1, 0.15, 0.5, 1.0, 3.0]
+    one, many = Histogram("h", "", buckets=(0.1, 0.5, 1.0)), Histogram("h", "", buckets=(0.1, 0.5, 1.0))
+    for v in values:
+        one.observe(v)
+    many.observe_many(values)
+    assert one.render() == many.render()
+
+
+def test_gauge_callback():
+    registry = MetricsRegistry()
+    registry.gauge("size", "Size", lambda: 7)
+    registry.gauge("model", "Model", lambda: {"v2": 1}, labelname="version")
+    text = registry.render()
+    assert "size 7" in text
+    assert 'model{version="v2"} 1' in text
+    registry.callback_counter("hits_total", "Hits", lambda: 3)
+    assert "# TYPE hits_total counter\nhits_total 3" in registry.render()
+
+
+def test_middleware_labels_by_route_and_status():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("method", "path", "status"))
+    latency = registry.histogram("latency_seconds", "Latency", ("method", "path"))
+
+    class Route:
+        path = "/items/{id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app, requests, latency)
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/items/42"}, None, send))
+    assert requests.value("GET", "/items/{id}", "404") == 1
+    assert latency.count("GET", "/items/{id}") == 1
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from online import FeedbackBufferFull, OnlineLearner, next_online_version
+from registry import ModelBundle, ModelRegistry, validate_bundle
+
+CLASSES = ["calendar_schedule", "email_send", "general_chat", "knowledge_query", "web_search"]
+
+
+@pytest.fixture(scope="module")
+def learner():
+    return OnlineLearner.seed_from_csv("data/train_dataset.csv", CLASSES)
+
+
+def test_seeded_model_is_accurate(learner, tmp_path):
+    learner.save(str(tmp_path))
+    bundle = ModelBundle.load(str(tmp_path), scoring="linear", featurizer="fast")
+    validate_bundle(bundle)
+    test = pd.read_csv("data/test_dataset.csv")
+    intents, _ = bundle.predict(test["text"].astype(str).tolist())
+    assert (pd.Series(intents) == test["intent"]).mean() > 0.9
+    # The NumPy scorer matches SGDClassifier.predict_proba
+    sklearn = ModelBundle.load(str(tmp_path))
+    texts = test["text"].astype(str).tolist()[:20]
+    assert abs(bundle.predict_proba(texts) - sklearn.predict_proba(texts)).max() < 1e-9
+
+
+def test_feedback_moves_predictions(learner, tmp_path):
+    text = "ping the quarterly numbers over to dana"
+    before = learner.model.predict_proba(learner.vectorizer.transform([text]))[0, 1]
+    assert learner.add([text] * 5, ["email_send"] * 5) == 5
+    assert learner.apply() == 5
+    assert learner.buffered == 0 and learner.applied == 5 and learner.updates == 1
+    assert learner.model.predict_proba(learner.vectorizer.transform([text]))[0, 1] > before
+    assert learner.apply() == 0
+
+    learner.save(str(tmp_path))
+    resumed = OnlineLearner.resume(str(tmp_path))
+    assert (resumed.applied, resumed.updates) == (5, 1)
+
+
+def test_unknown_intent_rejected(learner):
+    with pytest.raises(ValueError):
+        learner.add(["hello", "book a flight"], ["general_chat", "travel_booking"])
+    assert learner.buffered == 0
+
+
+def test_buffer_is_capped(learner, monkeypatch):
+    monkeypatch.setattr(learner, "max_buffered", 3)
+    assert learner.add(["hello", "hi"], ["general_chat"] * 2) == 2
+    with pytest.raises(FeedbackBufferFull):
+        learner.add(["hey", "howdy"], ["general_chat"] * 2)
+    assert learner.buffered == 2 and learner.stats()["rejected"] == 2
+    assert learner.apply() == 2
+    assert learner.add(["hey", "howdy"], ["general_chat"] * 2) == 2
+    learner.apply()
+
+
+def test_next_online_version(tmp_path):
+    assert next_online_version("v2", ["v1", "v2"]) == "v2-online1"
+    assert next_online_version("v2-online3", ["v2", "v2-online3", "v3-online7"]) == "v2-online4"
+    registry = ModelRegistry(str(tmp_path))
+    for version in ("v2", "v2-online1", "v2-online2", "v3"):
+        registry.publish("models", version)
+    assert registry.versions() == ["v2", "v2-online1", "v2-online2", "v3"]
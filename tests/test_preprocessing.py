@@ -0,0 +1,48 @@
+import re
+
+import pandas as pd
+import pytest
+
+from preprocessing import STOPWORDS, clean_text, clean_texts
+
+
+def test_clean_text():
+    assert clean_text("Could YOU set up a meeting with the manager AT 5:45pm?") == "could set meeting manager 545pm"
+    assert clean_text("What's our company's\nvacation policy") == "whats companys vacation policy"
+    assert clean_text("  ") == ""
+
+
+def test_treebank_contractions():
+    assert clean_text("I cannot go") == "go"
+    assert clean_text("gonna search, wanna email") == "gon na search wan na email"
+    assert clean_text("gimme lemme gotta") == "gim lem got ta"
+    assert clean_text("gonnax wannabe") == "gonnax wannabe"
+
+
+def test_stopwords_never_reach_the_vectorizer():
+    texts = clean_texts(pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist())
+    assert not any(token in STOPWORDS for text in texts for token in text.split())
+
+
+def nltk_clean_text(text):
+    """The notebook's original implementation"""
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+
+    text = str(text).lower()
+    text = re.sub(r"\n", " ", text)
+    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)
+    tokens = word_tokenize(text)
+    stop_words = set(stopwords.words("english"))
+    return " ".join(t for t in tokens if t not in stop_words)
+
+
+def test_parity_with_nltk():
+    pytest.importorskip("nltk")
+    try:
+        nltk_clean_text("probe")
+    except LookupError:
+        pytest.skip("NLTK punkt/stopwords data not downloaded")
+    texts = pd.read_csv("data/full_dataset.csv")["text"].astype(str).tolist()
+    texts += ["I cannot. Gonna wanna gotta!", "Gimme, lemme... d'ye 'tis", "naïve İstanbul _under_ a.b"]
+    assert clean_texts(texts) == [nltk_clean_text(t) for t in texts]
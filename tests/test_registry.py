@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from registry import ModelBundle, ModelRegistry, validate_bundle
+
+
+def test_versions_sorted_and_incomplete_ignored(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish("models", "v2")
+    registry.publish("models", "v10")
+    (tmp_path / "v99").mkdir()  # missing artifacts
+    (tmp_path / ".v11.tmp").mkdir()
+    assert registry.versions() == ["v2", "v10"]
+    assert registry.latest() == "v10"
+    with pytest.raises(FileExistsError):
+        registry.publish("models", "v2")
+
+
+def test_load_reads_metrics(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    path = registry.publish("models", "v1")
+    (tmp_path / "v1" / "metrics.json").write_text(json.dumps({"accuracy": 0.9}))
+    bundle = registry.load()
+    assert bundle.version == "v1"
+    assert bundle.source == path
+    assert bundle.info()["metrics"] == {"accuracy": 0.9}
+    validate_bundle(bundle)
+
+
+def test_empty_registry(tmp_path):
+    with pytest.raises(KeyError):
+        ModelRegistry(str(tmp_path / "missing")).load()
+
+
+def test_validate_rejects_broken_model():
+    bundle = ModelBundle.load("models")
+    bundle.labels = bundle.labels[:2]
+    with pytest.raises(ValueError):
+        validate_bundle(bundle)
+
+
+def test_top_k_matches_full_sort():
+    from registry import top_k
+
+    probs = np.random.default_rng(0).dirichlet(np.ones(7), size=50)
+    for k in (1, 3, 7, 10):
+        idx, values = top_k(probs, k)
+        expected = np.argsort(-probs, axis=1)[:, :min(k, 7)]
+        np.testing.assert_array_equal(idx, expected)
+        np.testing.assert_array_equal(values, np.take_along_axis(probs, expected, axis=1))
+
+
+def test_predict_top_head_matches_predict():
+    bundle = ModelBundle.load("models")
+    texts = ["Send an email to John", "Search the web for news", "Hello there"]
+    intents, confs = bundle.predict_top(texts, 3)
+    assert [row[0] for row in intents] == bundle.predict(texts)[0]
+    assert all(len(row) == 3 and row == sorted(row, reverse=True) for row in confs)
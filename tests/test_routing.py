@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.naive_bayes import MultinomialNB
+
+import artifacts
+from registry import ModelBundle
+from routing import ShadowEvaluator, TrafficSplit, parse_mapping, predict_routed, take_rows
+
+TEXTS = ["Send an email to John", "Schedule a meeting on Friday", "Search the web for news",
+         "What is the vacation policy", "How are you today", "Email the budget to Sara"]
+
+
+@pytest.fixture(scope="module")
+def bundles():
+    """The trained model and a MultinomialNB fitted on the same vectorizer"""
+    model, vectorizer, le = artifacts.load_artifacts("models")
+    train = pd.read_csv("data/train_dataset.csv")
+    nb = MultinomialNB().fit(vectorizer.transform(train["text"].astype(str)), le.transform(train["intent"]))
+    options = {"scoring": "linear", "featurizer": "fast"}
+    return {"default": ModelBundle("v1", model, vectorizer, le, **options),
+            "nb": ModelBundle("nb", nb, vectorizer, le, **options)}
+
+
+def test_parse_mapping():
+    assert parse_mapping(" nb=models/nb, sgd = models/sgd ,") == {"nb": "models/nb", "sgd": "models/sgd"}
+    assert parse_mapping("") == {}
+    with pytest.raises(ValueError):
+        parse_mapping("nb")
+
+
+def test_traffic_split_is_weighted_and_deterministic():
+    split = TrafficSplit({"default": "90", "nb": "10", "off": "0"})
+    keys = [f"text number {i}" for i in range(10000)]
+    names = [split.assign(key) for key in keys]
+    assert names == [split.assign(key) for key in keys]
+    assert set(names) == {"default", "nb"}
+    assert 0.08 < names.count("nb") / len(names) < 0.12
+    with pytest.raises(ValueError):
+        TrafficSplit({"default": 0})
+
+
+def test_take_rows(bundles):
+    matrix = bundles["default"].vectorizer.transform(TEXTS)
+    rows = [4, 0, 2]
+    data, indices, indptr = take_rows((matrix.data, matrix.indices, matrix.indptr), rows)
+    expected = matrix[rows]
+    np.testing.assert_array_equal(data, expected.data)
+    np.testing.assert_array_equal(indices, expected.indices)
+    np.testing.assert_array_equal(indptr, expected.indptr)
+    assert (take_rows(matrix, rows) != expected).nnz == 0
+
+
+def test_predict_routed_shares_one_featurize_pass(bundles, monkeypatch):
+    assert bundles["default"].feature_key == bundles["nb"].feature_key
+    calls = []
+    for bundle in bundles.values():
+        monkeypatch.setattr(bundle, "featurize", lambda texts, f=bundle.featurize: calls.append(len(texts)) or f(texts))
+
+    names = ["default", "nb", "nb", "default", "nb", "default"]
+    timings = {}
+    intents, confs, groups = predict_routed(bundles, names, TEXTS, k=2, timings=timings)
+    assert calls == [len(TEXTS)]
+    assert set(timings) == {"preprocess", "featurize", "score", "decode"}
+    for name in ("default", "nb"):
+        rows = [i for i, n in enumerate(names) if n == name]
+        expected_intents, expected_confs = bundles[name].predict_top([TEXTS[i] for i in rows], 2)
+        assert [intents[i] for i in rows] == expected_intents
+        np.testing.assert_allclose([confs[i] for i in rows], expected_confs)
+    assert list(groups) == [bundles["nb"].feature_key]
+
+
+def test_shadow_counts_disagreements(bundles):
+    compared = []
+    shadow = ShadowEvaluator("nb", bundles["nb"], on_compare=lambda agreed, disagreed: compared.append((agreed, disagreed)))
+    names = ["default"] * 5 + ["nb"]
+    intents, _, groups = predict_routed(bundles, names, TEXTS)
+    # The last row was served by the shadow model itself and is not compared
+    served = [row[0] for row in intents[:5]] + [None]
+    served[1] = "not_an_intent"
+    assert shadow.submit(TEXTS, served, groups)
+    assert shadow.submit(TEXTS, served)  # no shared features: the shadow featurizes itself
+    shadow.shutdown()
+
+    nb_intents, _ = bundles["nb"].predict(TEXTS[:5])
+    disagreed = sum(a != b for a, b in zip(served, nb_intents))
+    stats = shadow.stats()
+    assert (stats["compared"], stats["disagreed"], stats["pending"]) == (10, 2 * disagreed, 0)
+    assert compared == [(5 - disagreed, disagreed)] * 2
+    assert {"text": TEXTS[1], "served": "not_an_intent", "shadow": nb_intents[1]} in stats["recent_disagreements"]
+
+
+def test_shadow_drops_when_backed_up(bundles):
+    shadow = ShadowEvaluator("nb", bundles["nb"], max_pending=0)
+    assert not shadow.submit(TEXTS, [None] * len(TEXTS))
+    assert shadow.stats()["dropped"] == len(TEXTS)
+
+
+def test_feature_key_is_lazy_and_mmap_independent(monkeypatch):
+    plain = ModelBundle.load("models")
+    mapped = ModelBundle.load("models", mmap=True)
+    assert "feature_key" not in mapped.__dict__
+    monkeypatch.setattr(artifacts.MappedVocabulary, "__getitem__", lambda *args: pytest.fail("per-term lookup"))
+    assert mapped.feature_key == plain.feature_key
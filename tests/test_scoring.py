@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.svm import LinearSVC
+
+import artifacts
+from scoring import LinearScorer, quantize_weights
+
+
+def test_parity_with_trained_model_on_test_set():
+    model, vectorizer, _ = artifacts.load_artifacts("models")
+    texts = pd.read_csv("data/test_dataset.csv")["text"].astype(str).tolist()
+    X = vectorizer.transform(texts + ["", "zzz qqq"])  # includes rows with no known terms
+    scorer = LinearScorer.from_estimator(model)
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X), rtol=1e-10, atol=1e-12)
+
+
+@pytest.fixture(scope="module")
+def train_data():
+    df = pd.read_csv("data/train_dataset.csv")
+    vectorizer = TfidfVectorizer().fit(df["text"])
+    return vectorizer.transform(df["text"]), df["intent"].to_numpy()
+
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(max_iter=500),
+    MultinomialNB(),
+    SGDClassifier(loss="log_loss", random_state=0),
+])
+def test_parity_across_model_families(train_data, model):
+    X, y = train_data
+    model.fit(X, y)
+    scorer = LinearScorer.from_estimator(model)
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X), rtol=1e-8, atol=1e-10)
+
+
+def test_binary_and_decision_only_models(train_data):
+    X, y = train_data
+    binary = LogisticRegression().fit(X, y == "email_send")
+    np.testing.assert_allclose(LinearScorer.from_estimator(binary).predict_proba(X), binary.predict_proba(X))
+
+    svc = LinearSVC().fit(X, y)
+    scorer = LinearScorer.from_estimator(svc)
+    np.testing.assert_allclose(scorer.decision_function(X), svc.decision_function(X))
+    assert (svc.classes_[scorer.predict_proba(X).argmax(axis=1)] == svc.predict(X)).all()
+
+
+def test_save_and_load(tmp_path):
+    model, _, _ = artifacts.load_artifacts("models")
+    scorer = LinearScorer.from_estimator(model)
+    scorer.save(tmp_path / "scorer.npz")
+    loaded = LinearScorer.load(tmp_path / "scorer.npz")
+    np.testing.assert_array_equal(loaded.weights, scorer.weights)
+    assert loaded.link == scorer.link
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_quantized_weights(tmp_path, mode):
+    model, vectorizer, _ = artifacts.load_artifacts("models")
+    X = vectorizer.transform(pd.read_csv("data/test_dataset.csv")["text"].astype(str))
+    scorer = LinearScorer.from_estimator(model)
+    weights, scale = quantize_weights(scorer.weights, mode)
+    quantized = LinearScorer(weights, scorer.bias, scorer.link, scorer.classes_, scale)
+    assert quantized.weights.dtype == mode
+
+    probs = quantized.predict_proba(X)
+    np.testing.assert_allclose(probs, scorer.predict_proba(X), atol=0.02)
+    np.testing.assert_array_equal(probs.argmax(axis=1), scorer.predict_proba(X).argmax(axis=1))
+    quantized.save(tmp_path / "scorer.npz")
+    np.testing.assert_array_equal(LinearScorer.load(tmp_path / "scorer.npz").predict_proba(X), probs)
+
+
+def test_int8_weights_need_scale():
+    with pytest.raises(ValueError, match="scale"):
+        LinearScorer(np.zeros((3, 2), dtype=np.int8), np.zeros(2), "softmax", [0, 1])
+
+
+def test_unsupported_model():
+    from sklearn.ensemble import RandomForestClassifier
+    with pytest.raises(ValueError):
+        LinearScorer.from_estimator(RandomForestClassifier())
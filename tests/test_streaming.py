@@ -0,0 +1,94 @@
+import asyncio
+import json
+import os
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from create_dataset import intent_templates, word_variations
+from main import app
+
+client = TestClient(app)
+
+
+def synthetic_lines(n, seed=0):
+    """NDJSON lines built from the create_dataset.py templates"""
+    rng = random.Random(seed)
+    templates = [t for ts in intent_templates.values() for t in ts]
+    for _ in range(n):
+        text = rng.choice(templates)
+        for placeholder, words in word_variations.items():
+            text = text.replace(f"{{{placeholder}}}", rng.choice(words))
+        yield json.dumps({"text": text}) + "\n"
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def push_stream(lines, body_chunk_lines=500):
+    """Drive the endpoint at the ASGI level: feed the body lazily, count output lines"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/classify/stream", "raw_path": b"/api/classify/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    lines = iter(lines)
+    stats = {"rows": 0, "status": None, "peak_rss": rss_mb(), "start_rss": rss_mb()}
+
+    async def receive():
+        body = "".join(line for _, line in zip(range(body_chunk_lines), lines)).encode()
+        return {"type": "http.request", "body": body, "more_body": bool(body)}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            stats["rows"] += message.get("body", b"").count(b"\n")
+            stats["peak_rss"] = max(stats["peak_rss"], rss_mb())
+
+    await app(scope, receive, send)
+    return stats
+
+
+def test_stream_ndjson_and_errors():
+    body = '{"text": "Send an email to John"}\n"How are you"\n\nnot json\n{"text": ""}\n{"text": "Schedule a meeting"}'
+    response = client.post("/api/classify/stream", content=body, headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r.get("text") for r in rows] == ["Send an email to John", "How are you", None, None, "Schedule a meeting"]
+    assert rows[2]["line"] == 4 and "error" in rows[2]
+    assert rows[3]["line"] == 5
+    assert all("intent" in rows[i] for i in (0, 1, 4))
+
+
+def test_stream_plain_text_lines():
+    body = "Send an email to John\r\nSearch the web for hotel deals\n"
+    response = client.post("/api/classify/stream", content=body, headers={"content-type": "text/plain"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["text"] for r in rows] == ["Send an email to John", "Search the web for hotel deals"]
+
+
+@pytest.mark.parametrize("n_lines", [
+    50_000,
+    pytest.param(2_000_000, marks=pytest.mark.skipif(
+        not os.getenv("RUN_SLOW_TESTS"), reason="multi-million-line stream; set RUN_SLOW_TESTS=1")),
+])
+def test_large_stream_keeps_memory_flat(n_lines):
+    stats = asyncio.run(push_stream(synthetic_lines(n_lines)))
+    assert stats["status"] == 200
+    assert stats["rows"] == n_lines
+    # Input and output are each ~60-80 bytes per line; neither may accumulate
+    assert stats["peak_rss"] - stats["start_rss"] < 64
+
+
+def test_stream_top_k_and_threshold():
+    body = "Send an email to John\nSearch the web for news\n"
+    response = client.post("/api/classify/stream?top_k=2&threshold=1.0", content=body,
+                           headers={"Content-Type": "text/plain"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["intent"] for row in rows] == ["unknown", "unknown"]
+    assert all(len(row["top_intents"]) == 2 for row in rows)
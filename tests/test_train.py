@@ -0,0 +1,47 @@
+import json
+import os
+
+from registry import ModelBundle, validate_bundle
+from train import expand_grid, train
+
+VECTORIZER_GRID = {"max_features": [5000], "ngram_range": [(1, 1), (1, 2)]}
+MODEL_GRID = {"LogisticRegression": {"C": [1, 10], "max_iter": [1000]}, "MultinomialNB": {"alpha": [0.3]}}
+
+
+def test_expand_grid():
+    assert expand_grid({"b": [1, 2], "a": ["x"]}) == [{"a": "x", "b": 1}, {"a": "x", "b": 2}]
+
+
+def test_train_writes_servable_artifacts(tmp_path):
+    out, cache = str(tmp_path / "out"), str(tmp_path / "cache")
+    logs = []
+    metrics = train("data/train_dataset.csv", "data/validation_dataset.csv", "data/test_dataset.csv", out, cache,
+                    jobs=2, vectorizer_grid=VECTORIZER_GRID, model_grid=MODEL_GRID, log=logs.append)
+    assert len(metrics["search"]) == 6
+    assert metrics["accuracy"] == metrics["test"]["accuracy"] > 0.9
+    assert set(metrics["test"]["f1_per_class"]) == set(metrics["classes"])
+    assert "Features: 0 cached, 2 built" in logs[1]
+    with open(os.path.join(out, "metrics.json")) as f:
+        assert json.load(f)["model"] == metrics["model"]
+
+    for options in ({}, {"scoring": "linear", "featurizer": "fast"}):
+        bundle = ModelBundle.load(out, **options)
+        validate_bundle(bundle)
+        assert bundle.info()["metrics"]["accuracy"] == metrics["accuracy"]
+    assert ModelBundle.load(out, scoring="linear", featurizer="fast").compiled is not None
+
+    # Features are reused from the cache; only the models are refit, searching on a sample
+    logs.clear()
+    again = train("data/train_dataset.csv", "data/validation_dataset.csv", "data/test_dataset.csv", out, cache,
+                  jobs=1, search_rows=400, vectorizer_grid=VECTORIZER_GRID, model_grid=MODEL_GRID,
+                  family_out=str(tmp_path / "families"), log=logs.append)
+    assert "Features: 2 cached, 0 built" in logs[1]
+    assert any(line.startswith("Refit on all 800") for line in logs)
+    assert (again["search_rows"], again["rows"]["train"]) == (400, 800)
+    assert len(os.listdir(cache)) == 2
+
+    # One model per family, all on the winner's vectorizer
+    families = sorted(os.listdir(tmp_path / "families"))
+    assert families == ["LogisticRegression", "MultinomialNB"]
+    bundles = [ModelBundle.load(str(tmp_path / "families" / family)) for family in families]
+    assert bundles[0].feature_key == bundles[1].feature_key == ModelBundle.load(out).feature_key
@@ -0,0 +1,29 @@
+import asyncio
+import math
+
+import pytest
+
+from workers import InferencePool, PoolSaturated
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_run_on_pool(mode):
+    pool = InferencePool(mode, max_workers=2)
+    assert asyncio.run(pool.run(math.sqrt, 16.0)) == 4.0
+    pool.shutdown()
+
+
+def test_admission_limit():
+    pool = InferencePool("thread", max_workers=1, max_pending=1)
+    with pool.admit():
+        with pytest.raises(PoolSaturated):
+            with pool.admit():
+                pass
+    assert pool.stats()["rejected"] == 1
+    assert pool.pending == 0
+    pool.shutdown()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        InferencePool("fiber")
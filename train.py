@@ -0,0 +1,325 @@
+"""Headless training: cached features, parallel model search, artifacts + metrics.
+
+Does what the notebook's training cells do, without refitting the
+vectorizer for every configuration and without running the search serially:
+
+  1. Read the train / validation (/ test) splits (CSV or Parquet) and clean
+     the texts with preprocessing.clean_text, as serving does.
+  2. For every vectorizer setting, fit a TfidfVectorizer on the training
+     split and store the vectorizer and the sparse matrices of every split
+     in --cache-dir, keyed by a hash of the settings and the contents of the
+     data files. Later runs, and every model tried on those features, reuse
+     them.
+  3. Fit every (features, model family, hyperparameters) candidate on a
+     process pool; workers read the cached matrices from disk.
+  4. Keep the candidate with the best weighted F1 on the validation split,
+     score it on the test split and write the three artifact files,
+     metrics.json (read by /api/model/info) and a compiled model.bundle.
+  5. With --family-out, also write the best candidate of every other model
+     family on the same features to <dir>/<family>. These share the winner's
+     vectorizer, so the server can host them next to it (INTENT_MODELS)
+     and featurize once for all of them.
+
+    python train.py --out models/trained
+    python train.py --train data/big_train.parquet --jobs 8 --publish v3
+    python train.py --family-out models/families
+
+The model families are the notebook's LogisticRegression and MultinomialNB,
+plus a log-loss SGDClassifier in place of its linear SVM: every candidate
+needs a predict_proba that the NumPy scorer reproduces exactly.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+from preprocessing import clean_texts
+from registry import METRICS_FILE, ModelRegistry
+
+VECTORIZER_GRID = {
+    "max_features": [5000],
+    "ngram_range": [(1, 1), (1, 2)],
+    "sublinear_tf": [False, True],
+}
+MODEL_GRID = {
+    # liblinear is left out: recent scikit-learn releases reject it for more than two classes
+    "LogisticRegression": {"C": [0.1, 1, 10, 100], "solver": ["lbfgs"], "max_iter": [1000]},
+    "MultinomialNB": {"alpha": [0.1, 0.3, 1.0]},
+    "SGDClassifier": {"loss": ["log_loss"], "alpha": [1e-5, 1e-4, 1e-3], "random_state": [0]},
+}
+SPLITS = ("train", "validation", "test")
+# Bumped whenever the cached files change layout
+CACHE_FORMAT = 1
+
+
+def expand_grid(grid):
+    """Every combination of a {param: [values]} grid, as a list of dicts"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def make_estimator(family, params):
+    if family == "LogisticRegression":
+        from sklearn.linear_model import LogisticRegression as estimator
+    elif family == "MultinomialNB":
+        from sklearn.naive_bayes import MultinomialNB as estimator
+    elif family == "SGDClassifier":
+        from sklearn.linear_model import SGDClassifier as estimator
+    else:
+        raise ValueError(f"Unknown model family: {family!r}")
+    return estimator(**params)
+
+
+def read_split(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(path, columns=["text", "intent"])
+    else:
+        df = pd.read_csv(path, usecols=["text", "intent"], dtype={"text": str}, keep_default_na=False)
+    return df["text"].astype(str).tolist(), df["intent"].astype(str).to_numpy()
+
+
+def file_digest(path, block=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(block):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def feature_key(vectorizer_params, data_digests, preprocess):
+    """Cache key of one feature set: vectorizer settings, data contents and preprocessing"""
+    payload = json.dumps({"format": CACHE_FORMAT, "vectorizer": vectorizer_params, "data": data_digests,
+                          "preprocess": preprocess}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def build_features(directory, vectorizer_params, texts):
+    """Fit the vectorizer on texts["train"] and store it with every split's matrix under directory"""
+    import joblib
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(**{**vectorizer_params, "ngram_range": tuple(vectorizer_params["ngram_range"])})
+    matrices = {"train": vectorizer.fit_transform(texts["train"])}
+    for split in texts:
+        if split != "train":
+            matrices[split] = vectorizer.transform(texts[split])
+    # Written under a temporary name and renamed, so a crashed run never leaves a half-written entry
+    staging = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix=".build-")
+    for split, X in matrices.items():
+        sparse.save_npz(os.path.join(staging, f"X_{split}.npz"), X.tocsr(), compressed=False)
+    joblib.dump(vectorizer, os.path.join(staging, artifacts.VECTORIZER_FILE))
+    with open(os.path.join(staging, "params.json"), "w") as f:
+        json.dump(vectorizer_params, f)
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        # Another run built the same entry first
+        shutil.rmtree(staging)
+    return time.perf_counter() - start
+
+
+@lru_cache(maxsize=2)
+def load_matrices(directory):
+    from scipy import sparse
+
+    return {split: sparse.load_npz(os.path.join(directory, f"X_{split}.npz"))
+            for split in SPLITS if os.path.exists(os.path.join(directory, f"X_{split}.npz"))}
+
+
+def split_scores(y_true, y_pred, classes=None):
+    from sklearn.metrics import accuracy_score, f1_score
+
+    scores = {"accuracy": float(accuracy_score(y_true, y_pred)),
+              "f1_weighted": float(f1_score(y_true, y_pred, average="weighted")),
+              "f1_macro": float(f1_score(y_true, y_pred, average="macro"))}
+    if classes is not None:
+        per_class = f1_score(y_true, y_pred, average=None, labels=np.arange(len(classes)))
+        scores["f1_per_class"] = {str(c): float(f) for c, f in zip(classes, per_class)}
+    return scores
+
+
+def evaluate_candidate(directory, family, params, y_train, y_val, sample=None):
+    """Fit one candidate on cached features (only the `sample` training rows if given); returns (result row, fitted model)"""
+    X = load_matrices(directory)
+    X_train = X["train"] if sample is None else X["train"][sample]
+    start = time.perf_counter()
+    model = make_estimator(family, params).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    scores = split_scores(y_val, model.predict(X["validation"]))
+    return {"model": family, "params": params, **scores, "fit_seconds": fit_seconds}, model
+
+
+def write_artifacts(out, model, vectorizer, le, metrics):
+    import joblib
+
+    os.makedirs(out, exist_ok=True)
+    joblib.dump(model, os.path.join(out, artifacts.MODEL_FILE))
+    joblib.dump(vectorizer, os.path.join(out, artifacts.VECTORIZER_FILE))
+    joblib.dump(le, os.path.join(out, artifacts.LABEL_ENCODER_FILE))
+    artifacts.compile_bundle(model, vectorizer, le, os.path.join(out, artifacts.BUNDLE_FILE))
+    with open(os.path.join(out, METRICS_FILE), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+
+def train(train_path, validation_path, test_path=None, out="models/trained", cache_dir=".feature_cache",
+          jobs=None, preprocess=True, search_rows=None, vectorizer_grid=VECTORIZER_GRID, model_grid=MODEL_GRID,
+          family_out=None, log=print):
+    """Run the search and write the winning artifacts to out; returns the metrics dict.
+
+    With search_rows, candidates are compared on a random sample of that many
+    training rows and only the winner is refit on the whole training split.
+    With family_out, the best candidate of each model family on the winner's
+    features is written to family_out/<family> as well.
+    """
+    import joblib
+    from sklearn import __version__ as sklearn_version
+    from sklearn.preprocessing import LabelEncoder
+
+    start = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    paths = {"train": train_path, "validation": validation_path}
+    if test_path:
+        paths["test"] = test_path
+    texts, labels = {}, {}
+    for split, path in paths.items():
+        texts[split], labels[split] = read_split(path)
+    le = LabelEncoder().fit(labels["train"])
+    y = {split: le.transform(values) for split, values in labels.items()}
+    log(f"Read {', '.join(f'{len(t):,} {s}' for s, t in texts.items())} rows in {time.perf_counter() - start:.2f}s")
+
+    digests = {split: file_digest(path) for split, path in paths.items()}
+    os.makedirs(cache_dir, exist_ok=True)
+    feature_dirs = {}
+    for params in expand_grid(vectorizer_grid):
+        params = {**params, "ngram_range": list(params["ngram_range"])} if "ngram_range" in params else params
+        feature_dirs[feature_key(params, digests, preprocess)] = params
+    candidates = [(key, family, params) for key in feature_dirs
+                  for family, grid in model_grid.items() for params in expand_grid(grid)]
+
+    sample = None
+    if search_rows and search_rows < len(y["train"]):
+        sample = np.sort(np.random.default_rng(0).choice(len(y["train"]), search_rows, replace=False))
+    y_search = y["train"] if sample is None else y["train"][sample]
+
+    missing = {key: params for key, params in feature_dirs.items() if not os.path.isdir(os.path.join(cache_dir, key))}
+    # Texts are only needed (and cleaned) when some feature set has to be built
+    if missing and preprocess:
+        texts = {split: clean_texts(values) for split, values in texts.items()}
+
+    results = []
+    best = None
+    # (feature key, family) -> best (result, model) of that family on those features
+    best_by_family = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        builds = [pool.submit(build_features, os.path.join(cache_dir, key), params, texts)
+                  for key, params in missing.items()]
+        for future in builds:
+            future.result()
+        log(f"Features: {len(feature_dirs) - len(missing)} cached, {len(missing)} built "
+            f"({time.perf_counter() - start:.2f}s)")
+        futures = {pool.submit(evaluate_candidate, os.path.join(cache_dir, key), family, params,
+                               y_search, y["validation"], sample): key
+                   for key, family, params in candidates}
+        for future in as_completed(futures):
+            result, model = future.result()
+            result["vectorizer"] = {"key": futures[future], **feature_dirs[futures[future]]}
+            results.append(result)
+            if best is None or result["f1_weighted"] > best[0]["f1_weighted"]:
+                best = result, model
+            family_key = (futures[future], result["model"])
+            if family_key not in best_by_family or result["f1_weighted"] > best_by_family[family_key][0]["f1_weighted"]:
+                best_by_family[family_key] = result, model
+    result, model = best
+    log(f"Searched {len(candidates)} candidates in {time.perf_counter() - start:.2f}s; best: {result['model']} "
+        f"{result['params']} on {result['vectorizer']} (validation f1_weighted {result['f1_weighted']:.4f})")
+
+    feature_dir = os.path.join(cache_dir, result["vectorizer"]["key"])
+    vectorizer = joblib.load(os.path.join(feature_dir, artifacts.VECTORIZER_FILE))
+    X = load_matrices(feature_dir)
+    if sample is not None:
+        refit_start = time.perf_counter()
+        model = make_estimator(result["model"], result["params"]).fit(X["train"], y["train"])
+        log(f"Refit on all {len(y['train']):,} training rows in {time.perf_counter() - refit_start:.2f}s")
+    metrics = {
+        "model": result["model"],
+        "params": result["params"],
+        "vectorizer": result["vectorizer"],
+        "preprocess": preprocess,
+        "validation": split_scores(y["validation"], model.predict(X["validation"]), le.classes_),
+        "rows": {split: len(values) for split, values in y.items()},
+        "search_rows": len(y_search),
+        "classes": [str(c) for c in le.classes_],
+        "data": {split: {"path": paths[split], "sha256": digests[split]} for split in paths},
+        "search": sorted(results, key=lambda r: -r["f1_weighted"]),
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "sklearn_version": sklearn_version,
+        "python": platform.python_version(),
+    }
+    if "test" in y:
+        metrics["test"] = split_scores(y["test"], model.predict(X["test"]), le.classes_)
+    # What /api/model/info reports as "accuracy": test accuracy when there is a test split
+    metrics["accuracy"] = metrics.get("test", metrics["validation"])["accuracy"]
+
+    metrics["seconds"] = time.perf_counter() - start
+    write_artifacts(out, model, vectorizer, le, metrics)
+    log(f"Accuracy {metrics['accuracy']:.4f}; artifacts written to {out} in {metrics['seconds']:.2f}s")
+
+    if family_out:
+        for (key, family), (family_result, family_model) in best_by_family.items():
+            if key != result["vectorizer"]["key"]:
+                continue
+            if family == result["model"]:
+                family_model = model
+            elif sample is not None:
+                family_model = make_estimator(family, family_result["params"]).fit(X["train"], y["train"])
+            family_metrics = {
+                "model": family,
+                "params": family_result["params"],
+                "vectorizer": result["vectorizer"],
+                "preprocess": preprocess,
+                "validation": split_scores(y["validation"], family_model.predict(X["validation"]), le.classes_),
+                "classes": metrics["classes"],
+                "trained_at": metrics["trained_at"],
+            }
+            if "test" in y:
+                family_metrics["test"] = split_scores(y["test"], family_model.predict(X["test"]), le.classes_)
+            family_metrics["accuracy"] = family_metrics.get("test", family_metrics["validation"])["accuracy"]
+            write_artifacts(os.path.join(family_out, family), family_model, vectorizer, le, family_metrics)
+            log(f"{family}: accuracy {family_metrics['accuracy']:.4f}, written to {os.path.join(family_out, family)}")
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the intent model with a cached, parallel search")
+    parser.add_argument("--train", default="data/train_dataset.csv")
+    parser.add_argument("--validation", default="data/validation_dataset.csv")
+    parser.add_argument("--test", default="data/test_dataset.csv", help="held-out split ('' to skip)")
+    parser.add_argument("--out", default="models/trained", help="directory for the winning artifacts")
+    parser.add_argument("--cache-dir", default=".feature_cache")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--search-rows", type=int, help="compare candidates on a sample of this many training rows")
+    parser.add_argument("--no-preprocess", action="store_true", help="train on raw texts (serve with INTENT_PREPROCESS=0)")
+    parser.add_argument("--family-out", metavar="DIR",
+                        help="also write the best model of each family, on the same features, to DIR/<family>")
+    parser.add_argument("--publish", metavar="VERSION", help="also publish the artifacts to the registry")
+    parser.add_argument("--registry", default="models/registry")
+    args = parser.parse_args()
+
+    train(args.train, args.validation, args.test or None, args.out, args.cache_dir, args.jobs, not args.no_preprocess,
+          args.search_rows, family_out=args.family_out)
+    if args.publish:
+        print(f"Published {ModelRegistry(args.registry).publish(args.out, args.publish)}")
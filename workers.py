@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class PoolSaturated(Exception):
+    """Raised when more inference calls are pending than the pool accepts"""
+
+
+class InferencePool:
+    """Dedicated executor for CPU-bound inference with admission control.
+
+    mode is "thread" or "process". At most max_pending calls may be queued or
+    running at once; beyond that admit() raises PoolSaturated straight away so
+    the API can answer 503 instead of letting latency grow without bound.
+    """
+
+    def __init__(self, mode="thread", max_workers=4, max_pending=256, initializer=None, initargs=()):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode!r} (expected 'thread' or 'process')")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self.executor = self._make_executor(initializer, initargs)
+
+    def _make_executor(self, initializer, initargs):
+        if self.mode == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference",
+                initializer=initializer, initargs=initargs,
+            )
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=initializer, initargs=initargs)
+
+    def restart(self, initializer=None, initargs=()):
+        """Swap in fresh workers; calls already submitted finish on the old ones"""
+        old, self.executor = self.executor, self._make_executor(initializer, initargs)
+        old.shutdown(wait=False)
+
+    @contextmanager
+    def admit(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.pending} inference calls already pending")
+            self.pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool without blocking the event loop"""
+        with self.admit():
+            return await asyncio.wrap_future(self.executor.submit(fn, *args))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }